@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+"""
+Compares the direct XML <-> JSON event data conversion against the serialized xmltodict round trip
+
+    python benchmarks/event_conversion.py [iterations]
+"""
+
+import sys
+import timeit
+
+from compy.actors.mixins.event import _getConversionMethods
+
+def build_json(items=200):
+    return {"root": {"item": [{"@id": str(index), "name": "item {0}".format(index), "value": index, "tags": {"tag": ["a", "b"]}} for index in xrange(items)]}}
+
+def main(iterations=200):
+    methods = _getConversionMethods()
+    _json = build_json()
+    xml = methods.json_to_xml(_json)
+    cases = [
+        ("json -> xml (direct)", methods.json_to_xml, _json),
+        ("json -> xml (xmltodict)", methods.json_to_xml_serialized, _json),
+        ("xml -> json (direct)", methods.xml_to_json, xml),
+        ("xml -> json (xmltodict)", methods.xml_to_json_serialized, xml)
+    ]
+    for name, method, data in cases:
+        seconds = timeit.timeit(lambda: method(data), number=iterations)
+        print "{name:<26} {ms:8.3f} ms/conversion".format(name=name, ms=seconds * 1000 / iterations)
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
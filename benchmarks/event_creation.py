@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Compares event creation throughput and per-event memory against an approximation of the previous eager initialization, which
+generated a uuid4 and datetime per event, formatted log times and data up front and built the full HTTP environment
+
+    python benchmarks/event_creation.py [iterations]
+"""
+
+import logging
+import sys
+import timeit
+from datetime import datetime
+from uuid import uuid4 as uuid
+
+from compy.event import Event, LogEvent, HttpEvent
+
+def _eager_event(**kwargs):
+    event = Event.__new__(Event)
+    event.__dict__.update({
+        "_service": "default",
+        "_event_id": uuid().get_hex(),
+        "_error": None,
+        "created": datetime.now()
+    })
+    event.meta_id = event._event_id
+    event._data = None
+    event.__dict__.update(kwargs)
+    return event
+
+def eager_event():
+    return _eager_event()
+
+def eager_log_event():
+    log_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
+    event = _eager_event(id=None, level=logging.INFO, time=log_time, origin_actor="actor", message="message")
+    event._data = {"id": None, "level": logging.INFO, "time": log_time, "origin_actor": "actor", "message": "message"}
+    return event
+
+def eager_http_event():
+    environment = {
+        "request": {"headers": {}, "method": None, "url": {"scheme": None, "domain": None, "query": None, "path": None, "path_args": {}, "query_args": {}}},
+        "response": {"headers": {}, "status": 200},
+        "remote": {"address": None, "port": None},
+        "server": {"name": None, "port": None, "protocol": None},
+        "accepted_methods": []
+    }
+    return _eager_event(environment=environment)
+
+def sizeof(obj, seen=None):
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(sizeof(key, seen) + sizeof(value, seen) for key, value in obj.iteritems())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(sizeof(value, seen) for value in obj)
+    elif hasattr(obj, "__dict__"):
+        size += sizeof(obj.__dict__, seen)
+    return size
+
+def main(iterations=100000):
+    cases = [
+        ("Event (eager)", eager_event),
+        ("Event", Event),
+        ("LogEvent (eager)", eager_log_event),
+        ("LogEvent", lambda: LogEvent(logging.INFO, "actor", "message")),
+        ("HttpEvent (eager)", eager_http_event),
+        ("HttpEvent", HttpEvent)
+    ]
+    for name, factory in cases:
+        seconds = timeit.timeit(factory, number=iterations)
+        print "{name:<20} {rate:10.0f} events/s {size:6d} bytes/event".format(name=name, rate=iterations / seconds, size=sizeof(factory()))
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Compares JSON validation against the extended Draft 4 validator as it was previously used (validate, then iter_errors for the
+messages) with the single pass and compiled check modes of the JSONValidator, for valid and invalid payloads of representative schemas.
+Result cache hits are measured for parsed data and for the raw json of events with lazily parsed data
+
+    python benchmarks/json_validation.py [iterations]
+"""
+
+import json
+import sys
+import timeit
+
+from compy.actors.jsonvalidator import JSONValidator, _validation_errors, _format_errors
+from compy.event import JSONEvent
+from compy.actors.util.schemacheck import compile_check
+
+ORDER_SCHEMA = {
+    "type": "object",
+    "required": ["id", "customer", "lines"],
+    "properties": {
+        "id": {"type": "integer", "minimum": 1},
+        "customer": {
+            "type": "object",
+            "required": ["name", "email"],
+            "properties": {
+                "name": {"type": "string", "minLength": 1, "maxLength": 64},
+                "email": {"type": "string", "pattern": "^[^@]+@[^@]+$"}
+            }
+        },
+        "lines": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["sku", "quantity"],
+                "properties": {
+                    "sku": {"type": "string", "pattern": "^[A-Z]{3}-[0-9]{4}$"},
+                    "quantity": {"type": "integer", "minimum": 1},
+                    "price": {"type": "number", "minimum": 0}
+                },
+                "additionalProperties": False
+            }
+        },
+        "status": {"enum": ["new", "paid", "shipped"]}
+    }
+}
+
+EVENT_SCHEMA = {
+    "type": "object",
+    "required": ["type", "payload"],
+    "properties": {
+        "type": {"type": "string"},
+        "payload": {"type": "object", "additionalProperties": {"type": ["string", "number", "boolean", "null"]}}
+    }
+}
+
+def build_order(lines=50, valid=True):
+    return {
+        "id": 1 if valid else 0,
+        "customer": {"name": "customer", "email": "customer@example.com" if valid else "customer"},
+        "lines": [{"sku": "ABC-{0:04d}".format(index), "quantity": index + 1, "price": 1.5} for index in xrange(lines)],
+        "status": "paid"
+    }
+
+def build_event(fields=50, valid=True):
+    return {"type": "update", "payload": {"field{0}".format(index): index if valid else [index] for index in xrange(fields)}}
+
+def previous_validation(validator, data):
+    try:
+        validator.validate(data)
+    except Exception:
+        return _format_errors(validator.iter_errors(data))
+
+def main(iterations=500):
+    for schema_name, schema, build in (("order", ORDER_SCHEMA, build_order), ("event", EVENT_SCHEMA, build_event)):
+        validator = JSONValidator._build_validator(schema)
+        check = compile_check(schema)
+        cases = [
+            ("validate + iter_errors", lambda data: previous_validation(validator, data)),
+            ("single pass", lambda data: _validation_errors(validator, data)),
+            ("single pass, max_errors=1", lambda data: _validation_errors(validator, data, max_errors=1)),
+            ("compiled check", lambda data: _validation_errors(validator, data, check=check))
+        ]
+        for valid in (True, False):
+            data = build(valid=valid)
+            actor = JSONValidator("benchmark", schema=schema, result_cache_size=8)
+            raw = json.dumps(data)
+            actor.validate_event(JSONEvent(data=raw, lazy_data=True))
+            event = JSONEvent(data=raw, lazy_data=True)
+            timed = [(name, lambda method=method: method(data)) for name, method in cases] + [
+                ("result cache hit", lambda: actor.validate(data)),
+                ("result cache hit, raw json", lambda: actor.validate_event(event))
+            ]
+            for name, method in timed:
+                seconds = timeit.timeit(method, number=iterations)
+                print "{schema:<6} {valid:<8} {name:<26} {ms:8.3f} ms/validation".format(schema=schema_name,
+                    valid="valid" if valid else "invalid", name=name, ms=seconds * 1000 / iterations)
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
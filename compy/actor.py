@@ -3,14 +3,18 @@
 import traceback
 import abc
 
+from time import time
+
 from gevent import sleep
 from gevent.event import Event as GEvent
 from copy import deepcopy
 
 from compy.queue import QueuePool
 from compy.logger import Logger
+from compy.metrics import ActorMetrics
+from compy.executor import EXECUTORS, execute
 from compy.errors import (QueueConnected, InvalidActorOutput, QueueEmpty, InvalidEventConversion, 
-    InvalidActorInput, QueueFull)
+    InvalidActorInput, QueueFull, SetupError)
 from compy.restartlet import RestartPool
 from compy.event import Event
 
@@ -39,6 +43,10 @@ class Actor(object):
             rescue=False,
             max_rescue=5,
             convert_output=False,
+            batch_size=1,
+            batch_timeout=0,
+            max_concurrency=None,
+            executor=None,
             *args,
             **kwargs):
         """
@@ -56,6 +64,24 @@ class Actor(object):
                 | it should execute 'consume' and block until that 'consume' is complete. This is usually
                 | only necessary if executing work on an event in the order that it was received is critical.
                 | (Default: False)
+            batch_size (Optional[int]):
+                | The maximum amount of events drained from an inbound queue per wakeup and passed as a list to 'consume_batch'.
+                | A value of 1 disables batching and passes each event to 'consume'
+                | (Default: 1)
+            batch_timeout (Optional[float]):
+                | The maximum amount of time, in seconds, to wait for a batch to fill to 'batch_size' before it is consumed.
+                | A value of 0 consumes whatever is already waiting on the queue
+                | (Default: 0)
+            max_concurrency (Optional[int]):
+                | The maximum amount of events (or batches) this actor will consume concurrently when 'blocking_consume' is False.
+                | Once the limit is reached, inbound queues are not drained until a consume completes, so the queue 'size' applies
+                | backpressure to upstream actors. A value of None represents unlimited concurrency
+                | (Default: None)
+            executor (Optional[str]):
+                | Where actors that support it run the CPU bound step of 'consume', so that it does not stall other greenlets.
+                | "thread" runs it in the gevent threadpool, and "process" in a pool of processes with the payload serialized.
+                | A value of None runs it in the consuming greenlet
+                | (Default: None)
 
         """
         self.blockdiag_config = {"shape": "box"}
@@ -65,6 +91,9 @@ class Actor(object):
         self.logger = Logger(name, self.pool.logs)
         self.__loop = True
         self.threads = RestartPool(logger=self.logger, sleep_interval=1)
+        self.max_concurrency = max_concurrency
+        self.workers = RestartPool(logger=self.logger, sleep_interval=1, size=max_concurrency)
+        self.metrics = ActorMetrics(self)
 
         self.__run = self._async_class()
         self.__block = self._async_class()
@@ -74,6 +103,12 @@ class Actor(object):
         self.max_rescue = max_rescue
 
         self.convert_output = convert_output
+        self.batch_size = max(int(batch_size), 1)
+        self.batch_timeout = batch_timeout
+
+        if executor not in EXECUTORS:
+            raise SetupError("Unknown executor '{0}'. Expected one of {1}".format(executor, EXECUTORS))
+        self.executor = executor
 
     def _clear_all(self):
         self.__run.clear()
@@ -130,12 +165,20 @@ class Actor(object):
     def is_running(self):
         return self.__run.is_set()
 
+    @property
+    def in_flight(self):
+        '''The amount of consume greenlets currently running for this actor'''
+        return len(self.workers)
+
     def register_consumer(self, queue_name, queue):
         '''
         Add the passed queue and queue name to
         '''
         self.pool.inbound.add(queue_name, queue=queue)
-        self.threads.spawn(self.__consumer, self.consume, queue)
+        if self.batch_size > 1:
+            self.threads.spawn(self.__batch_consumer, self.consume_batch, queue)
+        else:
+            self.threads.spawn(self.__consumer, self.consume, queue)
 
     def ensure_tuple(self, data):
         if not isinstance(data, tuple):
@@ -179,8 +222,9 @@ class Actor(object):
 
     def send_event(self, event, queues=None, check_output=True):
         """
-        Sends event to all registered outbox queues. If multiple queues are consuming the event,
-        a deepcopy of the event is sent instead of raw event.
+        Sends event to all registered outbox queues. If a single queue is consuming the event, the raw event is sent. If multiple
+        queues are consuming the event, each receives a fork of the event that copies the data payload only when it is first accessed.
+        The event should not be modified by the sending actor once it has been sent.
         """
 
         if not queues:
@@ -217,14 +261,30 @@ class Actor(object):
                 raise InvalidActorOutput("Event was of type '{_type}', expected '{output}'".format(_type=type(event), output=self.output))
 
         try:
-            for queue in queues.itervalues():
-                self._send(queue, deepcopy(event))
+            queues = list(queues.itervalues())
         except AttributeError:
-            for queue in queues:
-                self._send(queue, deepcopy(event))
+            queues = list(queues)
+
+        for queue, queue_event in zip(queues, self._fan_out(event, len(queues))):
+            self._send(queue, queue_event)
+
+    def _fan_out(self, event, count):
+        """
+        Returns 'count' events to be placed on separate queues. A single consumer receives the event itself. Multiple consumers receive
+        forks of the event that share the data payload until it is first accessed, falling back to a deepcopy per consumer for events
+        that do not support forking
+        """
+        if count <= 1:
+            return [event]
+
+        fork = getattr(event, "fork", None)
+        if fork is None:
+            return [deepcopy(event) for _ in xrange(count)]
+        return [event] + fork(copies=count - 1)
 
     def _send(self, queue, event):
         queue.put(event)
+        self.metrics.record_send()
         sleep(0)
 
     def __consumer(self, function, queue, timeout=10, ensure_empty=True):
@@ -243,7 +303,47 @@ class Actor(object):
         except QueueEmpty:
             pass
 
+    def __batch_consumer(self, function, queue, ensure_empty=True):
+        '''Greenthread which applies <function> to lists of up to 'batch_size' elements from <queue>
+        '''
+
+        self.__run.wait()
+
+        while self.loop():
+            queue.wait_until_content()
+            self.__process_consumer_batch(function=function, queue=queue)
+
+        while ensure_empty and queue.qsize() > 0:
+            self.__process_consumer_batch(function=function, queue=queue)
+
+    def __process_consumer_batch(self, function, queue):
+        if not self.__blocking_consume:
+            self.workers.wait_available()
+        events = self.__get_queued_batch(queue=queue)
+        if len(events) > 0:
+            if self.__blocking_consume:
+                self.__do_consume_batch(function, events, queue)
+            else:
+                self.workers.spawn(self.__do_consume_batch, function, events, queue, restart=False)
+
+    def __get_queued_batch(self, queue):
+        events = []
+        deadline = time() + self.batch_timeout
+        while len(events) < self.batch_size:
+            remaining = deadline - time()
+            try:
+                if remaining > 0:
+                    events.append(queue.get(block=True, timeout=remaining))
+                else:
+                    events.append(queue.get())
+            except QueueEmpty:
+                break
+        return events
+
     def __process_consumer_event(self, function, queue, timeout=None, raise_on_empty=False):
+        if not self.__blocking_consume:
+            # Admission happens before the event is removed from the queue, so a saturated actor leaves events queued upstream
+            self.workers.wait_available()
         try:
             event = self.__get_queued_event(queue=queue, timeout=timeout)
         except QueueEmpty as err:
@@ -253,7 +353,7 @@ class Actor(object):
             if self.__blocking_consume:
                 self.__do_consume(function, event, queue)
             else:
-                self.threads.spawn(self.__do_consume, function, event, queue, restart=False)
+                self.workers.spawn(self.__do_consume, function, event, queue, restart=False)
 
     def __get_queued_event(self, queue, timeout=None):
         if timeout:
@@ -266,23 +366,12 @@ class Actor(object):
         This function actually calls the consume function for the actor
         """
         try:
-            isInstance = False
-            for inClazz in self.input:
-                isInstance = isInstance or event.isInstance(convert_to=inClazz)
-
-            if not isInstance:
-                new_event = event.convert(self.input[0])
-                self.logger.warning("Incoming event was of type '{_type}' when type {input} was expected. Converted to {converted}".format(
-                    _type=type(event), input=self.input, converted=type(new_event)), event=event)
-                event = new_event
-
-            if self.REQUIRED_EVENT_ATTRIBUTES:
-                missing = [attribute for attribute in self.REQUIRED_EVENT_ATTRIBUTES if not event.get(attribute, None)]
-                if len(missing) > 0:
-                    raise InvalidActorInput("Required incoming event attributes were missing: {missing}".format(missing=missing))
+            event = self.__prepare_event(event)
 
             try:
+                started = time()
                 function(event, origin=queue.name, origin_queue=queue)
+                self.metrics.record_consume(time() - started)
             except QueueFull as err:
                 err.queue.wait_until_free() # potential TypeError if target queue is not sent
                 queue.put(event) # puts event back into origin queue
@@ -291,17 +380,91 @@ class Actor(object):
         except InvalidEventConversion:
             self.logger.error("Event was of type '{_type}', expected '{input}'".format(_type=type(event), input=self.input))
         except Exception as err:
+            self.__rescue_events(events=[event], queue=queue, err=err)
+
+    def __do_consume_batch(self, function, events, queue):
+        """
+        The batch equivalent of __do_consume. Each event is validated individually, and the remaining events are passed to the
+        consume_batch function together. If the batch fails, only the events it did not add to 'consumed' are put back on the
+        origin queue, or rescued or sent to error
+        """
+        prepared_events = []
+        for event in events:
+            try:
+                prepared_events.append(self.__prepare_event(event))
+            except InvalidActorInput as error:
+                self.logger.error("Invalid input detected: {0}".format(error))
+            except InvalidEventConversion:
+                self.logger.error("Event was of type '{_type}', expected '{input}'".format(_type=type(event), input=self.input))
+
+        if len(prepared_events) == 0:
+            return
+
+        consumed = []
+        try:
+            started = time()
+            function(prepared_events, origin=queue.name, origin_queue=queue, consumed=consumed)
+            self.metrics.record_consume(time() - started, count=len(prepared_events))
+        except QueueFull as err:
+            err.queue.wait_until_free()
+            for event in self.__unconsumed(prepared_events, consumed):
+                queue.put(event)
+        except Exception as err:
+            remaining = self.__unconsumed(prepared_events, consumed)
+            if len(remaining) > 0:
+                self.__rescue_events(events=remaining, queue=queue, err=err)
+            else:
+                self.logger.error("Exception caught after every event of the batch was consumed: {traceback}".format(traceback=traceback.format_exc()))
+
+    @staticmethod
+    def __unconsumed(events, consumed):
+        consumed = set(id(event) for event in consumed)
+        return [event for event in events if id(event) not in consumed]
+
+    def __prepare_event(self, event):
+        isInstance = False
+        for inClazz in self.input:
+            isInstance = isInstance or event.isInstance(convert_to=inClazz)
+
+        if not isInstance:
+            new_event = event.convert(self.input[0])
+            self.logger.warning("Incoming event was of type '{_type}' when type {input} was expected. Converted to {converted}".format(
+                _type=type(event), input=self.input, converted=type(new_event)), event=event)
+            event = new_event
+
+        if self.REQUIRED_EVENT_ATTRIBUTES:
+            missing = [attribute for attribute in self.REQUIRED_EVENT_ATTRIBUTES if not event.get(attribute, None)]
+            if len(missing) > 0:
+                raise InvalidActorInput("Required incoming event attributes were missing: {missing}".format(missing=missing))
+
+        return event
+
+    def __rescue_events(self, events, queue, err):
+        """
+        Puts events that have not exceeded max_rescue back onto the origin queue, and sends the rest to error
+        """
+        self.metrics.record_error(count=len(events))
+        rescued_events = []
+        for event in events:
             self.logger.warning("Event exception caught: {traceback}".format(traceback=traceback.format_exc()), event=event)
             rescue_attribute = Actor._RESCUE_ATTRIBUTE_NAME_TEMPLATE.format(actor=self.name)
             rescue_attempts =  event.get(rescue_attribute, 0)
             if self.rescue and rescue_attempts < self.max_rescue:
                 setattr(event, rescue_attribute, rescue_attempts + 1)
-                sleep(1)
-                queue.put(event)
+                rescued_events.append(event)
             else:
                 event.error = err
                 self.send_error(event)
 
+        if len(rescued_events) > 0:
+            sleep(1)
+            for event in rescued_events:
+                queue.put(event)
+
+    def offload(self, function, *args, **kwargs):
+        '''Runs 'function' in the executor of this actor, and cooperatively waits for its result'''
+        return execute(self.executor, function, *args, **kwargs)
+
     def create_event(self, *args, **kwargs):
         try:
             self.output[1]
@@ -313,6 +476,50 @@ class Actor(object):
         else:
             raise ValueError("Unable to call create_event function with multiple output types defined")
             
+    def consume_batch(self, events, *args, **kwargs):
+        """
+        Consumes a list of events drained from a single inbound queue. Only used when 'batch_size' is greater than 1.
+        Actors that can amortize work across several events should override this. By default, each event is passed to 'consume',
+        and errors are handled per event, just as for events that are consumed one at a time.
+        An implementation adds every event it has completely processed to the 'consumed' list. If it raises, only the events that
+        are not in that list are put back on their queue, or rescued or sent to error
+
+        Args:
+            events:  A list of the implementation of event.Event this actor is consuming
+            *args:
+            **kwargs:
+        """
+        consumed = kwargs.pop("consumed", [])
+        origin_queue = kwargs.get("origin_queue", None)
+        for event in events:
+            if origin_queue is None:
+                self.consume(event, *args, **kwargs)
+            else:
+                self.__consume_batched_event(event, origin_queue, *args, **kwargs)
+            consumed.append(event)
+
+    def __consume_batched_event(self, event, queue, *args, **kwargs):
+        try:
+            self.consume(event, *args, **kwargs)
+        except QueueFull as err:
+            err.queue.wait_until_free()
+            queue.put(event)
+        except Exception as err:
+            self.__rescue_events(events=[event], queue=queue, err=err)
+
+    def _forward_batch(self, events):
+        """
+        Forwards events of a batch that have been processed. A full outbound queue is waited on rather than raised, so the events
+        are not put back on their origin queue and processed again
+        """
+        for event in events:
+            while True:
+                try:
+                    self.send_event(event)
+                    break
+                except QueueFull as err:
+                    err.queue.wait_until_free()
+
     @abc.abstractmethod
     def consume(self, event, *args, **kwargs):
         """
@@ -2,16 +2,34 @@ from compy.actors.mixins.mysql import _MySQLMixin
 from compy.actors.database import _Database
 from compy.actors.mixins.database import _DatabaseMixin
 from compy.actors.mixins.auth import _AuthDatabaseMixin, _BasicAuthDatabaseMixin
+from compy.util.cache import TTLCache
 
 __all__ = [
     "MySQLBasicAuth"
 ]
 
 class _AuthDatabase(_DatabaseMixin, _Database):
-    def __init__(self, name, param_scope=None, output_mode="ignore", expected_results=1, *args, **kwargs):
+    """
+    Parameters:
+        cache_ttl (Optional[float]):
+            | The amount of seconds the permissions found for a set of credentials are reused before the database is queried again
+            | A value of 0 disables the cache
+            | Default: 60
+        cache_negative_ttl (Optional[float]):
+            | The amount of seconds credentials that matched no permissions are rejected without querying the database
+            | Default: 5
+        cache_size (Optional[int]):
+            | The maximum amount of credentials cached
+            | Default: 1024
+    """
+
+    def __init__(self, name, param_scope=None, output_mode="ignore", expected_results=1, cache_ttl=60, cache_negative_ttl=5, cache_size=1024, *args, **kwargs):
         super(_AuthDatabase, self).__init__(name=name, param_scope=param_scope, *args, **kwargs)
         self.output_mode = "ignore"
         self.expected_results = 1
+        self.cache_ttl = cache_ttl
+        self.cache_negative_ttl = cache_negative_ttl
+        self.auth_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl) if cache_ttl > 0 else None
 
 class MySQLBasicAuth(_BasicAuthDatabaseMixin, _AuthDatabaseMixin, _MySQLMixin, _AuthDatabase):
     pass
\ No newline at end of file
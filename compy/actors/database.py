@@ -1,6 +1,7 @@
 from compy.actor import Actor
-from compy.errors import MalformedEventData
-from compy.actors.util.database import InvalidResultsException
+from compy.errors import MalformedEventData, ServiceUnavailable, SetupError
+from compy.actors.util.database import InvalidResultsException, parameterize_template, bind_list, escape_literal
+from compy.util.cache import LRUCache, TTLCache, SingleFlight
 
 __all__ = [
 	"_Database",
@@ -8,6 +9,26 @@ __all__ = [
 ]
 
 class _Database(Actor):
+	"""
+	Parameters:
+		literal_params (Optional[list]):
+			| The params that are formatted into the query, rather than bound as parameters by the database driver. Static params are
+			| formatted into the query too, unless 'override_static' allows events to provide their values. A param in a position of
+			| the 'query_template' that can not be bound, such as an identifier, must be a literal param
+			| Default: []
+		result_cache_ttl (Optional[float]):
+			| For actors that only read, the amount of seconds the results of a query are reused for identical queries.
+			| Concurrent identical queries are coalesced into a single query. A value of 0 disables the cache
+			| Default: 0
+		result_cache_size (Optional[int]):
+			| The maximum amount of queries whose results are cached
+			| Default: 1024
+		result_cache_bytes (Optional[int]):
+			| The maximum approximate size of all cached results. None for no limit
+			| Default: None
+	"""
+
+	_cacheable_results = False
 
 	def __init__(self, 
 			name,
@@ -26,6 +47,9 @@ class _Database(Actor):
 			output_mode="update",
 			expected_results=None,
 			max_attempts=3,
+			result_cache_ttl=0,
+			result_cache_size=1024,
+			result_cache_bytes=None,
 			*args,
 			**kwargs):
 		super(_Database, self).__init__(name, *args, **kwargs)
@@ -37,11 +61,19 @@ class _Database(Actor):
 		self.records_key = response_plural_key if response_plural_key else response_key + response_plural_key_postfix
 		self.record_key = response_key
 		self.static_params = self.__get_static_params(data=static_params)
-		self.literal_params = [param for param in literal_params] + [param for param in self.static_params.iterkeys() if param not in literal_params]
 		self.override_static = override_static
+		# Events may provide the values of overridable static params, so those are bound like any other value
+		self.literal_params = [param for param in literal_params]
+		if not self.override_static:
+			self.literal_params += [param for param in self.static_params.iterkeys() if param not in literal_params]
 		self.output_mode = output_mode
 		self.expected_results = expected_results
 		self.max_attempts = max_attempts
+		self._statements = LRUCache(maxsize=128)
+		self.result_cache = None
+		if result_cache_ttl > 0 and self._cacheable_results:
+			self.result_cache = TTLCache(maxsize=result_cache_size, ttl=result_cache_ttl, maxbytes=result_cache_bytes)
+			self._queries = SingleFlight()
 
 	def __get_db_pool(self, db_config, db_pool):
 		if db_pool:
@@ -66,8 +98,57 @@ class _Database(Actor):
 			query_params.update(self.static_params)
 		return query_params		
 
+	def pre_hook(self):
+		# A query template with params that can not be bound is rejected before any event is consumed
+		if self.query_template is not None:
+			try:
+				self._get_statement(self.query_template)
+			except ValueError as err:
+				raise SetupError(str(err))
+
+	def _get_statement(self, query_template):
+		statement = self._statements.get(query_template)
+		if statement is None:
+			statement = parameterize_template(query_template, literal_params=self.literal_params)
+			self._statements.set(query_template, statement)
+		return statement
+
 	def _assemble_query(self, query_template, query_params, *args, **kwargs):
-		return query_template.format(**query_params)
+		"""
+		Returns the statement for 'query_template' and the arguments to bind to it. Only literal params are formatted into the statement,
+		all other params are bound by the database driver
+		"""
+		statement, patterns, list_params = self._get_statement(query_template)
+		args = dict(query_params)
+		fields = {key: escape_literal(value) for key, value in query_params.iteritems()}
+		for field in list_params:
+			fields[field], list_args = bind_list(field, query_params[field])
+			args.update(list_args)
+		for name, pattern in patterns.iteritems():
+			args[name] = pattern.format(**query_params)
+		return statement.format(**fields), args
+
+	def _fetch_results(self, query, args, query_params):
+		if self.result_cache is None:
+			return self._execute_query(query=query, args=args)
+
+		try:
+			key = (query, tuple(sorted(args.iteritems())))
+			hash(key)
+		except (AttributeError, TypeError):
+			return self._execute_query(query=query, args=args)
+
+		results = self.result_cache.get(key)
+		if results is None:
+			results = self._queries.do(key, self.__query_into_cache, key=key, query=query, args=args)
+		# Every event receives its own copies of the rows, as they may be placed in and modified as part of the event data
+		return [dict(result) for result in results]
+
+	def __query_into_cache(self, key, query, args):
+		results = self._execute_query(query=query, args=args)
+		size = sum([len(str(field)) + len(str(value)) for result in results for field, value in result.iteritems()])
+		self.result_cache.set(key, results, size=size)
+		return results
 
 	def _validate_results(self, event, results):
 		if self.expected_results and len(results) != self.expected_results:
@@ -85,21 +166,79 @@ class _Database(Actor):
 		for dynamic_params in dynamic_param_groups:
 			try:
 				query_params = self.__combine_params(dynamic_params=dynamic_params)
-				query = self._assemble_query(query_template=self.query_template, query_params=query_params)
-				results = results + self._execute_query(query=query)
+				query, args = self._assemble_query(query_template=self.query_template, query_params=query_params)
+				results = results + self._fetch_results(query=query, args=args, query_params=query_params)
+			except ServiceUnavailable:
+				raise
 			except Exception as e:
 				raise MalformedEventData(str(e))
 		self._validate_results(event=event, results=results)
 		event = self.format_output(event=event, results=results)
 		self.send_event(event)
 
+	def consume_batch(self, events, consumed=None, *args, **kwargs):
+		"""
+		When the actor defines a '_batch_query_template', the param groups of every event in the batch are written together,
+		and the events are only forwarded once the whole batch has been committed. Events whose params can not be built are
+		consumed on their own, as is every event of a batch that fails to be written, so only the events that fail go to error
+		"""
+		consumed = [] if consumed is None else consumed
+		batch_query_template = getattr(self, "_batch_query_template", None)
+		if batch_query_template is None:
+			return super(_Database, self).consume_batch(events, consumed=consumed, *args, **kwargs)
+
+		batched_events, single_events, param_groups = [], [], []
+		for event in events:
+			try:
+				event_param_groups = [self.__combine_params(dynamic_params=dynamic_params) for dynamic_params in self._get_dynamic_params(event=event)]
+				self._validate_results(event=event, results=[])
+			except Exception:
+				single_events.append(event)
+			else:
+				batched_events.append(event)
+				param_groups.extend(event_param_groups)
+
+		try:
+			if len(param_groups) > 0:
+				statements = self._assemble_batch_query(query_template=batch_query_template, param_groups=param_groups)
+				self._execute_batch(statements=statements)
+		except ServiceUnavailable:
+			raise
+		except Exception as err:
+			self.logger.warning("Writing a batch of {0} events failed, writing them one at a time: {1}".format(len(batched_events), err))
+			single_events = events
+		else:
+			# The rows are committed, so a failure while forwarding the events must not have them written again
+			consumed.extend(batched_events)
+			self._forward_batch([self.format_output(event=event, results=[]) for event in batched_events])
+
+		if len(single_events) > 0:
+			super(_Database, self).consume_batch(single_events, consumed=consumed, *args, **kwargs)
+
 class _DatabaseAuto(_Database):
 
 	def __init__(self, name, ignore_fields=[], schema="", table="", *args, **kwargs):
 		super(_DatabaseAuto, self).__init__(name, *args, **kwargs)
 		self.schema = schema
 		self.table = table
-		self.table_fields = []
-		all_table_fields = self._get_table_fields()
-		self.table_fields = [field for field in all_table_fields if field not in ignore_fields]
-		self.query_template = self._query_template
\ No newline at end of file
+		self.ignore_fields = ignore_fields
+		self.table_fields = None
+		self.query_template = self._query_template
+
+	def pre_hook(self):
+		self._load_table_fields()
+
+	def _load_table_fields(self):
+		# The fields are looked up once per start of the actor, so changes to the table are picked up when it is restarted
+		self.table_fields = [field for field in self._get_table_fields() if field not in self.ignore_fields]
+		self._statements.clear()
+
+	def consume(self, event, *args, **kwargs):
+		if self.table_fields is None:
+			self._load_table_fields()
+		super(_DatabaseAuto, self).consume(event, *args, **kwargs)
+
+	def consume_batch(self, events, *args, **kwargs):
+		if self.table_fields is None:
+			self._load_table_fields()
+		super(_DatabaseAuto, self).consume_batch(events, *args, **kwargs)
\ No newline at end of file
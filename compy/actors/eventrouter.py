@@ -7,6 +7,7 @@ from lxml import etree
 
 from .util.xpath import XPathLookup
 from compy.actor import Actor
+from compy.util.cache import regexes
 from compy.event import HttpEvent
 from compy.errors import SetupError, EventCommandNotAllowed
 
@@ -43,6 +44,8 @@ class EventRouter(Actor):
         if not isinstance(routing_filters, list):
             routing_filters = [routing_filters]
 
+        self._decision_tables = None
+        self._uncompiled_filters = None
         for filter in routing_filters:
             self.set_filter(filter)
 
@@ -55,6 +58,31 @@ class EventRouter(Actor):
         if len(self.filters) == 0 and (len(self.default_outboxes) == 0 and self.whitelist):
             raise SetupError("No filters were connected to this router")
         self._initialize_outboxes()
+        self._compile_filters()
+
+    def _compile_filters(self):
+        """
+        Groups all plain EventFilters by event_scope into decision tables, so the scope value is looked up once per event and all
+        of their regexes are evaluated together. Filter subclasses and chained filters are evaluated individually
+        """
+        scopes = {}
+        self._uncompiled_filters = set()
+        for index, filter in enumerate(self.filters):
+            if type(filter) is EventFilter and filter.next_filter is None:
+                scopes.setdefault(filter.event_scope, []).append((index, filter))
+            else:
+                self._uncompiled_filters.add(index)
+        self._decision_tables = [_DecisionTable(event_scope, filters) for event_scope, filters in scopes.iteritems()]
+
+    def _matching_filters(self, event):
+        if self._decision_tables is None:
+            self._compile_filters()
+        matched = set()
+        for decision_table in self._decision_tables:
+            matched.update(decision_table.matching(event))
+        # XML filters on the same document share a single XPathLookup for this event
+        xpath_lookups = {}
+        return [filter for index, filter in enumerate(self.filters) if index in matched or (index in self._uncompiled_filters and filter.matches(event, xpath_lookups=xpath_lookups))]
 
     def _initialize_outboxes(self):
         self._initialize_filter_outboxes()
@@ -94,16 +122,19 @@ class EventRouter(Actor):
 
     def consume(self, event, *args, **kwargs):
         matched = False
-        for filter in self.filters:
-            if filter.matches(event):
-                matched = True
-                if len(filter.outboxes) > 0:
-                    self.send_event(event, queues=filter.outboxes)
-                    self.logger.debug("EventFilter matched for outbound queues ({outbox_names}). Event successfully forwarded".format(
-                            outbox_names=filter.outbox_names),
-                        event=event)
-                else:
-                    self.logger.info("EventFilter matched, but no outbound queues were defined for filter. Event has been discarded.", event=event)
+        outboxes = []
+        for filter in self._matching_filters(event):
+            matched = True
+            if len(filter.outboxes) > 0:
+                outboxes.extend(filter.outboxes)
+                self.logger.debug("EventFilter matched for outbound queues ({outbox_names}). Event successfully forwarded",
+                    outbox_names=filter.outbox_names, event=event)
+            else:
+                self.logger.info("EventFilter matched, but no outbound queues were defined for filter. Event has been discarded.", event=event)
+
+        # All matched outboxes are sent to at once so that the event is forked across them rather than handed to each filter as-is
+        if len(outboxes) > 0:
+            self.send_event(event, queues=outboxes)
 
         if not matched:
             self.process_no_match(event)
@@ -124,6 +155,7 @@ class EventRouter(Actor):
     def set_filter(self, filter):
         if isinstance(filter, EventFilter):
             self.filters.append(filter)
+            self._decision_tables = None
         else:
             raise TypeError("The provided filter is not a valid EventFilter type")
 
@@ -214,7 +246,7 @@ class EventFilter(object):
         self.next_filter = self.set_next_filter(next_filter)
 
     def parse_value_regexes(self, value_regexes):
-        return [re.compile(value_regex) for value_regex in value_regexes]
+        return [regexes.compile(value_regex) for value_regex in value_regexes]
 
     def _validate_scope_definition(self, event_scope):
         if isinstance(event_scope, tuple):
@@ -233,23 +265,26 @@ class EventFilter(object):
         else:
             self.next_filter = None
 
-    def matches(self, event):
-        values = self._get_value(event, self.event_scope)
+    def matches(self, event, xpath_lookups=None):
+        return self._matches(event, self.value_regexes, xpath_lookups=xpath_lookups)
+
+    def _matches(self, event, value_regexes, xpath_lookups=None):
+        values = self._get_value(event, self.event_scope, xpath_lookups=xpath_lookups)
         try:
             while True:
                 value = next(values)
                 if value is not None:
-                    for value_regex in self.value_regexes:
+                    for value_regex in value_regexes:
                         if value_regex.search(str(value)):
                             if self.next_filter:
-                                return self.next_filter.matches(event)
+                                return self.next_filter.matches(event, xpath_lookups=xpath_lookups)
                             else:
                                 return True
         except StopIteration:
             pass
         except Exception as err:
             raise Exception(
-                "Error in attempting to apply regex patterns {0} to {1}: {2}".format(self.value_regexes, values, err))
+                "Error in attempting to apply regex patterns {0} to {1}: {2}".format(value_regexes, values, err))
 
         return False
 
@@ -275,6 +310,69 @@ class EventFilter(object):
         yield current_step
 
 
+class _DecisionTable(object):
+    """
+    Evaluates the regexes of several plain EventFilters that share an event_scope against a single lookup of the scope value.
+    Anchored literal regexes ('^value$') become dict lookups. Other regexes are folded into combined patterns of optional lookaheads
+    with one named group per regex, so a single match call reports every regex found in the value. Regexes that cannot be folded
+    without changing their meaning (inline flags, named groups, backreferences) are searched individually
+    """
+
+    LITERAL_REGEX = re.compile(r"^\^([^\\.^$*+?{}\[\]|()]*)\$$")
+    UNFOLDABLE_REGEX = re.compile(r"\(\?(?![:=!]|<[=!])|\\[0-9]")
+    MAX_GROUPS = 90     # Python regexes support at most 100 named groups
+
+    def __init__(self, event_scope, filters):
+        self.event_scope = event_scope
+        self.filters = filters
+        self.literals = {}
+        self.individual = []
+        self.combined = []
+        groups = {}
+        alternatives = []
+        for index, filter in filters:
+            for value_regex in filter.value_regexes:
+                literal = self.LITERAL_REGEX.match(value_regex.pattern)
+                if literal:
+                    self.literals.setdefault(literal.group(1), set()).add(index)
+                elif value_regex.groups > 0 or self.UNFOLDABLE_REGEX.search(value_regex.pattern):
+                    self.individual.append((index, value_regex))
+                else:
+                    name = "f{0}".format(len(groups))
+                    groups[name] = index
+                    alternatives.append("(?:(?=[\\s\\S]*?(?P<{name}>{pattern}))|)".format(name=name, pattern=value_regex.pattern))
+                    if len(groups) == self.MAX_GROUPS:
+                        self.combined.append((re.compile("".join(alternatives)), groups))
+                        groups, alternatives = {}, []
+        if len(alternatives) > 0:
+            self.combined.append((re.compile("".join(alternatives)), groups))
+
+    def matching(self, event):
+        """Returns the indexes of the filters that match the event"""
+        value = next(EventFilter._get_value(self.filters[0][1], event, self.event_scope))
+        if value is None:
+            return set()
+
+        try:
+            value = str(value)
+        except Exception:
+            # Let the filters themselves report the error
+            return set(index for index, filter in self.filters if filter.matches(event))
+
+        matched = set(self.literals.get(value, ()))
+        if value.endswith("\n"):
+            # '$' also matches before a trailing newline
+            matched.update(self.literals.get(value[:-1], ()))
+        for pattern, groups in self.combined:
+            for name, group in pattern.match(value).groupdict().iteritems():
+                if group is not None:
+                    matched.add(groups[name])
+        for index, value_regex in self.individual:
+            if index not in matched and value_regex.search(value):
+                matched.add(index)
+        return matched
+
+
 class EventXMLFilter(EventFilter):
     '''
     **A filter class for the EventRouter module that will additionally use xpath lookup values to apply a regex comparison**
@@ -290,16 +388,10 @@ class EventXMLFilter(EventFilter):
 
         self.xslt = xslt
 
-    def _get_value(self, event, event_scope, xpath=None, *args, **kwargs):
-        value = next(super(EventXMLFilter, self)._get_value(event, event_scope))
+    def _get_value(self, event, event_scope, xpath=None, xpath_lookups=None, *args, **kwargs):
         xpath = xpath or self.xpath
         try:
-            xml = value
-
-            if self.xslt:
-                xml = self.xslt(xml)
-
-            lookup = XPathLookup(xml)
+            lookup = self._get_xpath_lookup(event, event_scope, xpath_lookups)
             xpath_lookup = lookup.lookup(xpath)
 
             if len(xpath_lookup) == 0:
@@ -310,6 +402,25 @@ class EventXMLFilter(EventFilter):
         except Exception as err:
             yield None
 
+    def _get_xpath_lookup(self, event, event_scope, xpath_lookups=None):
+        """
+        Returns the XPathLookup of the (transformed) document at 'event_scope'. With 'xpath_lookups', a dict that is only used for a
+        single event, the lookup is built once and reused for every xpath on that document
+        """
+        key = (event_scope, self.xslt)
+        lookup = xpath_lookups.get(key, None) if xpath_lookups is not None else None
+        if lookup is None:
+            xml = next(super(EventXMLFilter, self)._get_value(event, event_scope))
+
+            if self.xslt:
+                xml = self.xslt(xml)
+
+            lookup = XPathLookup(xml)
+            if xpath_lookups is not None:
+                xpath_lookups[key] = lookup
+
+        return lookup
+
     def _parse_xpath_result(self, lookup_result):
         try:
             if isinstance(lookup_result, etree._ElementStringResult):
@@ -342,9 +453,11 @@ class EventXMLXpathsFilter(EventXMLFilter):
         super(EventXMLXpathsFilter, self).__init__(value_regexes=[], *args, **kwargs)
         self.regex_xpath = regex_xpath
 
-    def matches(self, event):
+    def matches(self, event, xpath_lookups=None):
+        if xpath_lookups is None:
+            xpath_lookups = {}
         new_regexes = []
-        regex_values = self._get_value(event, self.event_scope, xpath=self.regex_xpath)
+        regex_values = self._get_value(event, self.event_scope, xpath=self.regex_xpath, xpath_lookups=xpath_lookups)
         try:
             while True:
                 regex = next(regex_values)
@@ -353,8 +466,8 @@ class EventXMLXpathsFilter(EventXMLFilter):
         except StopIteration:
             pass
 
-        self.value_regexes = self.parse_value_regexes(new_regexes)
-        return super(EventXMLXpathsFilter, self).matches(event)
+        # The regexes are specific to this event, so they are kept out of the filter which is shared by concurrent greenlets
+        return self._matches(event, self.parse_value_regexes(new_regexes), xpath_lookups=xpath_lookups)
 
 
 class EventJSONFilter(EventFilter):
@@ -368,7 +481,7 @@ class EventJSONFilter(EventFilter):
         super(EventJSONFilter, self).__init__(*args, **kwargs)
         self.json_scope = json_scope
 
-    def _get_value(self, event, event_scope):
+    def _get_value(self, event, event_scope, *args, **kwargs):
         values = next(super(EventJSONFilter, self)._get_value(event, self.event_scope))
         try:
 
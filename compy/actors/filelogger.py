@@ -4,21 +4,28 @@ import logging
 import logging.handlers
 import traceback
 import os
+import gevent
+import gevent.event
 import gevent.lock
+from gevent.monkey import get_original
 
 from compy.actor import Actor
 from compy.event import LogEvent
 
 class RotatingFileHandler(logging.handlers.RotatingFileHandler):
 
-    def __init__(self, file_path, *args, **kwargs):
+    def __init__(self, file_path, threaded=False, *args, **kwargs):
+        self.threaded = threaded
         self.make_file(file_path)
         super(RotatingFileHandler, self).__init__(file_path, *args, **kwargs)
 
     def createLock(self):
-        """Set self.lock to a new gevent RLock.
+        """Set self.lock to a new gevent RLock, or to a native RLock if records are emitted from OS threads.
         """
-        self.lock = gevent.lock.RLock()
+        if self.threaded:
+            self.lock = get_original("threading", "RLock")()
+        else:
+            self.lock = gevent.lock.RLock()
 
     def make_file(self, file_path):
         file_dir = os.path.dirname(file_path)
@@ -38,24 +45,95 @@ class RotatingFileHandler(logging.handlers.RotatingFileHandler):
 
 class FileLogger(Actor):
     '''**Prints incoming events to a log file for debugging.**
+
+    With a <batch_size> greater than 1 (Default: 1), queued entries are drained in batches of up to <batch_size>, and each file
+    receives one write per batch.
+
+    Parameters:
+        buffered (Optional[bool]):
+            | When True, formatted entries are accumulated and written by a dedicated writer once 'flush_size' entries are
+            | buffered or every 'flush_interval' seconds, whichever comes first. Buffered entries are flushed when the actor stops,
+            | and entries consumed while it stops are written right away
+            | Default: False
+        flush_size (Optional[int]):
+            | The amount of buffered entries that triggers a flush
+            | Default: 1000
+        flush_interval (Optional[float]):
+            | The maximum time, in seconds, that an entry stays buffered
+            | Default: 1
+        use_threadpool (Optional[bool]):
+            | When True, buffered entries are written from an OS thread of the gevent threadpool, so slow disks do not block the
+            | event loop. Rotation remains size based
+            | Default: False
     '''
 
     input = LogEvent
 
-    def __init__(self, name, default_filename="compysition.log", level="INFO", directory="logs", maxBytes=20000000, backupCount=10, *args, **kwargs):
-        super(FileLogger, self).__init__(name, *args, **kwargs)
+    def __init__(self, name, default_filename="compysition.log", level="INFO", directory="logs", maxBytes=20000000, backupCount=10, batch_size=1,
+                 buffered=False, flush_size=1000, flush_interval=1, use_threadpool=False, *args, **kwargs):
+        super(FileLogger, self).__init__(name, batch_size=batch_size, *args, **kwargs)
         self.blockdiag_config["shape"] = "note"
         self.default_filename = default_filename
         self.level = getattr(logging, level.upper(), logging.INFO)
         self.directory = directory
         self.maxBytes = int(maxBytes)
         self.backupCount = int(backupCount)
+        self.buffered = buffered
+        self.flush_size = max(int(flush_size), 1)
+        self.flush_interval = flush_interval
+        self.use_threadpool = buffered and use_threadpool
 
         self.loggers = {}
+        self.__buffer = {}
+        self.__buffered_entries = 0
+        self.__flush_lock = gevent.lock.Semaphore()
+        self.__flush_requested = gevent.event.Event()
+
+    def pre_hook(self):
+        if self.buffered:
+            self.threads.spawn(self.__writer)
+
+    def post_hook(self):
+        if self.buffered:
+            self.flush()
+
+    def __writer(self):
+        while self.loop():
+            self.__flush_requested.wait(timeout=self.flush_interval)
+            self.__flush_requested.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Writes all buffered entries, one record per file"""
+        with self.__flush_lock:
+            buffer, self.__buffer, self.__buffered_entries = self.__buffer, {}, 0
+            if len(buffer) > 0:
+                if self.use_threadpool:
+                    gevent.get_hub().threadpool.apply(self._write, (buffer,))
+                else:
+                    self._write(buffer)
+
+    def _write(self, entries):
+        for logger, logger_entries in entries.iteritems():
+            try:
+                logger.log(self.level, "\n".join(logger_entries))
+            except Exception:
+                print(traceback.format_exc())
+
+    def _buffer_entry(self, logger, entry):
+        self.__buffer.setdefault(logger, []).append(entry)
+        self.__buffered_entries += 1
+        if not self.loop():
+            # Once stopped, the writer is gone while the consumers still drain their queues, so every entry is written right away
+            self.flush()
+        elif self.__buffered_entries >= self.flush_size:
+            # The write is left to the writer, so the consumer is not held up by it
+            self.__flush_requested.set()
 
     def _create_logger(self, filepath):
         file_logger = logging.getLogger(filepath)
-        logHandler = RotatingFileHandler(r'{0}'.format(filepath), maxBytes=self.maxBytes, backupCount=self.backupCount)
+        logHandler = RotatingFileHandler(r'{0}'.format(filepath), threaded=self.use_threadpool, maxBytes=self.maxBytes, backupCount=self.backupCount)
         logFormatter = logging.Formatter('%(message)s') # We will do ALL formatting ourselves in qlogger, as we want to be extremely literal to make sure the timestamp
                                                         # is generated at the time that logger.log was invoked, not the time it was written to file
         logHandler.setFormatter(logFormatter)
@@ -63,16 +141,22 @@ class FileLogger(Actor):
         file_logger.setLevel(self.level)
         return file_logger
 
-    def _process_log_entry(self, event):
+    def _get_logger(self, event):
         event_filename = event.get("logger_filename", self.default_filename)
         logger = self.loggers.get(event_filename, None)
         if not logger:
             logger = self._create_logger("{0}/{1}".format(self.directory, event_filename))
             self.loggers[event_filename] = logger
+        return logger
 
-        self._do_log(logger, event)
+    def _process_log_entry(self, event):
+        if self.buffered:
+            if event.level >= self.level:
+                self._buffer_entry(self._get_logger(event), self._format_entry(event))
+        else:
+            self._do_log(self._get_logger(event), event)
 
-    def _do_log(self, logger, event):
+    def _format_entry(self, event):
         actor_name = event.origin_actor
         id = event.id
         message = event.message
@@ -86,10 +170,30 @@ class FileLogger(Actor):
         else:
             entry = "actor={0} :: {1}".format(actor_name, message)
 
+        return "{0}{1}".format(entry_prefix, entry)
+
+    def _do_log(self, logger, event):
         try:
-            logger.log(level, "{0}{1}".format(entry_prefix, entry))
+            logger.log(event.level, self._format_entry(event))
         except Exception:
             print(traceback.format_exc())
 
     def consume(self, event, *args, **kwargs):
         self._process_log_entry(event)
+
+    def consume_batch(self, events, *args, **kwargs):
+        """
+        Writes all entries of a batch that are destined for the same file as a single log record, so each file receives one write per batch.
+        Level filtering is applied per entry, as the combined record is always logged at the configured level
+        """
+        if self.buffered:
+            for event in events:
+                self._process_log_entry(event)
+            return
+
+        entries = {}
+        for event in events:
+            if event.level >= self.level:
+                logger = self._get_logger(event)
+                entries.setdefault(logger, []).append(self._format_entry(event))
+        self._write(entries)
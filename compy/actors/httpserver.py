@@ -1,15 +1,18 @@
 #!/usr/bin/env python
 
+import collections
 import json
 import mimeparse
 import re
+import socket
 
 from bottle import * #TODO identify exact imports
 from collections import defaultdict
 from datetime import datetime
 from functools import wraps
 from gevent import pywsgi
-from gevent.queue import Queue
+from gevent.queue import Queue, Empty
+from gevent.socket import socket as gsocket
 
 from compy.actor import Actor
 from compy.errors import InvalidEventDataModification, MalformedEventData, ResourceNotFound
@@ -69,6 +72,10 @@ class HTTPServer(Actor, Bottle):
             | Special values:
             |    id(Optional[str]): Used to identify this route in the json object
             |    base_path(Optional[str]): Used to identify a route that this route extends, using the referenced id
+        lazy_data(Optional[bool]):
+            | When True, request bodies are only parsed when an actor first accesses the event data, so pass-through
+            | services forward the raw body without parsing it. Malformed bodies are then reported on that first access
+            | Default: False
 
     Examples:
         Default:
@@ -144,7 +151,12 @@ class HTTPServer(Actor, Bottle):
 
         return path
 
-    def __init__(self, name, address="0.0.0.0", port=8080, keyfile=None, certfile=None, routes_config=None, send_errors=False, use_response_wrapper=True, *args, **kwargs):
+    def __init__(self, name, address="0.0.0.0", port=8080, keyfile=None, certfile=None, routes_config=None, send_errors=False, use_response_wrapper=True, lazy_data=False, reuse_port=False, stream_timeout=60, *args, **kwargs):
+        """
+        When run by a director with multiple workers, the listening socket is bound before the workers are forked and shared by all of them.
+        With 'reuse_port', each worker instead binds its own socket with SO_REUSEPORT, and the kernel balances connections between them.
+        A streamed response is ended when its next part does not arrive within 'stream_timeout' seconds
+        """
         Actor.__init__(self, name, *args, **kwargs)
         Bottle.__init__(self)
         self.blockdiag_config["shape"] = "cloud"
@@ -153,8 +165,13 @@ class HTTPServer(Actor, Bottle):
         self.keyfile = keyfile
         self.certfile = certfile
         self.responders = {}
+        self.streams = {}
         self.send_errors = send_errors
         self.use_response_wrapper = use_response_wrapper
+        self.lazy_data = lazy_data
+        self.reuse_port = reuse_port
+        self.stream_timeout = stream_timeout
+        self.__listener = None
         self.accepted_methods = []
         routes_config = routes_config or self.DEFAULT_ROUTE
 
@@ -190,9 +207,7 @@ class HTTPServer(Actor, Bottle):
         '''
         @wraps(fn)
         def _log_to_logger(*args, **kwargs):
-            self.logger.info('[{address}] {method} {url}'.format(address=request.remote_addr,
-                                            method=request.method,
-                                            url=request.url))
+            self.logger.info('[{address}] {method} {url}', address=request.remote_addr, method=request.method, url=request.url)
             actual_response = fn(*args, **kwargs)
             return actual_response
         return _log_to_logger
@@ -204,6 +219,15 @@ class HTTPServer(Actor, Bottle):
         return Bottle.__call__(self, e, h)
 
     def consume(self, event, *args, **kwargs):
+        """
+        Responds to the request of the event. A partial event, or an event whose data is an iterator, starts a streamed response
+        that is written as each part arrives. A streamed response ends with the first event for the request that is not partial
+        """
+        stream = self.streams.get(event.event_id, None)
+        if stream is not None:
+            self.__write_stream(stream=stream, event=event)
+            return
+
         response_queue = self.responders.pop(event.event_id, None)
 
         if response_queue:
@@ -215,14 +239,66 @@ class HTTPServer(Actor, Bottle):
             for header, value in event.environment["response"]["headers"].iteritems():
                 local_response.set_header(header, value)
 
-            local_response.body = event.data_string()
+            if event.partial or self.__is_iterator(event):
+                stream = self.streams[event.event_id] = Queue()
+                local_response.body = self.__stream(event_id=event.event_id, stream=stream)
+                response_queue.put(local_response)
+                response_queue.put(StopIteration)
+                self.__write_stream(stream=stream, event=event)
+            else:
+                local_response.body = event.data_string()
 
-            response_queue.put(local_response)
-            response_queue.put(StopIteration)
-            self.logger.info("[{status}] Returned in {time:0.0f} ms".format(status=local_response.status, time=(datetime.now()-event.created).total_seconds() * 1000), event=event)
+                response_queue.put(local_response)
+                response_queue.put(StopIteration)
+                self.logger.info("[{status}] Returned in {time:0.0f} ms", status=local_response.status, time=(datetime.now()-event.created).total_seconds() * 1000, event=event)
         else:
             self.logger.warning("Received event response for an unknown event ID. The request might have already received a response", event=event)
 
+    @staticmethod
+    def __is_iterator(event):
+        # Raw and already parsed data are inspected without parsing it or discarding its serialization
+        return event.raw_data() is None and isinstance(event._peek_data(), collections.Iterator)
+
+    def __write_stream(self, stream, event):
+        if self.__is_iterator(event):
+            data = event._peek_data()
+            # Iterated by the greenlet writing the response, so a slow client holds back the iterator rather than this actor
+            stream.put(data)
+        else:
+            stream.put(event.data_string())
+
+        if not event.partial:
+            stream.put(StopIteration)
+            self.streams.pop(event.event_id, None)
+            self.logger.info("[{status}] Streamed in {time:0.0f} ms", status=event.status, time=(datetime.now()-event.created).total_seconds() * 1000, event=event)
+
+    def __stream(self, event_id, stream):
+        try:
+            while True:
+                try:
+                    chunk = stream.get(timeout=self.stream_timeout)
+                except Empty:
+                    self.logger.warning("Streamed response for event {event_id} received no part in {timeout} seconds and was ended", event_id=event_id, timeout=self.stream_timeout)
+                    break
+                if chunk is StopIteration:
+                    break
+                if isinstance(chunk, collections.Iterator):
+                    for part in chunk:
+                        yield self.__encode_chunk(part)
+                else:
+                    yield chunk
+        finally:
+            # Also reached when the client disconnects, after which further parts for the request are discarded
+            self.streams.pop(event_id, None)
+
+    @staticmethod
+    def __encode_chunk(chunk):
+        if isinstance(chunk, unicode):
+            return chunk.encode("utf-8")
+        elif isinstance(chunk, str):
+            return chunk
+        return str(chunk)
+
     def __format_env(self, environ):
         return {
             "request": {
@@ -256,11 +332,11 @@ class HTTPServer(Actor, Bottle):
             data = data if len(data) > 0 else None
         except Exception:
             data = None
-        event = HttpEvent(environment=self.__format_env(request.environ), forms=dict(request.forms), data=data)
+        event = HttpEvent(environment=self.__format_env(request.environ), forms=dict(request.forms), data=data, lazy_data=self.lazy_data)
 
         response_queue = Queue()
         self.responders.update({event.event_id: response_queue})
-        self.logger.info("Received {0} request for service {1}".format(request.method, queue or self.name), event=event)
+        self.logger.info("Received {method} request for service {service}", method=request.method, service=queue or self.name, event=event)
         self.send_event(event)
         return response_queue
 
@@ -268,11 +344,32 @@ class HTTPServer(Actor, Bottle):
         self.__server.stop()
         self.logger.info("Stopped serving")
 
+    def pre_fork(self):
+        if not self.reuse_port:
+            self.__listener = pywsgi.WSGIServer.get_listener((self.address, self.port))
+
+    def __bind_reusable_port(self):
+        listener = gsocket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # SO_REUSEPORT is not exposed by the socket module of every python version, 15 is its value on Linux
+        listener.setsockopt(socket.SOL_SOCKET, getattr(socket, "SO_REUSEPORT", 15), 1)
+        listener.bind((self.address, self.port))
+        listener.listen(pywsgi.WSGIServer.backlog)
+        listener.setblocking(0)
+        return listener
+
     def __serve(self):
+        if self.__listener is not None:
+            listener = self.__listener
+        elif self.reuse_port:
+            listener = self.__bind_reusable_port()
+        else:
+            listener = (self.address, self.port)
+
         if self.keyfile is not None and self.certfile is not None:
-            self.__server = pywsgi.WSGIServer((self.address, self.port), self, keyfile=self.keyfile, certfile=self.certfile)
+            self.__server = pywsgi.WSGIServer(listener, self, keyfile=self.keyfile, certfile=self.certfile)
         else:
-            self.__server = pywsgi.WSGIServer((self.address, self.port), self, log=None)
+            self.__server = pywsgi.WSGIServer(listener, self, log=None)
         self.logger.info("Serving on {address}:{port}".format(address=self.address, port=self.port))
         self.__server.start()
 
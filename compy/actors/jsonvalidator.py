@@ -1,13 +1,20 @@
 #!/usr/bin/env python
 
+import hashlib
 import jsonschema
 import json
 
-from jsonschema import FormatChecker, ValidationError, SchemaError
+from itertools import islice
+
+from jsonschema import FormatChecker, ValidationError
 
 from compy.actor import Actor
 from compy.event import JSONEvent
 from compy.errors import MalformedEventData
+from compy.executor import compile_once
+from compy.util.cache import LRUCache
+from compy.util.compiled import compiled
+from compy.actors.util.schemacheck import compile_check
 
 def _required(validator, required, instance, schema):
     """Validate 'required' properties.
@@ -42,27 +49,41 @@ class JSONValidator(Actor):
             | The instance name.
         schema (str):
             | The schema (jsonschema) to validate the incoming json against
+        max_errors (Optional[int]):
+            | The maximum amount of errors reported for invalid json. Validation stops once that many errors were found.
+            | None reports all errors
+            | Default: None
+        compiled_checks (Optional[bool]):
+            | Whether incoming json is first checked with functions compiled from the schema, and only passed to the full
+            | validator when that check fails, to find the errors. Speeds up valid json for schemas that use the common keywords
+            | (type, properties, required, items, enum, pattern and bounds), and has no effect for other schemas
+            | Default: False
+        result_cache_size (Optional[int]):
+            | The amount of validation results retained, keyed by a hash of the json, so that retried events are not validated
+            | again. Events with lazily parsed data are keyed by their raw json, and are not parsed for a cached result.
+            | 0 disables the cache
+            | Default: 0
 
     '''
 
-    def __init__(self, name, schema=None, *args, **kwargs):
+    def __init__(self, name, schema=None, max_errors=None, compiled_checks=False, result_cache_size=0, *args, **kwargs):
         super(JSONValidator, self).__init__(name, *args, **kwargs)
         self.schema = schema
+        self.schema_source = None
+        self.max_errors = max_errors
+        self.compiled_checks = compiled_checks
+        self.check = None
+        self.results = LRUCache(maxsize=result_cache_size) if result_cache_size else None
         if self.schema:
-            formatter = self._build_formatter()
-            Validator = jsonschema.validators.extend(
-                validator=jsonschema.Draft4Validator,
-                validators={
-                    'required': _required
-                }
-            )
-
             try:
                 if isinstance(self.schema, str):
                     self.schema = json.loads(self.schema)
 
                 if isinstance(self.schema, dict):
-                    self.schema = Validator(self.schema, format_checker=formatter)
+                    self.schema_source = _schema_source(self.schema)
+                    self.schema = compiled.get(("jsonschema", type(self)), self.schema_source, self._compile_validator)
+                    if self.compiled_checks:
+                        self.check = compiled.get("jsonschema-check", self.schema_source, _compile_check)
                 else:
                     raise ValueError("Schema must be of type str or dict. Instead received type '{type}'".format(type=type(self.schema)))
             except Exception as err:
@@ -70,29 +91,78 @@ class JSONValidator(Actor):
                 self.schema = None
 
     def consume(self, event, *args, **kwargs):
-        try:
-            if self.schema:
-                self.schema.validate(event.data)
-
-            self.logger.info("Incoming JSON successfully validated", event=event)
-            self.send_event(event)
-
-        except (SchemaError, ValidationError):
-            message = self.format_error_response(self.schema.iter_errors(event.data))
+        message = self.validate_event(event)
+        if message:
             self.process_error(message, event)
 
+        self.logger.info("Incoming JSON successfully validated", event=event)
+        self.send_event(event)
+
+    def validate(self, data):
+        '''Returns the formatted validation errors of 'data', or None if it is valid'''
+        document = json.dumps(data, sort_keys=True) if self.results is not None else None
+        return self.__validate(lambda: data, document=document)
+
+    def validate_event(self, event):
+        '''
+        Returns the formatted validation errors of the data of 'event', or None if it is valid. The raw json of an event with lazily
+        parsed data keys the result cache as is, so its data is not parsed for a cached result
+        '''
+        document = event.raw_data()
+        if document is None:
+            return self.validate(event.data)
+        return self.__validate(lambda: event.data, document=document)
+
+    def __validate(self, get_data, document=None):
+        if not self.schema:
+            return None
+
+        key = None
+        if self.results is not None:
+            key = hashlib.sha1(document).hexdigest()
+            messages = self.results.get(key, _MISSING)
+            if messages is not _MISSING:
+                return messages
+
+        data = get_data()
+        if self.executor is None:
+            messages = _validation_errors(self.schema, data, check=self.check, max_errors=self.max_errors)
+        else:
+            document = document or json.dumps(data)
+            messages = self.offload(_validate, type(self), self.schema_source, document, self.compiled_checks, self.max_errors)
+
+        if key is not None:
+            self.results.set(key, messages)
+        return messages
 
     def format_error_response(self, errors):
-        error_reasons = []
-        for error in errors:
-            err_message = ""
-            path = map(str, list(error.path))
-            if len(path) > 0:
-                err_message = ": ".join(path)
-
-            err_message += " " + error.message
-            error_reasons.append(err_message)
-        return error_reasons
+        return _format_errors(errors)
+
+    @classmethod
+    def precompile(cls, folder_path, file_regex=r".*\.json$", compiled_checks=False):
+        '''
+        Compiles the validators of the json schema files below 'folder_path' into the shared registry, so that actors of this class
+        configured with an equal schema use them. Returns the amount of schemas compiled
+        '''
+        normalize = lambda text: _schema_source(json.loads(text))
+        count = compiled.precompile(("jsonschema", cls), folder_path, cls._compile_validator, file_regex=file_regex, normalize=normalize)
+        if compiled_checks:
+            compiled.precompile("jsonschema-check", folder_path, _compile_check, file_regex=file_regex, normalize=normalize)
+        return count
+
+    @classmethod
+    def _compile_validator(cls, schema_source):
+        return cls._build_validator(json.loads(schema_source))
+
+    @classmethod
+    def _build_validator(cls, schema):
+        Validator = jsonschema.validators.extend(
+            validator=jsonschema.Draft4Validator,
+            validators={
+                'required': _required
+            }
+        )
+        return Validator(schema, format_checker=cls._build_formatter())
 
     @staticmethod
     def _build_formatter():
@@ -113,3 +183,40 @@ class JSONValidator(Actor):
     def process_error(self, message, event):
         self.logger.error("Error validating incoming JSON: {0}".format(message), event=event)
         raise MalformedEventData(message)
+
+
+def _format_errors(errors):
+    error_reasons = []
+    for error in errors:
+        err_message = ""
+        path = map(str, list(error.path))
+        if len(path) > 0:
+            err_message = ": ".join(path)
+
+        err_message += " " + error.message
+        error_reasons.append(err_message)
+    return error_reasons
+
+_MISSING = object()
+
+def _schema_source(schema):
+    '''The source a schema is registered under, which is equal for equal schemas regardless of their formatting and key order'''
+    return json.dumps(schema, sort_keys=True)
+
+def _compile_check(schema_source):
+    return compile_check(json.loads(schema_source))
+
+def _validation_errors(validator, data, check=None, max_errors=None):
+    if check is not None and check(data):
+        return None
+    # Errors are generated lazily, so a single pass finds them and stops as soon as 'max_errors' were found
+    errors = validator.iter_errors(data)
+    if max_errors:
+        errors = islice(errors, max_errors)
+    return _format_errors(errors) or None
+
+def _validate(actor_class, schema_source, document, compiled_checks=False, max_errors=None):
+    '''Validates the serialized 'document' in an executor, building the validator of 'actor_class' once per worker'''
+    validator = compile_once((actor_class, schema_source), actor_class._compile_validator, schema_source)
+    check = compile_once(("check", schema_source), _compile_check, schema_source) if compiled_checks else None
+    return _validation_errors(validator, json.loads(document), check=check, max_errors=max_errors)
@@ -1,6 +1,6 @@
 from compy.errors import UnauthorizedEvent
+from compy.util.cache import regexes
 import hashlib
-import re
 import base64
 
 __all__ = [
@@ -45,12 +45,41 @@ class _BasicAuthDatabaseMixin:
         params["password"] = self.__hash(raw=password)
         return [params]
 
+    def _fetch_results(self, query, args, query_params):
+        """
+        The permissions of a set of credentials are cached, keyed on the username and password hash. They are still validated
+        against the method, path and address of every request
+        """
+        if self.auth_cache is None:
+            return self._execute_query(query=query, args=args)
+
+        key = (query_params["username"], query_params["password"])
+        results = self.auth_cache.get(key)
+        if results is None:
+            results = self._execute_query(query=query, args=args)
+            self.auth_cache.set(key, results, ttl=self.cache_ttl if results else self.cache_negative_ttl)
+        return results
+
+    def invalidate_credentials(self, username=None):
+        """
+        Drops the cached permissions of every password used with 'username', or of all users when no username is provided.
+        To be called when credentials or permissions are changed in the database
+        """
+        if self.auth_cache is None:
+            return
+        if username is None:
+            self.auth_cache.clear()
+        else:
+            for key in self.auth_cache.keys():
+                if key[0] == username:
+                    self.auth_cache.pop(key)
+
     def _validate_results(self, event, results):
         target_methods = ["GET", "POST", "PUT", "DELETE"]
         for result in results:
             try:
-                assert re.match(result["remote_address_regex"], event.environment["remote"].get("address", ""))
-                assert re.match(result["path_regex"], event.environment["request"]["url"].get("path", ""))
+                assert regexes.compile(result["remote_address_regex"]).match(event.environment["remote"].get("address", ""))
+                assert regexes.compile(result["path_regex"]).match(event.environment["request"]["url"].get("path", ""))
                 request_method = event.environment["request"].get("method", "")
                 for method in target_methods:
                     assert result[method] if request_method == method else True
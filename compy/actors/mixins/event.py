@@ -22,9 +22,15 @@ __all__ = [
     "XPathLookupMixin"
 ]
 
+class _DirectConversionUnsupported(Exception):
+    """Raised when a structure needs the serialized xmltodict conversion path"""
+    pass
+
 class _ConversionMethods:
     _XML_TYPES = [etree._Element, etree._ElementTree, etree._XSLTResultTree]
     _JSON_TYPES = [dict, list, collections.OrderedDict]
+    _JSON_SCALAR_TYPES = (str, unicode, int, long, float, bool, None.__class__)
+    _XML_VALUE_TYPES = (str, unicode, int, long, float)
 
     __compy_wrapper_key = "compy_conversion_wrapper"
     __compy_json_type_key = "@compy_json_type"
@@ -33,18 +39,181 @@ class _ConversionMethods:
         if conv_type == "XML":
             conversion_methods = {str: lambda data: etree.fromstring(data)}
             conversion_methods.update(dict.fromkeys(self._XML_TYPES, lambda data: data))
-            conversion_methods.update(dict.fromkeys(self._JSON_TYPES, lambda data: etree.fromstring(xmltodict.unparse(self.__internal_xmlify(data)).encode('utf-8'))))
+            conversion_methods.update(dict.fromkeys(self._JSON_TYPES, self.json_to_xml))
             conversion_methods.update({None.__class__: lambda data: etree.fromstring("<root/>")})
             return conversion_methods
         elif conv_type == "JSON":
             conversion_methods = {str: lambda data: json.loads(data)}
-            conversion_methods.update(dict.fromkeys(self._JSON_TYPES, lambda data: json.loads(json.dumps(data, default=self.decimal_default))))
-            conversion_methods.update(dict.fromkeys(self._XML_TYPES, lambda data: self.__remove_internal_xmlify(xmltodict.parse(etree.tostring(data), expat=expat))))
+            conversion_methods.update(dict.fromkeys(self._JSON_TYPES, self.__normalize_json))
+            conversion_methods.update(dict.fromkeys(self._XML_TYPES, self.xml_to_json))
             conversion_methods.update({None.__class__: lambda data: {}})
             return conversion_methods
         else:
             return collections.defaultdict(lambda: lambda data: data)
 
+    def json_to_xml(self, data):
+        """
+        Builds the XML tree directly from the dict, mirroring xmltodict.unparse. Structures outside of its plain subset (namespaces,
+        booleans, decimals, arbitrary iterables, invalid names or values) are converted through xmltodict itself
+        """
+        _json = self.__internal_xmlify(data)
+        try:
+            key, value = next(iter(_json.items()))
+            return self.__build_xml(None, key, value)
+        except Exception:
+            # The serialized path is the reference behavior, including the errors it raises
+            return self.json_to_xml_serialized(data)
+
+    def json_to_xml_serialized(self, data):
+        return etree.fromstring(xmltodict.unparse(self.__internal_xmlify(data)).encode('utf-8'))
+
+    def xml_to_json(self, data):
+        """
+        Builds the dict directly from the XML tree, mirroring xmltodict.parse. Documents using namespaces, entity references or
+        a doctype are converted through xmltodict itself
+        """
+        try:
+            _json = self.__parse_xml_root(data)
+        except (_DirectConversionUnsupported, RuntimeError):
+            return self.xml_to_json_serialized(data)
+        return self.__remove_internal_xmlify(_json)
+
+    def xml_to_json_serialized(self, data):
+        return self.__remove_internal_xmlify(xmltodict.parse(etree.tostring(data), expat=expat))
+
+    def __build_xml(self, parent, key, value):
+        if not isinstance(key, basestring) or ":" in key:
+            raise _DirectConversionUnsupported()
+        if isinstance(value, (list, tuple)):
+            values = value
+        elif value is None or isinstance(value, dict) or type(value) in self._XML_VALUE_TYPES:
+            values = (value,)
+        else:
+            raise _DirectConversionUnsupported()
+        if parent is None and len(values) != 1:
+            raise _DirectConversionUnsupported()
+
+        element = None
+        for value in values:
+            if parent is None:
+                element = etree.Element(key)
+            else:
+                element = etree.SubElement(parent, key)
+            if value is None:
+                continue
+            if isinstance(value, dict):
+                text = None
+                for item_key, item_value in value.iteritems():
+                    if item_key == "#text":
+                        text = item_value
+                    elif not isinstance(item_key, basestring) or ":" in item_key:
+                        raise _DirectConversionUnsupported()
+                    elif item_key.startswith("@"):
+                        if type(item_value) not in self._XML_VALUE_TYPES:
+                            raise _DirectConversionUnsupported()
+                        if not isinstance(item_value, basestring):
+                            item_value = unicode(item_value)
+                        element.set(item_key[1:], item_value)
+                    else:
+                        self.__build_xml(element, item_key, item_value)
+            elif isinstance(value, basestring):
+                text = value
+            elif type(value) in self._XML_VALUE_TYPES:
+                text = unicode(value)
+            else:
+                raise _DirectConversionUnsupported()
+
+            if text is None:
+                continue
+            if not isinstance(text, basestring):
+                raise _DirectConversionUnsupported()
+            if text:
+                if "\r" in text:
+                    # Line endings are normalized when the serialized document is parsed
+                    text = text.replace("\r\n", "\n").replace("\r", "\n")
+                # Character data is emitted after any child elements
+                if len(element):
+                    element[-1].tail = text
+                else:
+                    element.text = text
+        return element
+
+    def __parse_xml_root(self, data):
+        if isinstance(data, etree._ElementTree):
+            if data.docinfo.doctype:
+                raise _DirectConversionUnsupported()
+            element = data.getroot()
+            if element is None:
+                raise _DirectConversionUnsupported()
+        else:
+            element = data
+            if element.tail and element.tail.strip():
+                raise _DirectConversionUnsupported()
+        return self.__push_xml_item(None, element.tag, self.__parse_xml(element))
+
+    def __parse_xml(self, element):
+        if element.tag[0] == "{" or element.nsmap:
+            raise _DirectConversionUnsupported()
+        item = None
+        if len(element.attrib) > 0:
+            item = collections.OrderedDict()
+            for key, value in element.attrib.iteritems():
+                if key[0] == "{":
+                    raise _DirectConversionUnsupported()
+                item["@" + key] = value
+        text = [element.text] if element.text else []
+        for child in element:
+            if isinstance(child.tag, basestring):
+                item = self.__push_xml_item(item, child.tag, self.__parse_xml(child))
+            elif child.tag is not etree.Comment and child.tag is not etree.PI:
+                raise _DirectConversionUnsupported()
+            if child.tail:
+                text.append(child.tail)
+        text = "".join(text).strip() or None
+        if item is None:
+            return text
+        if text:
+            item = self.__push_xml_item(item, "#text", text)
+        return item
+
+    def __push_xml_item(self, item, key, value):
+        if item is None:
+            item = collections.OrderedDict()
+        try:
+            current = item[key]
+        except KeyError:
+            item[key] = value
+        else:
+            if isinstance(current, list):
+                current.append(value)
+            else:
+                item[key] = [current, value]
+        return item
+
+    def __normalize_json(self, data):
+        """
+        Structures that already consist of plain JSON types are used as is, anything else is normalized through a JSON round trip
+        """
+        if self.__is_plain_json(data):
+            return data
+        return json.loads(json.dumps(data, default=self.decimal_default))
+
+    def __is_plain_json(self, data):
+        pending = [data]
+        while pending:
+            value = pending.pop()
+            value_type = type(value)
+            if value_type is dict:
+                for key in value:
+                    if type(key) not in (str, unicode):
+                        return False
+                pending.extend(value.itervalues())
+            elif value_type is list:
+                pending.extend(value)
+            elif value_type not in self._JSON_SCALAR_TYPES:
+                return False
+        return True
+
     def __internal_xmlify(self, _json):
         if isinstance(_json, dict) and len(_json) == 0:
             _json = {self.__compy_wrapper_key: {}}
@@ -147,10 +316,15 @@ class _EventConversionMixin:
         try:
             if not force and self.isInstance(convert_to=convert_to, current_event=current_event):
                 return current_event
+            data = current_event.data
             new_class = convert_to.__new__(convert_to)
             new_class.__dict__.update(current_event.__dict__)
+            new_class.__dict__.pop("_data_string", None)
             if not ignore_data:
-                new_class.data = current_event.data
+                new_class.data = data
+                if isinstance(data, getattr(new_class, "_raw_data_types", ())):
+                    # Raw input (e.g. an HTTP request body) is kept so an untouched payload is emitted without re-serializing it
+                    new_class._data_string = data
         except Exception as err:
             raise InvalidEventConversion("Unable to convert event. <Attempted {old} -> {new}>".format(old=current_event.__class__, new=convert_to))
         return new_class
@@ -162,9 +336,19 @@ class _JSONEventConversionMixin(_EventConversionMixin):
     conversion_methods = _getConversionMethods().get_conversion_methods("JSON")
 
 class _EventFormatMixin(_EventConversionMixin):
-    
+
+    _raw_data_types = ()
+
     def _get_state(self):
-        return dict(self.__dict__)
+        if self.__dict__.get("_data_pending", False) and "_data_string" in self.__dict__:
+            data = self._data_string
+        else:
+            data = self._peek_data()
+        state = {key: value for key, value in self.__dict__.iteritems() if key not in ("_data_value", "_data_share", "_data_string", "_data_pending", "_created")}
+        state['_data'] = data
+        # The creation time is stored as a timestamp, but is kept under its original key and type in the serialized state
+        state['created'] = self.created
+        return state
 
     def format_error(self):
         if self.error:
@@ -187,17 +371,28 @@ class _EventFormatMixin(_EventConversionMixin):
 
 class _XMLEventFormatMixin(_XMLEventConversionMixin, _EventFormatMixin):
 
+    _raw_data_types = (str,)
+
     def _get_state(self):
         state = _EventFormatMixin._get_state(self)
-        if self.data is not None:
-            state['_data'] = etree.tostring(self.data)
+        if state['_data'] is not None:
+            state['_data'] = self.data_string()
         return state
 
     def data_string(self):
-        try:
-            return etree.tostring(self.data)
-        except TypeError:
-            return None
+        """
+        Raw string data the event was created or converted from is returned as is. Otherwise the payload is serialized once and the
+        result is kept until the data is replaced or accessed for modification. A reference to the data obtained before that must
+        not be used to modify it afterwards
+        """
+        data_string = self.__dict__.get("_data_string", None)
+        if data_string is None:
+            try:
+                data_string = etree.tostring(self._peek_data())
+            except TypeError:
+                return None
+            self._data_string = data_string
+        return data_string
 
     def format_error(self):
         errors = _EventFormatMixin.format_error(self)
@@ -219,14 +414,24 @@ class _XMLEventFormatMixin(_XMLEventConversionMixin, _EventFormatMixin):
 
 class _JSONEventFormatMixin(_JSONEventConversionMixin, _EventFormatMixin):
 
+    _raw_data_types = (str,)
+
     def _get_state(self):
         state = _EventFormatMixin._get_state(self)
-        if self.data is not None:
-            state['_data'] = json.dumps(self.data)
+        if state['_data'] is not None:
+            state['_data'] = self.data_string()
         return state
 
     def data_string(self):
-        return json.dumps(self.data, default=_getConversionMethods().decimal_default)
+        """
+        Raw string data the event was created or converted from is returned as is. Otherwise the payload is serialized once and the
+        result is kept until the data is replaced or accessed for modification. A reference to the data obtained before that must
+        not be used to modify it afterwards
+        """
+        data_string = self.__dict__.get("_data_string", None)
+        if data_string is None:
+            data_string = self._data_string = json.dumps(self._peek_data(), default=_getConversionMethods().decimal_default)
+        return data_string
 
     def error_string(self):
         error = self.format_error()
@@ -624,10 +829,19 @@ class XPathLookupMixin(LookupMixin):
         key_chain = [event_key] + key_chain
         return key_chain, xpath
 
-    def lookup(self, obj, key_chain=[]):
+    def lookup(self, obj, key_chain=[], xpath_lookups=None):
+        """
+        With 'xpath_lookups', a dict that is only used while 'obj' is not modified, the XPathLookup of each scope is built once and
+        reused for every xpath looked up on that scope
+        """
         key_chain, xpath = self.__interpret_key_chain(key_chain=key_chain)
-        xpath_scope = super(XPathLookupMixin, self).lookup(obj=obj, key_chain=key_chain)
-        lookup = XPathLookup(xpath_scope)
+        scope_key = tuple(key_chain)
+        lookup = xpath_lookups.get(scope_key, None) if xpath_lookups is not None else None
+        if lookup is None:
+            xpath_scope = super(XPathLookupMixin, self).lookup(obj=obj, key_chain=key_chain)
+            lookup = XPathLookup(xpath_scope)
+            if xpath_lookups is not None:
+                xpath_lookups[scope_key] = lookup
         xpath_lookup = lookup.lookup(xpath)
         values = []
         for result in xpath_lookup:
@@ -1,4 +1,5 @@
 from compy.actors.util.mysql import MySQLConnectionPool, _MySQLConnectionManager
+from compy.actors.util.database import escape_template_text, escape_literal
 from pymysql import IntegrityError, ProgrammingError, NotSupportedError, DataError
 import gevent, re
 
@@ -16,13 +17,13 @@ class _MySQLMixin:
 	def _create_db_pool(self, db_config):
 		return MySQLConnectionPool(db_config=db_config)
 
-	def _execute_query(self, query):
+	def _execute_query(self, query, args=None):
 		last_id = None
 		with _MySQLConnectionManager(db_pool=self.db_pool) as manager:
 			attempts = 1
 			while attempts <= self.max_attempts + 1:
 				try:
-					manager.execute(query)
+					manager.execute(query, args)
 					attempts = self.max_attempts + 2
 				except (IntegrityError, ProgrammingError, NotSupportedError, DataError) as e:
 					raise e
@@ -44,35 +45,128 @@ class _MySQLMixin:
 			results = [result for result in fetched_results if result] if fetched_results else []
 		return results
 
+	def _execute_batch(self, statements):
+		'''Executes a list of (query, args) statements in a single transaction on a single connection'''
+		with _MySQLConnectionManager(db_pool=self.db_pool) as manager:
+			attempts = 1
+			while True:
+				try:
+					manager.begin()
+					for query, args in statements:
+						manager.execute(query, args)
+					manager.commit()
+					return
+				except (IntegrityError, ProgrammingError, NotSupportedError, DataError) as e:
+					manager.rollback()
+					raise e
+				except Exception as e:
+					if attempts > self.max_attempts:
+						raise e
+					attempts += 1
+					try:
+						manager.reset()
+					except Exception:
+						pass
+					gevent.sleep(0.1)
+
 class _MySQLAutoMixin:
-	_fields_query_template = "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA LIKE '{__schema}' AND TABLE_NAME LIKE '{__table}'"
+	_fields_query = "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA LIKE %(schema)s AND TABLE_NAME LIKE %(table)s"
 
 	def _get_table_fields(self):
-		query = self._assemble_query(query_template=self._fields_query_template)
-		results = self._execute_query(query=query)
+		results = self._execute_query(query=self._fields_query, args={"schema": self.schema, "table": self.table})
 		return [result.get('COLUMN_NAME') for result in results]
 
-	def __format_value(self, value):
-		value = value.replace("'", "\\'")
-		return "'%s'" % value
+	def __build_statement(self, query_template, fields):
+		# Literal params are left as positional format fields, all other values become placeholders bound by the driver
+		columns = {field: escape_template_text("`%s`" % field) for field in fields}
+		values = {}
+		position = 0
+		for field in fields:
+			if field in self.literal_params:
+				values[field] = "{%d}" % position
+				position += 1
+			else:
+				values[field] = "%%(%s)s" % field
+		return query_template.format(
+			__schema=escape_template_text(self.schema),
+			__table=escape_template_text(self.table),
+			__all_fields=escape_template_text(", ".join(self.table_fields)),
+			__fields=", ".join([columns[field] for field in fields]),
+			__values=", ".join([values[field] for field in fields]),
+			__updates=", ".join(["%s=%s" % (columns[field], values[field]) for field in fields]),
+			__likes=" AND ".join(["1 = 1"] + ["%s LIKE %s" % (columns[field], values[field]) for field in fields]))
+
+	def __build_batch_statement(self, query_template, fields):
+		# Returns the statement, with a single format field for the rows, and the template of a single row
+		columns = [escape_template_text("`%s`" % field) for field in fields]
+		statement = query_template.format(
+			__schema=escape_template_text(self.schema),
+			__table=escape_template_text(self.table),
+			__fields=", ".join(columns),
+			__rows="{0}",
+			__batch_updates=", ".join(["%s=VALUES(%s)" % (column, column) for column in columns]))
+		row = []
+		position = 0
+		for field in fields:
+			if field in self.literal_params:
+				row.append("{%d}" % position)
+				position += 1
+			else:
+				row.append("%s")
+		return statement, "(%s)" % ", ".join(row)
+
+	def _assemble_batch_query(self, query_template, param_groups):
+		"""
+		Returns a list of (query, args) statements that write every param group, in order. Consecutive param groups that set the same
+		fields share a single multi row statement, so that rows are never written in a different order than they were received
+		"""
+		runs = []
+		for query_params in param_groups:
+			fields = tuple([field for field in self.table_fields if query_params.get(field, None) is not None])
+			if runs and runs[-1][0] == fields:
+				runs[-1][1].append(query_params)
+			else:
+				runs.append((fields, [query_params]))
+
+		statements = []
+		for fields, rows in runs:
+			key = (query_template, fields)
+			cached = self._statements.get(key)
+			if cached is None:
+				cached = self.__build_batch_statement(query_template=query_template, fields=fields)
+				self._statements.set(key, cached)
+			statement, row_template = cached
+			bound_fields = [field for field in fields if field not in self.literal_params]
+			literal_fields = [field for field in fields if field in self.literal_params]
+			row_queries = []
+			args = []
+			for query_params in rows:
+				row_queries.append(row_template.format(*[escape_literal(query_params[field]) for field in literal_fields]))
+				args.extend([query_params[field] for field in bound_fields])
+			statements.append((statement.format(", ".join(row_queries)), args))
+		return statements
 
 	def _assemble_query(self, query_template, query_params={}, *args, **kwargs):
-		query_params = {"`%s`"%field: query_params.get(field, '') if field in self.literal_params else self.__format_value(query_params.get(field, '')) for field in self.table_fields if query_params.get(field, None) is not None}
-		values = ", ".join([value for key, value in query_params.iteritems()])
-		fields = ", ".join(["%s" % key for key in query_params.iterkeys()])
-		all_fields = ", ".join(self.table_fields)
-		updates = ", ".join(["%s=%s" % (field, value) for field, value in query_params.iteritems()])
-		likes = " AND ".join(["1 = 1"] + ["%s LIKE %s" % (field, value) for field, value in query_params.iteritems()])
-		query = query_template.format(__schema=self.schema, __table=self.table, __all_fields=all_fields, __fields=fields, __values=values, __updates=updates, __likes=likes)
-		return query
+		fields = tuple([field for field in self.table_fields if query_params.get(field, None) is not None])
+		key = (query_template, fields)
+		statement = self._statements.get(key)
+		if statement is None:
+			statement = self.__build_statement(query_template=query_template, fields=fields)
+			self._statements.set(key, statement)
+		literals = [escape_literal(query_params[field]) for field in fields if field in self.literal_params]
+		return statement.format(*literals), {field: query_params[field] for field in fields if field not in self.literal_params}
 
+# With a 'batch_size' greater than 1, the param groups of a whole batch of events are written with _batch_query_template
 class _MySQLInsertMixin:
 	_query_template = "INSERT INTO {__schema}.{__table} ({__fields}) VALUES ({__values})"
+	_batch_query_template = "INSERT INTO {__schema}.{__table} ({__fields}) VALUES {__rows}"
 
 class _MySQLWriteMixin:
 	_query_template = "INSERT INTO {__schema}.{__table} ({__fields}) VALUES ({__values}) ON DUPLICATE KEY UPDATE {__updates}"
+	_batch_query_template = "INSERT INTO {__schema}.{__table} ({__fields}) VALUES {__rows} ON DUPLICATE KEY UPDATE {__batch_updates}"
 
 class _MySQLSelectMixin:
+	_cacheable_results = True
 	_query_template = "SELECT {__all_fields} FROM {__schema}.{__table} WHERE {__likes}"
 
 class _MySQLDeleteMixin:
@@ -12,16 +12,18 @@ class STDOUT(Actor):
     Prints incoming events to STDOUT. When <complete> is True,
     the complete event including headers is printed to STDOUT.
 
+    With a <batch_size> greater than 1 (Default: 1), queued events are drained in batches of up to <batch_size>, which are
+    written with a single flush.
 
     '''
 
-    def __init__(self, name, complete=False, prefix="", timestamp=False, *args, **kwargs):
-        super(STDOUT, self).__init__(name, *args, **kwargs)
+    def __init__(self, name, complete=False, prefix="", timestamp=False, batch_size=1, *args, **kwargs):
+        super(STDOUT, self).__init__(name, batch_size=batch_size, *args, **kwargs)
         self.complete = complete
         self.prefix = prefix
         self.timestamp = timestamp
 
-    def consume(self, event, *args, **kwargs):
+    def _format_entry(self, event):
         if self.complete:
             data = "{0}{1}".format(self.prefix, event)
         else:
@@ -30,6 +32,17 @@ class STDOUT(Actor):
         if self.timestamp:
             data = "[{0}] {1}".format(datetime.datetime.now(), data)
 
-        print(data)
+        return data
+
+    def consume(self, event, *args, **kwargs):
+        print(self._format_entry(event))
         sys.stdout.flush()
         self.send_event(event)
+
+    def consume_batch(self, events, consumed=None, *args, **kwargs):
+        print("\n".join(self._format_entry(event) for event in events))
+        sys.stdout.flush()
+        # The batch has been printed, so a failure while forwarding it must not print it again
+        if consumed is not None:
+            consumed.extend(events)
+        self._forward_batch(events)
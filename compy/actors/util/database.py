@@ -1,6 +1,12 @@
+import re
+from string import Formatter
 
 __all__ = [
-	"InvalidResultsException"
+	"InvalidResultsException",
+	"parameterize_template",
+	"bind_list",
+	"escape_template_text",
+	"escape_literal"
 ]
 
 class InvalidResultsException(Exception):
@@ -9,4 +15,179 @@ class InvalidResultsException(Exception):
 			expected=expected, received=received)
 		self.expected = expected
 		self.received = received
-		super(InvalidResultsException, self).__init__(message, *args, **kwargs)
\ No newline at end of file
+		super(InvalidResultsException, self).__init__(message, *args, **kwargs)
+
+_PARAMETER_NAME_REGEX = re.compile(r"^\w+$")
+_QUOTES = ("'", '"')
+
+def escape_template_text(text):
+	'''Escapes text so that it survives both str.format and pyformat substitution unchanged'''
+	return text.replace("%", "%%").replace("{", "{{").replace("}", "}}")
+
+def escape_literal(value):
+	'''Escapes a value formatted into a pyformat statement, so that the driver does not mistake it for a placeholder'''
+	if isinstance(value, basestring):
+		return value.replace("%", "%%")
+	return value
+
+def parameterize_template(query_template, literal_params=()):
+	"""
+	Rewrites a str.format query template into a statement with pyformat placeholders ('%(field)s') for the database driver to bind.
+	Returns the statement, a dict of the params that are built from patterns and a set of the fields that are lists.
+	Only fields named in 'literal_params' are formatted into the statement, and the statement is still a str.format template for them.
+	Every other field is bound, depending on its position:
+		- a quoted string that is only a single field ('{field}') becomes a placeholder for the field. The driver quotes the value
+		- a quoted string that holds a field and other text ('%{field}%') becomes a placeholder for the whole string. The string
+		  is returned as a pattern, a str.format template that builds the bound value from the params
+		- an unquoted field directly after a comparison operator (= {field}) becomes a placeholder for the field, or for a pattern
+		  when the field has a conversion, format spec or attribute lookup
+		- an unquoted field that is the whole list of an IN clause (IN ({field})) is left in place and returned as a list field.
+		  Its values are bound with bind_list when the statement is assembled
+	A field in any other position, such as an identifier (FROM {table}) or a LIMIT, can not be bound and raises a ValueError
+	"""
+	tokens = []
+	for text, field, format_spec, conversion in Formatter().parse(query_template):
+		if text:
+			tokens.append((text, None, None, None))
+		if field is not None:
+			tokens.append((None, field, format_spec, conversion))
+
+	statement = []
+	patterns = {}
+	list_params = set()
+	preceding = ""
+	index = 0
+	while index < len(tokens):
+		text, field, format_spec, conversion = tokens[index]
+		if text is not None:
+			opened_at = _find_quote(text)
+			if opened_at < 0:
+				statement.append(escape_template_text(text))
+				preceding += text
+				index += 1
+				continue
+			statement.append(escape_template_text(text[:opened_at]))
+			index, parts = _read_string(tokens, index, opened_at)
+			statement.append(_bind_string(parts, literal_params, patterns))
+			preceding += text[:opened_at] + "''"
+			continue
+
+		following = tokens[index + 1][0] if index + 1 < len(tokens) else ""
+		following = following if following is not None else "{"
+		if field in literal_params:
+			statement.append(_format_field(field, format_spec, conversion))
+		elif preceding.rstrip()[-1:] in _COMPARISONS and following[:1] in _VALUE_ENDS:
+			if not format_spec and not conversion and _PARAMETER_NAME_REGEX.match(field):
+				statement.append("%({0})s".format(field))
+			else:
+				statement.append(_bind_pattern(_format_field(field, format_spec, conversion), patterns))
+		elif _IN_LIST_REGEX.search(preceding) and following.lstrip()[:1] == ")" and not format_spec and not conversion and _PARAMETER_NAME_REGEX.match(field):
+			statement.append("{" + field + "}")
+			list_params.add(field)
+		else:
+			raise ValueError("Param '{0}' is in a position that can not be bound by the database driver, it must be named in literal_params to be formatted into the query".format(field))
+		preceding = ""
+		index += 1
+	return "".join(statement), patterns, list_params
+
+def bind_list(field, value):
+	"""
+	Returns the placeholders and arguments that bind the values of the list param 'field' one at a time. A string value is split
+	on commas, and the quotes of quoted items are dropped. An empty list is bound as a single NULL, which matches nothing
+	"""
+	if isinstance(value, basestring):
+		values = [_unquote(item.strip()) for item in value.split(",") if item.strip()]
+	else:
+		try:
+			values = list(value)
+		except TypeError:
+			values = [value]
+	if len(values) == 0:
+		values = [None]
+	args = {}
+	placeholders = []
+	for position, item in enumerate(values):
+		name = "__{0}_{1}".format(field, position)
+		args[name] = item
+		placeholders.append("%({0})s".format(name))
+	return ", ".join(placeholders), args
+
+_COMPARISONS = ("=", "<", ">")
+_VALUE_ENDS = ("", " ", "\t", "\r", "\n", ")", ",", ";")
+_IN_LIST_REGEX = re.compile(r"\bIN\s*\(\s*$", re.IGNORECASE)
+_ESCAPED_CHARS = ("\\", "'", '"')
+
+def _format_field(field, format_spec, conversion):
+	return "{" + field + ("!" + conversion if conversion else "") + (":" + format_spec if format_spec else "") + "}"
+
+def _find_quote(text):
+	for position, char in enumerate(text):
+		if char in _QUOTES:
+			return position
+	return -1
+
+def _read_string(tokens, index, opened_at):
+	"""
+	Reads the quoted string that opens at 'opened_at' in the text token at 'index'. Returns the index of the token that holds the
+	text following the string, and the parts of the string as (value, raw, field, format_spec, conversion) tuples. The raw text of
+	a part is as written in the template, including the quotes, its value is the text of the string with its escapes undone
+	"""
+	text = tokens[index][0]
+	quote = text[opened_at]
+	parts = []
+	position = opened_at + 1
+	begin = opened_at
+	value = []
+	while index < len(tokens):
+		text, field, format_spec, conversion = tokens[index]
+		if text is None:
+			parts.append((None, None, field, format_spec, conversion))
+			index += 1
+			continue
+		while position < len(text):
+			char = text[position]
+			if char == "\\" and text[position + 1:position + 2] in _ESCAPED_CHARS:
+				value.append(text[position + 1])
+				position += 2
+			elif char == quote and text[position + 1:position + 2] == quote:
+				value.append(quote)
+				position += 2
+			elif char == quote:
+				parts.append(("".join(value), text[begin:position + 1], None, None, None))
+				tokens[index] = (text[position + 1:], None, None, None)
+				return index, parts
+			else:
+				value.append(char)
+				position += 1
+		parts.append(("".join(value), text[begin:], None, None, None))
+		value = []
+		index += 1
+		position = begin = 0
+	raise ValueError("The query template has an unterminated string")
+
+def _bind_string(parts, literal_params, patterns):
+	"""
+	Returns the statement text for the parts of a quoted string read by _read_string
+	"""
+	fields = [field for value, raw, field, format_spec, conversion in parts if field is not None]
+	if any([field in literal_params for field in fields]) or len(fields) == 0:
+		if not all([field in literal_params for field in fields]):
+			raise ValueError("Params {0} share a quoted string, so they must either all or none be named in literal_params".format(", ".join(fields)))
+		return "".join([escape_template_text(raw) if field is None else _format_field(field, format_spec, conversion)
+			for value, raw, field, format_spec, conversion in parts])
+	parts = [part for part in parts if part[0] != ""]
+	if len(parts) == 1 and not parts[0][3] and not parts[0][4] and _PARAMETER_NAME_REGEX.match(parts[0][2]):
+		# The driver quotes the bound value itself
+		return "%({0})s".format(parts[0][2])
+	return _bind_pattern("".join([value.replace("{", "{{").replace("}", "}}") if field is None else _format_field(field, format_spec, conversion)
+		for value, raw, field, format_spec, conversion in parts]), patterns)
+
+def _bind_pattern(pattern, patterns):
+	name = "__pattern_{0}".format(len(patterns))
+	patterns[name] = pattern
+	return "%({0})s".format(name)
+
+def _unquote(item):
+	if len(item) >= 2 and item[0] in _QUOTES and item[-1] == item[0]:
+		return item[1:-1].replace(item[0] + item[0], item[0])
+	return item
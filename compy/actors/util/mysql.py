@@ -1,8 +1,12 @@
-import gevent, re
+import gevent, gevent.lock
+from collections import deque
+from time import time
 from pymysql.connections import Connection
 from pymysql.cursors import DictCursor
 from pymysql.constants import FIELD_TYPE
 from pymysql.constants.CLIENT import MULTI_STATEMENTS
+from compy.errors import ServiceUnavailable
+from compy.metrics import LatencyHistogram
 
 __all__ = [
 	"MySQLConnectionPool",
@@ -10,46 +14,31 @@ __all__ = [
 ]
 class _MySQLConnection(Connection):
 
-	def __init__(self, cursorclass=DictCursor, connect_timeout=30, autocommit=True, *args, **kwargs):
-		self.mysql_function_regex = re.compile("^[A-Z1-9]*\(.*\)$")
-		self.mysql_subquery_regex = re.compile("^\(.*\)$")
+	def __init__(self, cursorclass=DictCursor, connect_timeout=30, autocommit=True, connect_attempts=3, connect_retry_delay=1, *args, **kwargs):
+		self.connect_attempts = connect_attempts
+		self.connect_retry_delay = connect_retry_delay
 		self.kwargs = kwargs
 		self.kwargs['connect_timeout'] = connect_timeout
 		super(_MySQLConnection, self).__init__(cursorclass=cursorclass, autocommit=autocommit, **self.kwargs)
 		self.decoders[FIELD_TYPE.TINY] = lambda x: bool(int(x))
 
 	def cursor(self, *args, **kwargs):
-		while True:
-			try:
-				return super(_MySQLConnection, self).cursor(*args, **kwargs)
-			except Exception as err:
-				self.connect()
-				gevent.sleep(0.1)
-
-	def __connect(self, connect_timeout=1):
-		self.__connected = False
-		self.connect_timeout = connect_timeout
-		super(_MySQLConnection, self).connect()
-		self.__connected = True
-
-	def connect(self, **kwargs):
-		original_timeout = self.connect_timeout
-		self.__connected = False
-		while not self.__connected:
-			try:
-				self.__connect()
-				self.__connect(connect_timeout=int(original_timeout))
-			except Exception as err:
-				print "Stuck reconnecting with ERROR : {0}".format(err)
-				gevent.sleep(1)
-
-	def escape(self, obj, *args, **kwargs):
 		try:
-			if self.mysql_function_regex.search(obj) or self.mysql_subquery_regex.search(obj):
-				return obj
+			return super(_MySQLConnection, self).cursor(*args, **kwargs)
 		except Exception:
-			pass
-		return super(_MySQLConnection, self).escape(obj, *args, **kwargs)
+			self.connect()
+			return super(_MySQLConnection, self).cursor(*args, **kwargs)
+
+	def connect(self, *args, **kwargs):
+		attempts = 1
+		while True:
+			try:
+				return super(_MySQLConnection, self).connect(*args, **kwargs)
+			except Exception:
+				if attempts >= self.connect_attempts:
+					raise
+				attempts += 1
+				gevent.sleep(self.connect_retry_delay)
 
 
 class MySQLConfig():
@@ -64,53 +53,163 @@ class MySQLConfig():
 			self.db_connection_opts["port"] = int(self.db_connection_opts["port"])
 
 class MySQLConnectionPool:
-
-	def __init__(self, db_config, size=3, *args, **kwargs):
+	"""
+	**A pool of MySQL connections that are opened as they are needed, up to a maximum size**
+
+	Checking out a connection blocks until one is released or a new one may be opened. Connections idle for longer than
+	'ping_interval' are pinged before they are handed out, and are closed once idle for longer than 'idle_timeout'.
+	After 'failure_threshold' consecutive failed connection attempts, new connections are refused with ServiceUnavailable
+	for 'recovery_timeout' seconds, after which a single attempt is let through to test the database again
+
+	Parameters:
+		db_config (dict):
+			| The 'schema', 'port', 'host', 'username' and 'password' to connect with, and optionally the 'pool_size'
+		size (Optional[int]):
+			| The maximum amount of open connections, unless 'pool_size' is provided in 'db_config'
+			| Default: 3
+		checkout_timeout (Optional[float]):
+			| The amount of seconds to wait for a connection before ServiceUnavailable is raised
+			| Default: 30
+		idle_timeout (Optional[float]):
+			| The amount of seconds a connection may be idle before it is closed
+			| Default: 300
+		ping_interval (Optional[float]):
+			| The amount of seconds a connection may be idle before it is pinged on checkout
+			| Default: 5
+		failure_threshold (Optional[int]):
+			| The amount of consecutive failed connection attempts after which new connections are refused
+			| Default: 5
+		recovery_timeout (Optional[float]):
+			| The amount of seconds new connections are refused for
+			| Default: 30
+	"""
+
+	def __init__(self, db_config, size=3, checkout_timeout=30, idle_timeout=300, ping_interval=5, failure_threshold=5, recovery_timeout=30, *args, **kwargs):
 		self.db_options = MySQLConfig(db_config)
 		config_size = self.db_options.db_connection_opts.get('pool_size', None)
 		self.size = int(config_size if config_size else size)
-		self.pool = gevent.queue.Queue(maxsize=self.size)
-		self.connection_requests = gevent.queue.Queue()
-		self.__initialize_pool(**kwargs)
-
-	def __initialize_pool(self, *args, **kwargs):
-		while self.pool.qsize() < self.size:
-			self.pool.put(_MySQLConnection(
-				host=self.db_options.db_connection_opts['host'],
-				port=self.db_options.db_connection_opts['port'],
-				user=self.db_options.db_connection_opts['username'],
-				password=self.db_options.db_connection_opts['password'],
-				database=self.db_options.db_connection_opts['schema'],
-				use_unicode=False,
-				charset='utf8',
-				client_flag=MULTI_STATEMENTS,
-				**kwargs))
-
-	def get_connection(self):
-		while True:           
+		self.checkout_timeout = checkout_timeout
+		self.idle_timeout = idle_timeout
+		self.ping_interval = ping_interval
+		self.failure_threshold = failure_threshold
+		self.recovery_timeout = recovery_timeout
+		self.connection_kwargs = kwargs
+		self.idle = deque()					# (connection, released) pairs, the most recently released last
+		self.connections = 0
+		self.available = gevent.lock.BoundedSemaphore(self.size)
+		self.checkout_wait = LatencyHistogram()
+		self.checkout_timeouts = 0
+		self.failures = 0
+		self.circuit_opened = None
+
+	def _create_connection(self):
+		return _MySQLConnection(
+			host=self.db_options.db_connection_opts['host'],
+			port=self.db_options.db_connection_opts['port'],
+			user=self.db_options.db_connection_opts['username'],
+			password=self.db_options.db_connection_opts['password'],
+			database=self.db_options.db_connection_opts['schema'],
+			use_unicode=False,
+			charset='utf8',
+			client_flag=MULTI_STATEMENTS,
+			**self.connection_kwargs)
+
+	def __connect(self):
+		if self.circuit_opened is not None:
+			if time() - self.circuit_opened < self.recovery_timeout:
+				raise ServiceUnavailable("Connecting to MySQL failed {0} consecutive times, not retrying for {1} seconds".format(self.failures, self.recovery_timeout))
+			self.circuit_opened = time()	# Lets this attempt through while refusing others until it is resolved
+		try:
+			connection = self._create_connection()
+		except Exception:
+			self.failures += 1
+			if self.failures >= self.failure_threshold:
+				self.circuit_opened = time()
+			raise
+		self.failures = 0
+		self.circuit_opened = None
+		self.connections += 1
+		return connection
+
+	def __discard(self, connection):
+		self.connections -= 1
+		try:
+			connection.close()
+		except Exception:
+			pass
+
+	def __evict_idle(self):
+		now = time()
+		while self.idle and now - self.idle[0][1] > self.idle_timeout:
+			self.__discard(self.idle.popleft()[0])
+
+	def __checkout(self):
+		self.__evict_idle()
+		while self.idle:
+			connection, released = self.idle.pop()
+			if time() - released < self.ping_interval:
+				return connection
 			try:
-				return self.pool.get_nowait()
-			except gevent.queue.Empty:
-				gevent.sleep(0)
+				connection.ping(reconnect=False)
+				return connection
+			except Exception:
+				self.__discard(connection)
+		return self.__connect()
+
+	def get_connection(self, timeout=None):
+		started = time()
+		if not self.available.acquire(timeout=self.checkout_timeout if timeout is None else timeout):
+			self.checkout_timeouts += 1
+			raise ServiceUnavailable("Timed out waiting for one of {0} MySQL connections".format(self.size))
+		self.checkout_wait.record((time() - started) * 1000)
+		try:
+			return self.__checkout()
+		except Exception:
+			self.available.release()
+			raise
 
-	def release_connection(self, db_connection):
-		self.pool.put_nowait(db_connection)
+	def release_connection(self, db_connection, discard=False):
+		"""A connection released with 'discard', e.g. after it failed, is closed rather than returned to the pool"""
+		if db_connection.open and not discard:
+			self.idle.append((db_connection, time()))
+		else:
+			self.__discard(db_connection)
+		self.available.release()
 
 	def close(self):
-		while True:
-			try:
-				self.pool.get_nowait().close()
-			except gevent.queue.Empty:
-				break
+		while self.idle:
+			self.__discard(self.idle.pop()[0])
+
+	def snapshot(self):
+		return {
+			"size": self.size,
+			"connections": self.connections,
+			"idle": len(self.idle),
+			"checkout_wait_ms": self.checkout_wait.snapshot(),
+			"checkout_timeouts": self.checkout_timeouts,
+			"consecutive_failures": self.failures,
+			"circuit_open": self.circuit_opened is not None
+		}
 
 class _MySQLConnectionManager:
 	def __init__(self, db_pool, *args, **kwargs):
 		self.db_pool = db_pool
 		
 	def execute(self, *args, **kwargs):
+		self.__ensure_connection()
 		self.cursor.execute(*args, **kwargs)
 		self.last_id = self.cursor.lastrowid
 
+	def begin(self):
+		self.__ensure_connection()
+		self.db_connection.begin()
+
+	def commit(self):
+		self.db_connection.commit()
+
+	def rollback(self):
+		self.db_connection.rollback()
+
 	def fetchone(self):
 		return self.cursor.fetchone()
 
@@ -118,16 +217,39 @@ class _MySQLConnectionManager:
 		return self.cursor.fetchall()
 
 	def reset(self):
-		self.cursor.close()
-		self.db_connection.close()
-		self.db_connection.connect()
-		self.cursor = self.db_connection.cursor()
+		"""
+		Discards the connection and checks out another one from the pool, so reconnecting is subject to its failure breaker.
+		If that fails, the manager no longer holds a connection
+		"""
+		connection, self.db_connection = self.db_connection, None
+		if connection is not None:
+			try:
+				self.cursor.close()
+			except Exception:
+				pass
+			self.db_pool.release_connection(connection, discard=True)
+		self.__checkout()
+
+	def __ensure_connection(self):
+		# A failed reset leaves the manager without a connection until it is used again
+		if self.db_connection is None:
+			self.__checkout()
+
+	def __checkout(self):
+		self.db_connection = self.db_pool.get_connection()
+		try:
+			self.cursor = self.db_connection.cursor()
+		except Exception:
+			connection, self.db_connection = self.db_connection, None
+			self.db_pool.release_connection(connection)
+			raise
 
 	def __enter__(self):
-		self.db_connection = self.db_pool.get_connection()
-		self.cursor = self.db_connection.cursor()
+		self.db_connection = None
+		self.__checkout()
 		return self
 
 	def __exit__(self, *exc_info):
-		self.cursor.close()
-		self.db_pool.release_connection(self.db_connection)
\ No newline at end of file
+		if self.db_connection is not None:
+			self.cursor.close()
+			self.db_pool.release_connection(self.db_connection)
\ No newline at end of file
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+from compy.util.cache import regexes
+
+__all__ = [
+    "compile_check"
+]
+
+# Keywords that only describe a schema and never fail validation
+_ANNOTATIONS = frozenset(["$schema", "id", "title", "description", "default"])
+
+_TYPES = {
+    "object": lambda instance: isinstance(instance, dict),
+    "array": lambda instance: isinstance(instance, list),
+    "string": lambda instance: isinstance(instance, basestring),
+    "integer": lambda instance: isinstance(instance, (int, long)) and not isinstance(instance, bool),
+    "number": lambda instance: isinstance(instance, (int, long, float)) and not isinstance(instance, bool),
+    "boolean": lambda instance: isinstance(instance, bool),
+    "null": lambda instance: instance is None
+}
+
+class _Unsupported(Exception):
+    pass
+
+def compile_check(schema):
+    """
+    Compiles a Draft 4 'schema' into a function that returns whether an instance is valid, built from checks specialized to the
+    keywords the schema actually uses. The check is conservative: it only returns True for instances that are valid, so a False
+    result must be confirmed with a full validator, which also provides the error messages.
+    Schemas that use keywords without a specialized check ($ref, combinators, format, ...) compile to a check that is never True
+    """
+    try:
+        return _compile(schema)
+    except _Unsupported:
+        return _unchecked
+
+def _unchecked(instance):
+    return False
+
+def _compile(schema):
+    if not isinstance(schema, dict):
+        raise _Unsupported()
+
+    checks = []
+    for keyword, value in schema.iteritems():
+        if keyword in _ANNOTATIONS:
+            continue
+        try:
+            compile_keyword = _KEYWORDS[keyword]
+        except KeyError:
+            raise _Unsupported()
+        checks.append(compile_keyword(value, schema))
+    checks = [check for check in checks if check is not None]
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(instance):
+        for keyword_check in checks:
+            if not keyword_check(instance):
+                return False
+        return True
+    return check
+
+def _type(types, schema):
+    if isinstance(types, basestring):
+        types = [types]
+    try:
+        type_checks = [_TYPES[name] for name in types]
+    except (KeyError, TypeError):
+        raise _Unsupported()
+
+    def check(instance):
+        for type_check in type_checks:
+            if type_check(instance):
+                return True
+        return False
+    return check
+
+def _properties(properties, schema):
+    if not isinstance(properties, dict):
+        raise _Unsupported()
+    property_checks = [(name, _compile(subschema)) for name, subschema in properties.iteritems()]
+
+    def check(instance):
+        if isinstance(instance, dict):
+            for name, property_check in property_checks:
+                if name in instance and not property_check(instance[name]):
+                    return False
+        return True
+    return check
+
+def _additional_properties(additional, schema):
+    if additional is True:
+        return None
+    declared = frozenset(schema.get("properties", {}))
+    additional_check = None if additional is False else _compile(additional)
+
+    def check(instance):
+        if isinstance(instance, dict):
+            for name in instance:
+                if name not in declared and (additional_check is None or not additional_check(instance[name])):
+                    return False
+        return True
+    return check
+
+def _required(required, schema):
+    def check(instance):
+        if isinstance(instance, dict):
+            for name in required:
+                if name not in instance:
+                    return False
+        return True
+    return check
+
+def _items(items, schema):
+    if not isinstance(items, dict):
+        raise _Unsupported()
+    item_check = _compile(items)
+
+    def check(instance):
+        if isinstance(instance, list):
+            for item in instance:
+                if not item_check(item):
+                    return False
+        return True
+    return check
+
+def _enum(enum, schema):
+    # Booleans never equal numbers here, so the check stays conservative whichever way the validator compares them
+    def check(instance):
+        for value in enum:
+            if value == instance and isinstance(value, bool) == isinstance(instance, bool):
+                return True
+        return False
+    return check
+
+def _bound(applies, within):
+    def compile_bound(limit, schema):
+        def check(instance):
+            return not applies(instance) or within(instance, limit, schema)
+        return check
+    return compile_bound
+
+def _pattern(pattern, schema):
+    search = regexes.compile(pattern).search
+
+    def check(instance):
+        return not isinstance(instance, basestring) or search(instance) is not None
+    return check
+
+def _ignored(value, schema):
+    return None
+
+_is_string = _TYPES["string"]
+_is_array = _TYPES["array"]
+_is_object = _TYPES["object"]
+_is_number = _TYPES["number"]
+
+_KEYWORDS = {
+    "type": _type,
+    "properties": _properties,
+    "additionalProperties": _additional_properties,
+    "required": _required,
+    "items": _items,
+    "enum": _enum,
+    "pattern": _pattern,
+    "minLength": _bound(_is_string, lambda instance, limit, schema: len(instance) >= limit),
+    "maxLength": _bound(_is_string, lambda instance, limit, schema: len(instance) <= limit),
+    "minItems": _bound(_is_array, lambda instance, limit, schema: len(instance) >= limit),
+    "maxItems": _bound(_is_array, lambda instance, limit, schema: len(instance) <= limit),
+    "minProperties": _bound(_is_object, lambda instance, limit, schema: len(instance) >= limit),
+    "maxProperties": _bound(_is_object, lambda instance, limit, schema: len(instance) <= limit),
+    "minimum": _bound(_is_number, lambda instance, limit, schema: instance > limit if schema.get("exclusiveMinimum", False) else instance >= limit),
+    "maximum": _bound(_is_number, lambda instance, limit, schema: instance < limit if schema.get("exclusiveMaximum", False) else instance <= limit),
+    # Only take effect alongside the keywords above
+    "exclusiveMinimum": _ignored,
+    "exclusiveMaximum": _ignored
+}
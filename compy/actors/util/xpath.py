@@ -2,12 +2,22 @@ import re
 
 from lxml import etree
 
+from compy.util.cache import LRUCache
+
 class XPathLookup(object):
     """
     Wrapper class that auto populates an xpath lookup with the default namespace, if defined by the provided xml.
     This is necessary because lxml does not take default namespaces into account with simple xpath lookups by default
+
+    Compiled xpaths are cached per (xpath, namespaces). The namespaces of a document are discovered once per lookup instance, so
+    several xpaths on the same document should be looked up through a single instance. Documents are not cached across instances,
+    as lxml elements cannot be weakly referenced and a cache would keep every recently looked up tree alive
     """
 
+    DEFAULT_NAMESPACE_REGEX = re.compile(r'\/(?!\/|([\w{0, }]\:[\w{0, }]))')
+
+    xpaths = LRUCache(maxsize=512)
+
     def __init__(self, xml):
         self.xml = xml
         self.__initialize_namespaces(self.xml)
@@ -66,7 +76,12 @@ class XPathLookup(object):
                 It will not, at this time, recursively check for each child nodes default ns and map accordingly
         """
 
-        if self.namespaces.get("default", None):
-            xpath = re.sub(r'\/(?!\/|([\w{0, }]\:[\w{0, }]))', r'/default:', xpath)
+        key = (xpath, tuple(sorted(self.namespaces.iteritems())))
+        compiled = self.xpaths.get(key)
+        if compiled is None:
+            if self.namespaces.get("default", None):
+                xpath = self.DEFAULT_NAMESPACE_REGEX.sub(r'/default:', xpath)
+            compiled = etree.XPath(xpath, namespaces=self.namespaces)
+            self.xpaths.set(key, compiled)
 
-        return self.xml.xpath(xpath, namespaces=self.namespaces)
\ No newline at end of file
+        return compiled(self.xml)
\ No newline at end of file
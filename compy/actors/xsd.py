@@ -1,10 +1,13 @@
 #!/usr/bin/env python
 
+from io import BytesIO
 from lxml import etree
 
 from compy.actor import Actor
 from compy.event import XMLEvent, JSONEvent
 from compy.errors import MalformedEventData
+from compy.executor import compile_once
+from compy.util.compiled import compiled
 
 __all__ = [
     "XSD",
@@ -21,6 +24,12 @@ class _XSD(Actor):
             | The instance name.
         xsd (str):
             | The XSD to validate the schema against
+        streaming (Optional[bool]):
+            | Whether raw data that has not been parsed yet (see the 'lazy_data' of HTTPServer) is validated while it is
+            | incrementally parsed, rather than after parsing it into a tree. Elements are discarded once validated, so memory
+            | stays bounded for large payloads, and validation stops at the first error. The data is left unparsed for the
+            | next actor
+            | Default: False
 
     Input:
         XMLEvent
@@ -32,30 +41,78 @@ class _XSD(Actor):
 
     input = XMLEvent
 
-    def __init__(self, name, xsd=None, *args, **kwargs):
+    def __init__(self, name, xsd=None, streaming=False, *args, **kwargs):
         super(_XSD, self).__init__(name, *args, **kwargs)
+        self.xsd = xsd
+        self.streaming = streaming
         if xsd:
-            self.schema = etree.XMLSchema(etree.XML(xsd))
+            self.schema = compiled.get("xsd", xsd, compile_xsd)
         else:
             self.schema = None
 
     def consume(self, event, *args, **kwargs):
         try:
+            document = event.raw_data() if self.streaming else None
+            if document is not None:
+                messages = self.validate_stream(document)
+            else:
+                messages = self.validate(event.data)
+        except Exception as error:
+            messages = error
 
-            if self.schema:
-                self.schema.assertValid(event.data)
-            self.logger.info("Incoming XML successfully validated", event=event)
-            self.send_event(event)
-        except etree.DocumentInvalid as xml_errors:
-            messages = [message.message for message in xml_errors.error_log.filter_levels([1, 2])]
+        if messages:
             self.process_error(messages, event)
-        except Exception as error:
-            self.process_error(error, event)
+        self.logger.info("Incoming XML successfully validated", event=event)
+        self.send_event(event)
+
+    def validate(self, etree_element):
+        '''Returns the messages of the validation errors of 'etree_element', or None if it is valid'''
+        if not self.schema:
+            return None
+        if self.executor is None:
+            return _validation_errors(self.schema, etree_element)
+        return self.offload(_validate, self.xsd, etree.tostring(etree_element))
+
+    def validate_stream(self, document):
+        '''Returns the message of the first validation error of the raw XML 'document', or None if it is valid'''
+        if self.executor is None:
+            return _stream_validation_errors(self.schema, document)
+        return self.offload(_validate_stream, self.xsd, document)
 
     def process_error(self, message, event):
         self.logger.error("Error validating incoming XML: {0}".format(message), event=event)
         raise MalformedEventData(message)
 
+def compile_xsd(xsd):
+    return etree.XMLSchema(etree.XML(xsd))
+
+def _validation_errors(schema, etree_element):
+    try:
+        schema.assertValid(etree_element)
+    except etree.DocumentInvalid as xml_errors:
+        return [message.message for message in xml_errors.error_log.filter_levels([1, 2])]
+
+def _stream_validation_errors(schema, document):
+    if isinstance(document, unicode):
+        document = document.encode("utf-8")
+    try:
+        for _, element in etree.iterparse(BytesIO(document), events=("end",), schema=schema):
+            # Validated elements are no longer needed, and neither are the preceding siblings that were already cleared
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    except etree.XMLSyntaxError as error:
+        return [error.msg]
+
+def _validate(xsd, document):
+    '''Validates the serialized 'document' against 'xsd' in an executor, compiling the schema once per worker'''
+    schema = compile_once(xsd, compile_xsd, xsd)
+    return _validation_errors(schema, etree.fromstring(document))
+
+def _validate_stream(xsd, document):
+    schema = compile_once(xsd, compile_xsd, xsd) if xsd else None
+    return _stream_validation_errors(schema, document)
+
 class XSD(_XSD):
     output = XMLEvent
 
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import logging
 import traceback
 
 from lxml import etree
@@ -8,6 +9,8 @@ from lxml.etree import XSLTApplyError #TODO Don't need this and generic etree im
 from compy.actor import Actor
 from compy.event import XMLEvent, JSONEvent
 from compy.errors import MalformedEventData
+from compy.executor import compile_once
+from compy.util.compiled import compiled
 
 __all__ = [
     "XSLT",
@@ -41,13 +44,17 @@ class _XSLT(Actor):
         if xslt is None and not isinstance(xslt, str):
             raise TypeError("Invalid xslt defined. {_type} is not a valid xslt. Expected 'str'".format(_type=type(xslt)))
         else:
-            self.template = etree.XSLT(etree.XML(xslt))
+            self.xslt = xslt
+            self.template = compiled.get("xslt", xslt, compile_xslt)
 
     def consume(self, event, *args, **kwargs):
         try:
-            self.logger.debug("In: {data}".format(data=event.data_string().replace('\n', '')), event=event)
+            debug = self.logger.is_enabled_for(logging.DEBUG)
+            if debug:
+                self.logger.debug("In: {data}", data=event.data_string().replace('\n', ''), event=event)
             event.data = self.transform(event.data)
-            self.logger.debug("Out: {data}".format(data=event.data_string().replace('\n', '')), event=event)
+            if debug:
+                self.logger.debug("Out: {data}", data=event.data_string().replace('\n', ''), event=event)
             self.logger.info("Successfully transformed XML", event=event)
             self.send_event(event)
         except XSLTApplyError as err:
@@ -63,7 +70,23 @@ class _XSLT(Actor):
         raise MalformedEventData("Malformed Request: Invalid XML")
 
     def transform(self, etree_element):
-        return self.template(etree_element).getroot()
+        if self.executor is None:
+            return self.template(etree_element).getroot()
+
+        # Elements can not leave the process, so the document is serialized for the executor and parsed from its result
+        result = self.offload(_transform, self.xslt, etree.tostring(etree_element))
+        if result is not None:
+            return etree.fromstring(result)
+
+def compile_xslt(xslt):
+    return etree.XSLT(etree.XML(xslt))
+
+def _transform(xslt, document):
+    '''Applies 'xslt' to the serialized 'document' in an executor, compiling the template once per worker'''
+    template = compile_once(xslt, compile_xslt, xslt)
+    root = template(etree.fromstring(document)).getroot()
+    if root is not None:
+        return etree.tostring(root)
 
 class XSLT(_XSLT):
     output = XMLEvent
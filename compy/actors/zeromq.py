@@ -121,7 +121,10 @@ class _ZMQOut(_ZMQ):
         self.outbound_queue = Queue()
 
     def consume(self, event, *args, **kwargs):
-        self.outbound_queue.put(event)
+        self.outbound_queue.put([event])
+
+    def consume_batch(self, events, *args, **kwargs):
+        self.outbound_queue.put(events)
 
     def pre_hook(self):
         self.threads.spawn(self.__consume_outbound_queue)
@@ -129,15 +132,17 @@ class _ZMQOut(_ZMQ):
     def __consume_outbound_queue(self):
         while self.loop():
             try:
-                event = self.outbound_queue.get(timeout=2.5)
+                events = self.outbound_queue.get(timeout=2.5)
             except Exception:
-                event = None
+                events = None
 
-            if event is not None:
+            if events:
                 try:
-                    self.socket.send(pickle.dumps(event))
+                    # Each event is sent as a separate frame of a single multipart message
+                    self.socket.send_multipart([pickle.dumps(event) for event in events])
                 except Exception as err:
-                    self.logger.error("Unable to send event over ZMQ: {err}".format(err=err), event=event)
+                    for event in events:
+                        self.logger.error("Unable to send event over ZMQ: {err}".format(err=err), event=event)
 
 
 class _ZMQIn(_ZMQ):
@@ -165,9 +170,8 @@ class _ZMQIn(_ZMQ):
                 break
 
             if items:
-                event = self.socket.recv_multipart()
-                event = pickle.loads(event[0])
-                self.send_event(event)
+                for frame in self.socket.recv_multipart():
+                    self.send_event(pickle.loads(frame))
 
 
 class ZMQPush(_ZMQOut):
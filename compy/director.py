@@ -1,31 +1,66 @@
 #!/usr/bin/env python
 
+import errno
+import json
+import logging
 import signal
 import os
 import traceback
 
-from gevent import signal as gsignal, event
+import gevent.os
+from gevent import signal as gsignal, event, spawn, sleep, fork
+from gevent.select import select
 
 from compy.actor import Actor
 from compy.actors.null import Null
 from compy.actors.stdout import STDOUT
 from compy.actors.eventlogger import EventLogger
 from compy.errors import ActorInitFailure
+from compy.event import JSONEvent
+from compy.metrics import aggregate_metrics
+from compy.queue import Queue
 
 class Director(object):
 
     _async_class = event.Event
 
-    def __init__(self, size=500, name="default", *args, **kwargs):
+    def __init__(self, size=500, name="default", log_level=None, workers=1, worker_restart_delay=1, worker_report_interval=5, worker_stop_timeout=10, *args, **kwargs):
+        """
+        'log_level' is the minimum level (name or number) of the log messages generated by any actor of this director. Messages below
+        it are discarded at the source, rather than being created and sent to the log actor. By default nothing is discarded
+
+        'workers' is the amount of processes the actors are run in. With more than one, start() forks that many worker processes that
+        each run every actor, including the log, error and metrics actors, while this process only supervises them. Actors that define
+        a 'pre_fork' method (such as HTTPServer, which binds its socket) have it called before the workers are forked.
+        A worker that exits is forked again after 'worker_restart_delay' seconds. Every 'worker_report_interval' seconds, each worker
+        reports its metrics to this process, and the aggregate of all workers is added to the metrics events of worker 0 as 'workers'.
+        On stop, workers are terminated, and killed if they have not exited after 'worker_stop_timeout' seconds.
+        With multiple workers, start() always blocks until the director is stopped, and greenlets spawned before it are inherited by every worker
+        """
         gsignal(signal.SIGINT, self.stop)
         gsignal(signal.SIGTERM, self.stop)
 
         self.name = name
         self.actors = {}
         self.size = size
+        if isinstance(log_level, basestring):
+            log_level = getattr(logging, log_level.upper(), logging.NOTSET)
+        self.log_level = log_level or logging.NOTSET
 
         self.log_actor = self.__create_actor(STDOUT, "default_stdout")
         self.error_actor = self.__create_actor(EventLogger, "default_error_logger")
+        self.metrics_actor = None
+        self.metrics_interval = None
+
+        self.workers = workers
+        self.worker_restart_delay = worker_restart_delay
+        self.worker_report_interval = worker_report_interval
+        self.worker_stop_timeout = worker_stop_timeout
+        self.worker_index = None            # Set in worker processes
+        self.worker_metrics = {}
+        self.__worker_pids = {}
+        self.__worker_pipes = {}            # Per worker, the (report, aggregate) pipe ends held by this process
+        self.__aggregate = None
 
         self.__running = False
         self.__block = self._async_class()
@@ -149,12 +184,42 @@ class Director(object):
         self.error_actor = self.__create_actor(actor, name, *args, **kwargs)
         return self.error_actor
 
+    def register_metrics_actor(self, actor, name, interval=60, *args, **kwargs):
+        """Initialize an actor that receives a JSONEvent snapshot of all actor metrics every <interval> seconds"""
+        self.metrics_actor = self.__create_actor(actor, name, *args, **kwargs)
+        self.metrics_interval = interval
+        return self.metrics_actor
+
+    def get_metrics(self):
+        """
+        Returns a snapshot of the metrics of every actor in the director, keyed by actor name.
+        In the supervising process of multiple workers, returns the aggregate of the last metrics reported by each worker
+        """
+        if self.workers > 1 and self.worker_index is None:
+            return aggregate_metrics(self.worker_metrics.values())
+        actors = list(self.actors.itervalues()) + [self.log_actor, self.error_actor]
+        if self.metrics_actor:
+            actors.append(self.metrics_actor)
+        return {actor.name: actor.metrics.snapshot() for actor in actors}
+
+    def __emit_metrics(self, queue):
+        while self.__running:
+            sleep(self.metrics_interval)
+            metrics = self.get_metrics()
+            if self.__aggregate is not None:
+                metrics["workers"] = self.__aggregate
+            queue.put(JSONEvent(data=metrics))
+
     def __create_actor(self, actor, name, *args, **kwargs):
         return actor(name, size=self.size, *args, **kwargs)
 
     def _setup_default_connections(self):
         '''Connect all log, metric, and error queues to their respective actors'''
 
+        for actor in self.actors.values() + [self.log_actor, self.error_actor, self.metrics_actor]:
+            if actor:
+                actor.logger.level = self.log_level
+
         for actor in self.actors.itervalues():
             if self.error_actor:
                 try:
@@ -168,33 +233,210 @@ class Director(object):
         self.log_actor.connect_log_queue(source_queue_name="logs", destination=self.log_actor, check_existing=False)
         self.error_actor.connect_log_queue(source_queue_name="logs", destination=self.log_actor, check_existing=False)
 
+        if self.metrics_actor:
+            self.metrics_actor.connect_log_queue(source_queue_name="logs", destination=self.log_actor, check_existing=False)
+
     def is_running(self):
         return self.__running
 
     def start(self, block=True):
-        '''Starts all registered actors.'''
+        '''Starts all registered actors, or the worker processes that run them'''
         self.__running = True
         self._setup_default_connections()
 
+        if self.workers > 1:
+            self.__start_workers()
+            return
+
+        self.__start_actors()
+
+        if block:
+            self.block()
+
+    def __start_actors(self):
         for actor in self.actors.itervalues():
             actor.start()
 
         self.log_actor.start()
         self.error_actor.start()
 
-        if block:
-            self.block()
+        if self.metrics_actor:
+            metrics_queue = Queue("metrics")
+            self.metrics_actor.register_consumer("metrics", metrics_queue)
+            self.metrics_actor.start()
+            spawn(self.__emit_metrics, metrics_queue)
+
+    def __start_workers(self):
+        for actor in self.actors.values() + [self.log_actor, self.error_actor, self.metrics_actor]:
+            pre_fork = getattr(actor, "pre_fork", None)
+            if pre_fork:
+                pre_fork()
+
+        for index in xrange(self.workers):
+            self.__fork_worker(index)
+        self.__supervise()
+
+    def __fork_worker(self, index):
+        report_read, report_write = os.pipe()
+        aggregate_read, aggregate_write = os.pipe()
+        pid = fork()
+        if pid == 0:
+            status = 0
+            try:
+                os.close(report_read)
+                os.close(aggregate_write)
+                for pipes in self.__worker_pipes.itervalues():
+                    for fd in pipes:
+                        os.close(fd)
+                self.__run_worker(index=index, report_fd=report_write, aggregate_fd=aggregate_read)
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                # The worker never returns into the code that started the director
+                os._exit(status)
+
+        os.close(report_write)
+        os.close(aggregate_read)
+        gevent.os.make_nonblocking(report_read)
+        gevent.os.make_nonblocking(aggregate_write)
+        self.__worker_pids[index] = pid
+        self.__worker_pipes[index] = (report_read, aggregate_write)
+
+    def __run_worker(self, index, report_fd, aggregate_fd):
+        self.worker_index = index
+        self.__worker_pids = {}
+        self.__worker_pipes = {}
+        gevent.os.make_nonblocking(report_fd)
+        gevent.os.make_nonblocking(aggregate_fd)
+        self.__start_actors()
+        spawn(self.__report_metrics, report_fd)
+        if index == 0:
+            spawn(self.__receive_aggregate, aggregate_fd)
+        self.block()
+
+    def __report_metrics(self, fd):
+        while self.__running:
+            sleep(self.worker_report_interval)
+            report = json.dumps(self.get_metrics()) + "\n"
+            while report:
+                report = report[gevent.os.nb_write(fd, report):]
+
+    def __receive_aggregate(self, fd):
+        buffered = ""
+        while self.__running:
+            data = gevent.os.nb_read(fd, 65536)
+            if not data:
+                break
+            lines = (buffered + data).split("\n")
+            buffered = lines.pop()
+            try:
+                self.__aggregate = json.loads(lines[-1]) if lines else self.__aggregate
+            except ValueError:
+                # A report that did not fit the pipe at once may have been cut short
+                pass
+
+    def __supervise(self):
+        waitpid = getattr(gevent.os, "waitpid", os.waitpid)
+        buffers = {}
+        while self.__running:
+            self.__read_reports(buffers=buffers, timeout=1)
+            for index, pid in self.__worker_pids.items():
+                try:
+                    exited = waitpid(pid, os.WNOHANG)[0]
+                except OSError:
+                    exited = pid
+                if exited and self.__running:
+                    self.__close_worker(index)
+                    buffers.pop(index, None)
+                    sleep(self.worker_restart_delay)
+                    if self.__running:
+                        self.__fork_worker(index)
+
+        self.__stop_workers(waitpid=waitpid)
+
+    def __read_reports(self, buffers, timeout):
+        fds = {pipes[0]: index for index, pipes in self.__worker_pipes.iteritems()}
+        if not fds:
+            sleep(timeout)
+            return
+
+        readable = select(fds.keys(), [], [], timeout)[0]
+        for fd in readable:
+            index = fds[fd]
+            try:
+                data = os.read(fd, 65536)
+            except OSError as err:
+                if err.errno == errno.EAGAIN:
+                    continue
+                raise
+            lines = (buffers.get(index, "") + data).split("\n")
+            buffers[index] = lines.pop()
+            if lines:
+                try:
+                    self.worker_metrics[index] = json.loads(lines[-1])
+                except ValueError:
+                    # The last complete report of the worker is kept
+                    pass
+
+        if readable:
+            aggregate = json.dumps(self.get_metrics()) + "\n"
+            try:
+                os.write(self.__worker_pipes[0][1], aggregate)
+            except (KeyError, OSError):
+                pass
+
+    def __close_worker(self, index):
+        self.__worker_pids.pop(index, None)
+        for fd in self.__worker_pipes.pop(index, ()):
+            os.close(fd)
+
+    def __stop_workers(self, waitpid):
+        for pid in self.__worker_pids.itervalues():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+        waited = 0
+        while self.__worker_pids and waited < self.worker_stop_timeout:
+            for index, pid in self.__worker_pids.items():
+                try:
+                    exited = waitpid(pid, os.WNOHANG)[0]
+                except OSError:
+                    exited = pid
+                if exited:
+                    self.__close_worker(index)
+            sleep(0.1)
+            waited += 0.1
+
+        for index, pid in self.__worker_pids.items():
+            try:
+                os.kill(pid, signal.SIGKILL)
+                waitpid(pid, 0)
+            except OSError:
+                pass
+            self.__close_worker(index)
 
     def block(self):
         '''Blocks until stop() is called.'''
         self.__block.wait()
 
     def stop(self):
-        '''Stops all input actors.'''
+        '''Stops all input actors, or the worker processes that run them.'''
+
+        if self.workers > 1 and self.worker_index is None:
+            # The supervisor stops the workers once it notices the director is no longer running
+            self.__running = False
+            self.__block.set()
+            return
 
         for actor in self.actors.itervalues():
             actor.stop()
 
+        if self.metrics_actor:
+            self.metrics_actor.stop()
+
         self.log_actor.stop()
         self.__running = False
         self.__block.set()
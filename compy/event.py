@@ -1,11 +1,14 @@
 #!/usr/bin/env python
 
 
+import os
 import traceback
 import collections
+from itertools import count
 from uuid import uuid4 as uuid
 from copy import deepcopy
 from datetime import datetime
+from time import time, mktime
 
 from compy.errors import (ResourceNotModified, MalformedEventData, InvalidEventDataModification, InvalidEventModification,
     ForbiddenEvent, ResourceNotFound, EventCommandNotAllowed, ActorTimeout, ResourceConflict, ResourceGone,
@@ -79,16 +82,69 @@ HTTPStatuses = {
     508: "Loop Detected",
 }
 
+class _EventIdGenerator(object):
+    """
+    Generates 32 character hex event IDs from a random per-process prefix and a counter, which is far cheaper than a uuid4 per event.
+    The prefix is regenerated in forked processes
+    """
+
+    def __init__(self):
+        self.pid = None
+
+    def next(self):
+        pid = os.getpid()
+        if pid != self.pid:
+            self.pid = pid
+            self.prefix = uuid().get_hex()[:20]
+            self.counter = count()
+        return "{0}{1:012x}".format(self.prefix, next(self.counter))
+
+_event_ids = _EventIdGenerator()
+
+# Attributes used internally to store the data payload, which are excluded from an event's properties and serialized state
+_DATA_ATTRIBUTES = ("data", "_data", "_data_value", "_data_share", "_data_string", "_data_pending", "_lazy_data")
+
+class _SharedData(object):
+    """
+    A data payload that is shared between several forked events. Every holder claims the payload before it is used. All but the
+    final claimant receive a private deepcopy, so the original payload is never copied more than necessary and is only ever handed
+    to a single holder
+    """
+
+    def __init__(self, data, holders):
+        self.data = data
+        self.holders = holders
+
+    def acquire(self):
+        self.holders -= 1
+        if self.holders > 0:
+            return deepcopy(self.data)
+        return self.data
+
+    def release(self):
+        self.holders -= 1
+
 class _BaseEvent(object):
 
-    def __init__(self, meta_id=None, data=None, service=None, *args, **kwargs):
+    _lazy_data = False
+
+    def __init__(self, meta_id=None, data=None, service=None, lazy_data=False, *args, **kwargs):
+        """
+        With 'lazy_data', raw string data is stored as is and only parsed when the data is first accessed. Malformed data is then
+        reported on that access rather than on assignment
+        """
         self.service = service
-        self.event_id = uuid().get_hex()
+        self.event_id = _event_ids.next()
         self.meta_id = meta_id if meta_id else self.event_id
+        self._lazy_data = lazy_data
         self._data = None
         self.data = data
         self.error = None
-        self.created = datetime.now()
+        created = kwargs.pop("created", None)
+        if created is None:
+            self._created = time()
+        else:
+            self.created = created
         self.__dict__.update(kwargs)
 
     def set(self, key, value):
@@ -120,6 +176,9 @@ class _BaseEvent(object):
 
     @data.setter
     def data(self, data):
+        if self._lazy_data and isinstance(data, self._raw_data_types):
+            self._defer_data(data)
+            return
         try:
             self._data = self.conversion_methods[data.__class__](data)
         except KeyError:
@@ -129,6 +188,14 @@ class _BaseEvent(object):
         except Exception as err:
             raise InvalidEventDataModification("Unknown error occurred on modification: {err}".format(err=err))
 
+    @property
+    def created(self):
+        return datetime.fromtimestamp(self._created)
+
+    @created.setter
+    def created(self, created):
+        self._created = mktime(created.timetuple()) + created.microsecond / 1000000.0
+
     @property
     def event_id(self):
         return self._event_id
@@ -140,15 +207,101 @@ class _BaseEvent(object):
         else:
             self._event_id = event_id
 
+    @property
+    def _data(self):
+        """
+        Direct access to the converted data payload. As the caller may modify the payload in place, any raw string data is discarded
+        """
+        self._decode_data()
+        self.__dict__.pop("_data_string", None)
+        self._claim_data()
+        return self.__dict__.get("_data_value", None)
+
+    @_data.setter
+    def _data(self, data):
+        self.__dict__.pop("_data_string", None)
+        self.__dict__.pop("_data_pending", None)
+        share = self.__dict__.pop("_data_share", None)
+        if share is not None:
+            share.release()
+        self._data_value = data
+
+    def _peek_data(self):
+        """
+        Read-only access to the data payload that neither claims a shared payload nor discards raw string data
+        """
+        self._decode_data()
+        share = self.__dict__.get("_data_share", None)
+        if share is not None:
+            return share.data
+        return self.__dict__.get("_data_value", None)
+
+    def raw_data(self):
+        """
+        Returns the raw string data of an event created with 'lazy_data' while it has not been parsed yet, otherwise None
+        """
+        if self.__dict__.get("_data_pending", False):
+            return self._data_string
+        return None
+
+    def _defer_data(self, raw):
+        self._data = None
+        del self.__dict__["_data_value"]
+        self._data_string = raw
+        self._data_pending = True
+
+    def _decode_data(self):
+        """
+        Materializes deferred data on first access
+        """
+        if self.__dict__.get("_data_pending", False):
+            try:
+                self.__dict__["_data_value"] = self.conversion_methods[self._data_string.__class__](self._data_string)
+            except Exception as err:
+                raise InvalidEventDataModification("Malformed data: {err}".format(err=err))
+            del self.__dict__["_data_pending"]
+
+    def _claim_data(self):
+        share = self.__dict__.pop("_data_share", None)
+        if share is not None:
+            self._data_value = share.acquire()
+
+    def fork(self, copies=1):
+        """
+        Returns 'copies' new events that are independent copies of this event. The attribute layer of each copy is duplicated immediately,
+        but the data payload is shared between all of them (this event included) and only copied when a holder first accesses it
+        """
+        self._claim_data()
+        share = None
+        if not self.__dict__.get("_data_pending", False):
+            # Undecoded raw data is immutable, and is carried over to the forks as is
+            share = _SharedData(data=self.__dict__.pop("_data_value", None), holders=copies + 1)
+            self._data_share = share
+        state = {k: v for k, v in self.__dict__.iteritems() if k != "_data_share"}
+        forks = []
+        for _ in xrange(copies):
+            new_event = self.__class__.__new__(self.__class__)
+            new_event.__dict__ = deepcopy(state)
+            if share is not None:
+                new_event._data_share = share
+            forks.append(new_event)
+        return forks
+
     def get_properties(self):
-        return {k: v for k, v in self.__dict__.iteritems() if k != "data" and k != "_data"}
+        properties = {k: v for k, v in self.__dict__.iteritems() if k not in _DATA_ATTRIBUTES and k != "_created"}
+        properties["created"] = self.created
+        return properties
 
     def __getstate__(self):
         return self._get_state()
 
     def __setstate__(self, state):
+        data = state.pop('_data', None)
+        created = state.pop('created', None)
         self.__dict__ = state
-        self.data = state.get('_data', None)
+        if created is not None:
+            self.created = created
+        self.data = data
         self.error = state.get('_error', None)
 
     def __str__(self):
@@ -169,26 +322,70 @@ class _BaseEvent(object):
         return deepcopy(self)
 
 class _BaseLogEvent(_BaseEvent):
-    def __init__(self, level, origin_actor, message, id=None, *args, **kwargs):
+    def __init__(self, level, origin_actor, message, id=None, message_kwargs=None, *args, **kwargs):
         super(_BaseLogEvent, self).__init__(*args, **kwargs)
         self.id = id
         self.level = level
-        self.time = datetime.now().strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
         self.origin_actor = origin_actor
         self.message = message
-        self.data = {
-            "id":              self.id,
-            "level":            self.level,
-            "time":             self.time,
-            "origin_actor":     self.origin_actor,
-            "message":          self.message
-        }
+        if message_kwargs:
+            self._message_kwargs = message_kwargs
+        # The message, time string and data dict are only built when they are first accessed
+        self._data_pending = True
+
+    @property
+    def message(self):
+        message_kwargs = self.__dict__.pop("_message_kwargs", None)
+        if message_kwargs:
+            try:
+                self._message = self._message.format(**message_kwargs)
+            except (KeyError, IndexError, ValueError, AttributeError):
+                pass
+        return self._message
+
+    @message.setter
+    def message(self, message):
+        self.__dict__.pop("_message_kwargs", None)
+        self._message = message
+
+    @property
+    def time(self):
+        log_time = self.__dict__.get("_time", None)
+        if log_time is None:
+            log_time = self._time = datetime.fromtimestamp(self._created).strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
+        return log_time
+
+    @time.setter
+    def time(self, log_time):
+        self._time = log_time
+
+    def _decode_data(self):
+        if self.__dict__.pop("_data_pending", False):
+            self.__dict__["_data_value"] = {
+                "id":              self.id,
+                "level":            self.level,
+                "time":             self.time,
+                "origin_actor":     self.origin_actor,
+                "message":          self.message
+            }
 
 class _BaseHttpEvent(_BaseEvent):
     def __init__(self, environment={}, *args, **kwargs):
         self._ensure_environment(environment)
         super(_BaseHttpEvent, self).__init__(*args, **kwargs)
 
+    @property
+    def environment(self):
+        environment = self.__dict__.get("_environment", None)
+        if environment is None:
+            environment = self._environment = self.__recursive_update(self.__default_environment(), self.__dict__.pop("_environment_update", {}))
+        return environment
+
+    @environment.setter
+    def environment(self, environment):
+        self.__dict__.pop("_environment_update", None)
+        self._environment = environment
+
     def __recursive_update(self, d, u):
         for k, v in u.iteritems():
             if isinstance(v, collections.Mapping):
@@ -199,40 +396,52 @@ class _BaseHttpEvent(_BaseEvent):
 
     def _set_service(self, service):
         if service is None:
-            service = self.environment["request"]["url"]["path_args"].get("queue", None)
+            if self.__dict__.get("_environment", None) is None:
+                # Avoid materializing the environment just to look up the queue
+                url = self.__dict__.get("_environment_update", {}).get("request", {}).get("url", {})
+                service = url.get("path_args", {}).get("queue", None)
+            else:
+                service = self.environment["request"]["url"]["path_args"].get("queue", None)
         super(_BaseHttpEvent, self)._set_service(service=service)
 
     def _ensure_environment(self, environment):
-        if self.get("environment", None) is None:
-            self.environment = {
-                "request": {
-                    "headers": {},
-                    "method": None,
-                    "url":{
-                        "scheme": None,
-                        "domain": None,
-                        "query": None,
-                        "path": None,
-                        "path_args": {},
-                        "query_args": {}
-                    }
-                },
-                "response": {
-                    "headers": {},
-                    "status": DEFAULT_STATUS_CODE
-                },
-                "remote": {
-                    "address": None,
-                    "port": None
-                },
-                "server": {
-                    "name": None,
-                    "port": None,
-                    "protocol": None
-                },
-                "accepted_methods": []
-            }
-        self.environment = self.__recursive_update(self.environment, environment)
+        """
+        The default environment is only built, and updated with 'environment', when it is first accessed
+        """
+        if self.__dict__.get("_environment", None) is None:
+            self.__recursive_update(self.__dict__.setdefault("_environment_update", {}), environment)
+        else:
+            self.__recursive_update(self._environment, environment)
+
+    def __default_environment(self):
+        return {
+            "request": {
+                "headers": {},
+                "method": None,
+                "url":{
+                    "scheme": None,
+                    "domain": None,
+                    "query": None,
+                    "path": None,
+                    "path_args": {},
+                    "query_args": {}
+                }
+            },
+            "response": {
+                "headers": {},
+                "status": DEFAULT_STATUS_CODE
+            },
+            "remote": {
+                "address": None,
+                "port": None
+            },
+            "server": {
+                "name": None,
+                "port": None,
+                "protocol": None
+            },
+            "accepted_methods": []
+        }
 
     @property
     def status(self):
@@ -249,6 +458,18 @@ class _BaseHttpEvent(_BaseEvent):
         else:
             self.environment["response"]["status"] = status
 
+    @property
+    def partial(self):
+        """
+        Whether this event carries one part of a streamed response, to be followed by more events for the same request.
+        The response is completed by an event for the request that is not partial
+        """
+        return self.environment["response"].get("partial", False)
+
+    @partial.setter
+    def partial(self, partial):
+        self.environment["response"]["partial"] = partial
+
     def update_headers(self, headers={}, **kwargs):
         self.environment["response"]["headers"].update(headers)
         self.environment["response"]["headers"].update(kwargs)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+
+import errno
+import multiprocessing
+import os
+import signal
+import struct
+import threading
+import traceback
+
+pickle = None
+try:
+    import cPickle as pickle #Python 2
+except ImportError:
+    import _pickle as pickle #Python 3
+
+import gevent
+import gevent.os
+from gevent import fork
+from gevent.monkey import get_original
+from gevent.queue import Queue
+
+from compy.util.cache import LRUCache
+
+__all__ = [
+    "EXECUTORS",
+    "ProcessPool",
+    "WorkerLost",
+    "execute",
+    "compile_once"
+]
+
+EXECUTORS = (None, "thread", "process")
+
+# The amount of processes in the pool of each process, None for the amount of CPUs
+PROCESSES = None
+
+_process_pool = None
+_compiled = threading.local()
+# The pipe ends of the workers of every pool in this process, which no other forked worker should keep open
+_worker_fds = set()
+
+_HEADER = struct.Struct(">Q")
+# gevent may defer closing a descriptor to its loop, which never runs again in a worker
+_close = get_original("os", "close")
+
+class WorkerLost(Exception):
+    '''Raised when a process of a ProcessPool exits before it returned the result of a call'''
+    pass
+
+class ProcessPool(object):
+    """
+    **A pool of forked processes that run picklable functions for greenlets**
+
+    The standard multiprocessing.Pool relies on threads and locks that deadlock once gevent has monkey patched them. Instead, each
+    process of this pool serves calls one at a time over a pair of pipes, which the calling greenlet writes and reads through
+    gevent, so that other greenlets keep running while it waits. Processes that exit are replaced on the next call.
+
+    The processes are forked on first use, so they run a copy of the calling process. They only ever run the functions they are
+    sent, and never the greenlets of that copy.
+
+    Parameters:
+        size (Optional[int]):
+            | The amount of processes. None for the amount of CPUs
+            | Default: None
+    """
+
+    def __init__(self, size=None):
+        self.size = size or multiprocessing.cpu_count()
+        self.pid = os.getpid()
+        self.workers = {}
+        self.idle = Queue()
+
+    def apply(self, function, args=(), kwargs={}):
+        '''Runs function(*args, **kwargs) in one of the processes, and cooperatively waits for its result'''
+        request = pickle.dumps((function, args, kwargs), -1)
+        self.__start_workers()
+        worker = self.idle.get()
+        try:
+            _write_message(worker[1], request, gevent.os.nb_write)
+            response = _read_message(worker[2], gevent.os.nb_read)
+        except BaseException:
+            # The worker may be left halfway through a message, so it is never reused
+            self.__close_worker(worker)
+            raise
+        if response is None:
+            self.__close_worker(worker)
+            raise WorkerLost("The executor process {0} exited while running {1}".format(worker[0], function))
+
+        self.idle.put(worker)
+        succeeded, result = pickle.loads(response)
+        if not succeeded:
+            raise result
+        return result
+
+    def close(self):
+        '''Closes the pipes to the processes, which makes them exit, and waits for them'''
+        while not self.idle.empty():
+            self.__close_worker(self.idle.get())
+
+    def __start_workers(self):
+        while len(self.workers) < self.size:
+            worker = self.__fork_worker()
+            self.workers[worker[0]] = worker
+            self.idle.put(worker)
+
+    def __fork_worker(self):
+        request_read, request_write = os.pipe()
+        response_read, response_write = os.pipe()
+        pid = fork()
+        if pid == 0:
+            status = 0
+            try:
+                _close(request_write)
+                _close(response_read)
+                for fd in _worker_fds:
+                    _close(fd)
+                _worker_fds.clear()
+                _serve(request_read, response_write)
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                os._exit(status)
+
+        os.close(request_read)
+        os.close(response_write)
+        gevent.os.make_nonblocking(request_write)
+        gevent.os.make_nonblocking(response_read)
+        _worker_fds.update((request_write, response_read))
+        return (pid, request_write, response_read)
+
+    def __close_worker(self, worker):
+        self.workers.pop(worker[0], None)
+        for fd in worker[1:]:
+            _worker_fds.discard(fd)
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        gevent.spawn(_reap, worker[0])
+
+def _reap(pid):
+    waitpid = getattr(gevent.os, "waitpid", os.waitpid)
+    try:
+        waitpid(pid, 0)
+    except OSError:
+        pass
+
+def _serve(request_fd, response_fd):
+    # Interrupts are left to the parent, which ends this process by closing its pipes
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # A plain blocking loop, so that the greenlets copied from the parent never get to run in this process
+    while True:
+        request = _read_message(request_fd, os.read)
+        if request is None:
+            return
+        try:
+            function, args, kwargs = pickle.loads(request)
+            response = (True, function(*args, **kwargs))
+        except Exception as error:
+            response = (False, error)
+        try:
+            response = pickle.dumps(response, -1)
+        except Exception:
+            response = pickle.dumps((False, RuntimeError(traceback.format_exc())), -1)
+        _write_message(response_fd, response, os.write)
+
+def _write_message(fd, message, write):
+    data = _HEADER.pack(len(message)) + message
+    while data:
+        data = data[write(fd, data):]
+
+def _read_message(fd, read):
+    '''Returns the next message on 'fd', or None once the other end is closed'''
+    header = _read_exactly(fd, _HEADER.size, read)
+    if header is None:
+        return None
+    return _read_exactly(fd, _HEADER.unpack(header)[0], read)
+
+def _read_exactly(fd, size, read):
+    chunks = []
+    while size > 0:
+        try:
+            chunk = read(fd, min(size, 1048576))
+        except OSError as err:
+            if err.errno == errno.EINTR:
+                continue
+            raise
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def _get_process_pool():
+    '''The process pool is created on first use, and again in processes forked after it was created'''
+    global _process_pool
+    if _process_pool is None or _process_pool.pid != os.getpid():
+        _process_pool = ProcessPool(size=PROCESSES)
+    return _process_pool
+
+def execute(executor, function, *args, **kwargs):
+    """
+    Runs 'function' in the given executor and cooperatively waits for its result, so that other greenlets keep running meanwhile.
+    With the "process" executor, the function, arguments and result must be picklable
+    """
+    if executor is None:
+        return function(*args, **kwargs)
+    elif executor == "thread":
+        return gevent.get_hub().threadpool.apply(function, args, kwargs)
+    elif executor == "process":
+        return _get_process_pool().apply(function, args, kwargs)
+
+    raise ValueError("Unknown executor '{0}'. Expected one of {1}".format(executor, EXECUTORS))
+
+def compile_once(key, compile, *args, **kwargs):
+    """
+    Returns the result of 'compile' for 'key', which is only called the first time 'key' is used by the current thread.
+    Used by functions run in an executor to compile templates and schemas once per worker, rather than for every call
+    """
+    cache = getattr(_compiled, "cache", None)
+    if cache is None:
+        cache = _compiled.cache = LRUCache(maxsize=64)
+    compiled = cache.get(key)
+    if compiled is None:
+        compiled = compile(*args, **kwargs)
+        cache.set(key, compiled)
+    return compiled
@@ -18,53 +18,73 @@ class Logger(object):
             | The name to use when sending log events
         - queue_pool(_InternalQueuePool):
             | The pool to use when sending log events
+        - level(Optional[int]):
+            | The minimum level of the messages that are sent. Messages below it are discarded before a log event is created.
+            | This is usually set by the Director for all of its actors
+            | Default: logging.NOTSET
     """
 
-    def __init__(self, name, queue_pool):
+    def __init__(self, name, queue_pool, level=logging.NOTSET):
         self.name = name
+        self.level = level
         if not isinstance(queue_pool, _InternalQueuePool):
             raise TypeError("Logger queue_pool must be of type '_InternalQueuePool'")
 
         self.__pool = queue_pool
 
-    def log(self, level, message, event=None, log_entry_id=None):
+    def is_enabled_for(self, level):
+        """Whether a message of 'level' would be sent. Useful to skip building expensive message arguments"""
+        return level >= self.level
+
+    def log(self, level, message, event=None, log_entry_id=None, **kwargs):
         """
         Uses log_entry_id explicitely as the logged ID, if defined. Otherwise, will attempt to ascertain the ID from 'event', if passed
+
+        Any additional keyword arguments are used to format 'message' with str.format. Formatting is deferred until the log entry is
+        consumed, so the arguments should be values that are not modified afterwards
         """
+        if level < self.level:
+            return
+
         if not log_entry_id:
             if event:
                 log_entry_id = event.meta_id
 
-        for key in self.__pool.iterkeys():
+        queues = list(self.__pool.itervalues())
+        if len(queues) == 0:
+            return
+
+        log_event = LogEvent(level, self.name, message, id=log_entry_id, message_kwargs=kwargs)
+        log_events = [log_event] + log_event.fork(copies=len(queues) - 1) if len(queues) > 1 else [log_event]
+        for queue, log_event in zip(queues, log_events):
             try:
-                log_event = LogEvent(level, self.name, message, id=log_entry_id)
-                self.__pool[key].put(log_event)
+                queue.put(log_event)
             except QueueFull:
-                self.__pool.wait_until_free()
-                self.__pool[key].put(log_event)
+                queue.wait_until_free()
+                queue.put(log_event)
 
-    def critical(self, message, event=None, log_entry_id=None):
+    def critical(self, message, event=None, log_entry_id=None, **kwargs):
         """Generates a log message with priority logging.CRITICAL
         """
-        self.log(logging.CRITICAL, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.CRITICAL, message, event=event, log_entry_id=log_entry_id, **kwargs)
 
-    def error(self, message, event=None, log_entry_id=None):
+    def error(self, message, event=None, log_entry_id=None, **kwargs):
         """Generates a log message with priority error(3).
         """
-        self.log(logging.ERROR, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.ERROR, message, event=event, log_entry_id=log_entry_id, **kwargs)
 
-    def warn(self, message, event=None, log_entry_id=None):
+    def warn(self, message, event=None, log_entry_id=None, **kwargs):
         """Generates a log message with priority logging.WARN
         """
-        self.log(logging.WARN, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.WARN, message, event=event, log_entry_id=log_entry_id, **kwargs)
     warning=warn
 
-    def info(self, message, event=None, log_entry_id=None):
+    def info(self, message, event=None, log_entry_id=None, **kwargs):
         """Generates a log message with priority logging.INFO.
         """
-        self.log(logging.INFO, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.INFO, message, event=event, log_entry_id=log_entry_id, **kwargs)
 
-    def debug(self, message, event=None, log_entry_id=None):
+    def debug(self, message, event=None, log_entry_id=None, **kwargs):
         """Generates a log message with priority logging.DEBUG
         """
-        self.log(logging.DEBUG, message, event=event, log_entry_id=log_entry_id)
\ No newline at end of file
+        self.log(logging.DEBUG, message, event=event, log_entry_id=log_entry_id, **kwargs)
\ No newline at end of file
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+from collections import deque
+from time import time
+
+__all__ = [
+    "LatencyHistogram",
+    "ActorMetrics",
+    "aggregate_metrics"
+]
+
+class LatencyHistogram(object):
+    """
+    **Tracks latency samples and reports percentiles over the most recent samples**
+
+    Parameters:
+        size (Optional[int]):
+            | The amount of most recent samples that percentiles are calculated from
+            | Default: 1024
+    """
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, size=1024):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent, samples=None):
+        if samples is None:
+            samples = sorted(self.samples)
+        if len(samples) == 0:
+            return 0.0
+        index = int(round(percent / 100.0 * (len(samples) - 1)))
+        return samples[index]
+
+    def snapshot(self):
+        samples = sorted(self.samples)
+        snapshot = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max
+        }
+        for percent in self.PERCENTILES:
+            snapshot["p{0}".format(percent)] = self.percentile(percent, samples=samples)
+        return snapshot
+
+
+class ActorMetrics(object):
+    """
+    **Throughput, latency and concurrency counters for a single actor**
+
+    Latencies are recorded in milliseconds. Counters are cumulative from the creation of the actor.
+
+    Parameters:
+        actor (Actor):
+            | The actor these metrics are collected for
+    """
+
+    def __init__(self, actor):
+        self.actor = actor
+        self.created = time()
+        self.consumed = 0
+        self.errors = 0
+        self.sent = 0
+        self.consume_latency = LatencyHistogram()
+
+    def record_consume(self, seconds, count=1):
+        self.consumed += count
+        self.consume_latency.record(seconds * 1000)
+
+    def record_error(self, count=1):
+        self.errors += count
+
+    def record_send(self, count=1):
+        self.sent += count
+
+    def snapshot(self):
+        uptime = max(time() - self.created, 0.001)
+        return {
+            "consumed": self.consumed,
+            "consumed_per_second": self.consumed / uptime,
+            "errors": self.errors,
+            "sent": self.sent,
+            "consume_latency_ms": self.consume_latency.snapshot(),
+            "in_flight": self.actor.in_flight,
+            "greenlets": len(self.actor.threads) + len(self.actor.workers),
+            "inbound_queues": {name: queue.snapshot() for name, queue in self.actor.pool.inbound.iteritems()}
+        }
+
+
+def aggregate_metrics(snapshots):
+    """
+    Combines the metrics snapshots of several processes running the same actors into one. Counters are summed and means are weighted
+    by their counts. Maximums and percentiles are the highest of any process, which is an upper bound of the combined percentile
+    """
+    aggregate = {}
+    for snapshot in snapshots:
+        _merge_snapshot(aggregate, snapshot)
+    return aggregate
+
+_MAXIMUM_KEYS = frozenset(["max", "high_water_mark"] + ["p{0}".format(percent) for percent in LatencyHistogram.PERCENTILES])
+
+def _merge_snapshot(aggregate, snapshot):
+    if "mean" in snapshot and "count" in aggregate:
+        count = aggregate["count"] + snapshot["count"]
+        aggregate["mean"] = (aggregate["mean"] * aggregate["count"] + snapshot["mean"] * snapshot["count"]) / count if count else 0.0
+
+    for key, value in snapshot.iteritems():
+        if isinstance(value, dict):
+            _merge_snapshot(aggregate.setdefault(key, {}), value)
+        elif key not in aggregate:
+            aggregate[key] = value
+        elif key in _MAXIMUM_KEYS:
+            aggregate[key] = max(aggregate[key], value)
+        elif key != "mean" and isinstance(value, (int, long, float)):
+            aggregate[key] += value
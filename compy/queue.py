@@ -3,7 +3,6 @@
 import gevent.queue as gqueue
 
 from uuid import uuid4 as uuid
-from gevent import sleep
 from gevent.hub import LoopExit
 from gevent.event import Event
 
@@ -21,18 +20,22 @@ class _InternalQueuePool(dict):
         size (Optional[int]):
             | The maxsize of each queue in this pool. A value of 0 represents an unlimited size
             | Default: 0
+        queue_class (Optional[class]):
+            | The class of the queues created by this pool
+            | Default: Queue
     """
 
-    def __init__(self, placeholder=None, size=0, *args, **kwargs):
+    def __init__(self, placeholder=None, size=0, queue_class=None, *args, **kwargs):
         self.__size = size
+        self.__queue_class = queue_class or Queue
         self.placeholder = placeholder
         super(_InternalQueuePool, self).__init__(*args, **kwargs)
         if self.placeholder:
-            self[self.placeholder] = Queue(self.placeholder, maxsize=size)
+            self[self.placeholder] = self.__queue_class(self.placeholder, maxsize=size)
 
     def add(self, name, queue=None):
         if not queue:
-            queue = Queue(name, maxsize=self.__size)
+            queue = self.__queue_class(name, maxsize=self.__size)
 
         if self.placeholder:
             if self.get(self.placeholder, None):
@@ -50,7 +53,7 @@ class QueuePool(object):
         self.inbound = _InternalQueuePool(size=size)
         self.outbound = _InternalQueuePool(size=size)
         self.error = _InternalQueuePool(size=size)
-        self.logs = _InternalQueuePool(size=size, placeholder=uuid().get_hex())
+        self.logs = _InternalQueuePool(size=size, placeholder=uuid().get_hex(), queue_class=RingQueue)
 
     @property
     def size(self):
@@ -81,6 +84,13 @@ class Queue(gqueue.Queue):
         self.name = name
         self.__has_content = Event()
         self.__has_content.clear()
+        self.__is_empty = Event()
+        self.__is_empty.set()
+        self.__has_free = Event()
+        self.__has_free.set()
+        self.puts = 0
+        self.gets = 0
+        self.high_water_mark = 0
 
     def get(self, block=False, *args, **kwargs):
         '''Gets an element from the queue.'''
@@ -89,10 +99,14 @@ class Queue(gqueue.Queue):
             element = super(Queue, self).get(block=block, *args, **kwargs)
         except gqueue.Empty:
             self.__has_content.clear()
+            self.__is_empty.set()
             raise QueueEmpty("Queue {0} has no waiting events".format(self.name))
 
+        self.gets += 1
         if self.qsize() == 0:
             self.__has_content.clear()
+            self.__is_empty.set()
+        self.__has_free.set()
 
         return element
 
@@ -100,11 +114,28 @@ class Queue(gqueue.Queue):
         '''Puts element in queue.'''
         try:
             super(Queue, self).put(element, *args, **kwargs)
+            self.puts += 1
+            size = self.qsize()
+            if size > self.high_water_mark:
+                self.high_water_mark = size
             self.__has_content.set()
+            self.__is_empty.clear()
+            if self.full():
+                self.__has_free.clear()
         except gqueue.Full:
             #only if block = False or (block = True and timeout not None)
+            self.__has_free.clear()
             raise QueueFull(message="Queue {0} is full".format(self.name), queue=self)
 
+    def snapshot(self):
+        '''Returns the current depth and cumulative counters of this queue'''
+        return {
+            "depth": self.qsize(),
+            "high_water_mark": self.high_water_mark,
+            "puts": self.puts,
+            "gets": self.gets
+        }
+
     def wait_until_content(self):
         '''Blocks until at least 1 slot is taken.'''
         self.__has_content.wait()
@@ -112,14 +143,14 @@ class Queue(gqueue.Queue):
     def wait_until_empty(self):
         '''Blocks until the queue is completely empty.'''
 
-        while not self.__has_content.is_set():
-            sleep(0)
+        while self.qsize() > 0:
+            self.__is_empty.wait()
 
     def wait_until_free(self):
         '''Blocks until the queue has at lease 1 free slot.'''
 
-        while self.qsize() >= self.maxsize:
-            sleep(0)
+        while self.full():
+            self.__has_free.wait()
             
     def dump(self, other_queue):
         """**Dump all items on this queue to another queue**"""
@@ -129,3 +160,33 @@ class Queue(gqueue.Queue):
         except (gqueue.Full, Exception):
             pass
 
+
+class RingQueue(Queue):
+
+    '''A bounded Queue that discards its oldest element instead of blocking or raising when an element is put while it is full.
+    Used for log channels, where a slow log consumer should never stall the actors producing the entries
+
+    Parameters:
+
+        name (str):
+            | The name of this queue
+        maxsize (Optional[int]):
+            | The amount of elements retained. A value of 0 or None represents an unlimited size, which never discards
+            | Default: None
+    '''
+
+    def __init__(self, name, *args, **kwargs):
+        super(RingQueue, self).__init__(name, *args, **kwargs)
+        self.dropped = 0
+
+    def put(self, element, *args, **kwargs):
+        '''Puts element in queue, discarding the oldest element if the queue is full.'''
+        while self.full():
+            gqueue.Queue.get(self, block=False)
+            self.dropped += 1
+        super(RingQueue, self).put(element, *args, **kwargs)
+
+    def snapshot(self):
+        snapshot = super(RingQueue, self).snapshot()
+        snapshot["dropped"] = self.dropped
+        return snapshot
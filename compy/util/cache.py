@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+
+import re
+
+from collections import OrderedDict
+from gevent.event import AsyncResult
+from time import time
+
+__all__ = [
+    "LRUCache",
+    "TTLCache",
+    "RegexCache",
+    "SingleFlight",
+    "regexes"
+]
+
+class LRUCache(object):
+    """
+    **A bounded mapping that evicts its least recently used entries once it is full**
+
+    Parameters:
+        maxsize (Optional[int]):
+            | The maximum amount of entries retained
+            | Default: 256
+        maxbytes (Optional[int]):
+            | The maximum combined size of the entries retained, as provided when each entry is set. None for no limit
+            | Default: None
+    """
+
+    def __init__(self, maxsize=256, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__sizes = {}
+
+    def get(self, key, default=None):
+        try:
+            value = self.__entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.__entries[key] = value
+        self.hits += 1
+        return value
+
+    def set(self, key, value, size=0):
+        self.pop(key)
+        self.__entries[key] = value
+        if size:
+            self.__sizes[key] = size
+            self.bytes += size
+        while len(self.__entries) > self.maxsize or (self.maxbytes is not None and self.bytes > self.maxbytes):
+            self.pop(next(iter(self.__entries)))
+
+    def pop(self, key, default=None):
+        self.bytes -= self.__sizes.pop(key, 0)
+        return self.__entries.pop(key, default)
+
+    def clear(self):
+        self.__entries.clear()
+        self.__sizes.clear()
+        self.bytes = 0
+
+    def keys(self):
+        return self.__entries.keys()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+    def snapshot(self):
+        '''Returns the current size and cumulative counters of this cache'''
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.__entries),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": float(self.hits) / lookups if lookups else 0.0
+        }
+
+
+class TTLCache(LRUCache):
+    """
+    **An LRUCache whose entries expire a number of seconds after they were set**
+
+    Expired entries are dropped when they are looked up, or evicted like any other entry once the cache is full
+
+    Parameters:
+        maxsize (Optional[int]):
+            | The maximum amount of entries retained
+            | Default: 256
+        ttl (Optional[float]):
+            | The amount of seconds an entry is valid for, unless overridden when it is set
+            | Default: 60
+        maxbytes (Optional[int]):
+            | The maximum combined size of the entries retained, as provided when each entry is set. None for no limit
+            | Default: None
+    """
+
+    def __init__(self, maxsize=256, ttl=60, maxbytes=None):
+        super(TTLCache, self).__init__(maxsize=maxsize, maxbytes=maxbytes)
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        entry = super(TTLCache, self).get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if expires <= time():
+            self.pop(key)
+            self.hits -= 1
+            self.misses += 1
+            return default
+        return value
+
+    def set(self, key, value, ttl=None, size=0):
+        super(TTLCache, self).set(key, (time() + (self.ttl if ttl is None else ttl), value), size=size)
+
+
+class SingleFlight(object):
+    """
+    **Coalesces concurrent calls made for the same key into a single call**
+
+    Greenlets that call 'do' with a key while a call for that key is in progress wait for it, and receive its result or exception
+    """
+
+    def __init__(self):
+        self.calls = {}
+
+    def do(self, key, function, *args, **kwargs):
+        call = self.calls.get(key)
+        if call is not None:
+            return call.get()
+
+        call = self.calls[key] = AsyncResult()
+        try:
+            result = function(*args, **kwargs)
+        except Exception as err:
+            call.set_exception(err)
+            raise
+        else:
+            call.set(result)
+            return result
+        finally:
+            del self.calls[key]
+
+
+class RegexCache(LRUCache):
+    """
+    **An LRUCache of compiled regular expressions, keyed on the pattern and flags**
+
+    Unlike the module cache of 're', which is discarded entirely once it is full, only the least recently used patterns are evicted
+    """
+
+    def compile(self, pattern, flags=0):
+        key = (pattern, flags)
+        regex = self.get(key)
+        if regex is None:
+            regex = re.compile(pattern, flags)
+            self.set(key, regex)
+        return regex
+
+# Shared by the actors that compile patterns taken from events or database rows at runtime
+regexes = RegexCache(maxsize=1024)
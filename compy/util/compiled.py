@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+import hashlib
+import os
+import re
+
+from compy.util.cache import LRUCache
+
+__all__ = [
+    "CompiledRegistry",
+    "compiled"
+]
+
+class CompiledRegistry(object):
+    """
+    **A process-wide registry of compiled templates, schemas and validators, keyed by the hash of their source**
+
+    Actors that are configured with the same source share a single compiled instance, rather than each compiling their own.
+    Sources can be precompiled from a folder before the actors are created, e.g. before a Director forks its workers, so that
+    the workers inherit the compiled instances instead of compiling them again. Compiled lxml and jsonschema instances can not be
+    serialized, so precompiling warms this in-memory registry at startup rather than storing compiled files on disk.
+
+    Parameters:
+        maxsize (Optional[int]):
+            | The maximum amount of compiled instances retained
+            | Default: 1024
+    """
+
+    def __init__(self, maxsize=1024):
+        self.__entries = LRUCache(maxsize=maxsize)
+
+    @staticmethod
+    def key(kind, source):
+        if isinstance(source, unicode):
+            source = source.encode("utf-8")
+        return (kind, hashlib.sha1(source).hexdigest())
+
+    def get(self, kind, source, compile):
+        '''Returns the compiled instance of 'source', calling 'compile' with 'source' if no other actor has compiled it yet'''
+        key = self.key(kind, source)
+        instance = self.__entries.get(key)
+        if instance is None:
+            instance = compile(source)
+            self.__entries.set(key, instance)
+        return instance
+
+    def precompile(self, kind, folder_path, compile, file_regex=".*", normalize=None):
+        '''
+        Compiles every file below 'folder_path' that matches 'file_regex', and returns the amount of files compiled.
+        'normalize' converts the file contents into the source the actors register, for kinds that are not keyed on the raw text
+        '''
+        count = 0
+        for root, dirs, files in os.walk(folder_path):
+            for file in files:
+                if re.match(file_regex, file):
+                    with open(os.path.join(root, file), 'r') as source_file:
+                        source = source_file.read()
+                    if normalize is not None:
+                        source = normalize(source)
+                    self.get(kind, source, compile)
+                    count += 1
+        return count
+
+    def clear(self):
+        self.__entries.clear()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def snapshot(self):
+        return self.__entries.snapshot()
+
+compiled = CompiledRegistry()
@@ -0,0 +1,99 @@
+import unittest
+
+from compy.actors.database import _Database
+from compy.actors.util.database import parameterize_template, bind_list
+from compy.errors import SetupError
+
+class TestParameterizeTemplate(unittest.TestCase):
+
+    cases = [
+        # (template, literal_params, statement, patterns, list_params)
+        ("SELECT * FROM t WHERE name = '{name}'", (), "SELECT * FROM t WHERE name = %(name)s", {}, set()),
+        ('SELECT * FROM t WHERE name = "{name}"', (), "SELECT * FROM t WHERE name = %(name)s", {}, set()),
+        ("SELECT * FROM t WHERE id = {id}", (), "SELECT * FROM t WHERE id = %(id)s", {}, set()),
+        ("SELECT * FROM t WHERE id >= {id} AND id < {max})", (), "SELECT * FROM t WHERE id >= %(id)s AND id < %(max)s)", {}, set()),
+        ("INSERT INTO t (a, b) VALUES ('{a}', '{b}')", (), "INSERT INTO t (a, b) VALUES (%(a)s, %(b)s)", {}, set()),
+        ("SELECT * FROM t WHERE name LIKE '%{name}%'", (), "SELECT * FROM t WHERE name LIKE %(__pattern_0)s", {"__pattern_0": "%{name}%"}, set()),
+        ("SELECT * FROM t WHERE name = 'pre_{name}'", (), "SELECT * FROM t WHERE name = %(__pattern_0)s", {"__pattern_0": "pre_{name}"}, set()),
+        ("SELECT * FROM t WHERE name = '{first}{last}'", (), "SELECT * FROM t WHERE name = %(__pattern_0)s", {"__pattern_0": "{first}{last}"}, set()),
+        ("SELECT * FROM t WHERE id IN ({ids})", (), "SELECT * FROM t WHERE id IN ({ids})", {}, set(["ids"])),
+        ("SELECT * FROM t WHERE id in ( {ids} )", (), "SELECT * FROM t WHERE id in ( {ids} )", {}, set(["ids"])),
+        ("SELECT * FROM {table}", ("table",), "SELECT * FROM {table}", {}, set()),
+        ("SELECT * FROM t LIMIT {limit}", ("limit",), "SELECT * FROM t LIMIT {limit}", {}, set()),
+        ("SELECT * FROM t WHERE name = '{name}'", ("name",), "SELECT * FROM t WHERE name = '{name}'", {}, set()),
+        ("SELECT * FROM t WHERE name LIKE '%{name}%'", ("name",), "SELECT * FROM t WHERE name LIKE '%%{name}%%'", {}, set()),
+        ("SELECT * FROM t WHERE name = '{name!r}'", (), "SELECT * FROM t WHERE name = %(__pattern_0)s", {"__pattern_0": "{name!r}"}, set()),
+        ("SELECT * FROM t WHERE id = {id:d}", (), "SELECT * FROM t WHERE id = %(__pattern_0)s", {"__pattern_0": "{id:d}"}, set()),
+        ("SELECT 'it''s {x}' FROM t WHERE a = '{a}'", (), "SELECT %(__pattern_0)s FROM t WHERE a = %(a)s", {"__pattern_0": "it's {x}"}, set()),
+        ("SELECT '=' FROM t WHERE a = '{a}' AND b = '= {b}'", (), "SELECT '=' FROM t WHERE a = %(a)s AND b = %(__pattern_0)s", {"__pattern_0": "= {b}"}, set()),
+        ("SELECT '100%', '{{a}}' FROM t WHERE b = {b}", (), "SELECT '100%%', '{{a}}' FROM t WHERE b = %(b)s", {}, set()),
+        ("SELECT {{a}} FROM t WHERE b = {b}", (), "SELECT {{a}} FROM t WHERE b = %(b)s", {}, set())
+    ]
+
+    unbindable = [
+        ("SELECT * FROM {table}", ()),
+        ("SELECT * FROM t LIMIT {limit}", ()),
+        ("SELECT * FROM t WHERE id IN ({ids:d})", ()),
+        ("SELECT * FROM t WHERE id = {id}abc", ()),
+        ("SELECT * FROM t WHERE name = '{first}{last}'", ("first",)),
+        ("SELECT * FROM t WHERE name = '{name}", ())
+    ]
+
+    def test_templates(self):
+        for template, literal_params, statement, patterns, list_params in self.cases:
+            self.assertEqual(parameterize_template(template, literal_params=literal_params), (statement, patterns, list_params), template)
+
+    def test_unbindable_templates_rejected(self):
+        for template, literal_params in self.unbindable:
+            with self.assertRaises(ValueError):
+                parameterize_template(template, literal_params=literal_params)
+
+    def test_bind_list(self):
+        self.assertEqual(bind_list("ids", "1, 2"), ("%(__ids_0)s, %(__ids_1)s", {"__ids_0": "1", "__ids_1": "2"}))
+        self.assertEqual(bind_list("ids", "'a', 'it''s'")[1], {"__ids_0": "a", "__ids_1": "it's"})
+        self.assertEqual(bind_list("ids", [1, 2])[1], {"__ids_0": 1, "__ids_1": 2})
+        self.assertEqual(bind_list("ids", ""), ("%(__ids_0)s", {"__ids_0": None}))
+
+
+class _TestDatabase(_Database):
+
+    def _create_db_pool(self, db_config):
+        return None
+
+
+class TestAssembleQuery(unittest.TestCase):
+
+    def test_pattern_bound(self):
+        template = "SELECT * FROM t WHERE name LIKE '%{name}%'"
+        actor = _TestDatabase("database", query_template=template)
+        query, args = actor._assemble_query(template, {"name": "' OR 1=1 --"})
+        self.assertEqual(query, "SELECT * FROM t WHERE name LIKE %(__pattern_0)s")
+        self.assertEqual(args["__pattern_0"], "%' OR 1=1 --%")
+
+    def test_list_bound_per_value(self):
+        template = "SELECT * FROM t WHERE id IN ({ids}) AND name = '{name}'"
+        actor = _TestDatabase("database", query_template=template)
+        query, args = actor._assemble_query(template, {"ids": "1, 2); DROP TABLE t; --", "name": "bob"})
+        self.assertEqual(query, "SELECT * FROM t WHERE id IN (%(__ids_0)s, %(__ids_1)s) AND name = %(name)s")
+        self.assertEqual((args["__ids_0"], args["__ids_1"], args["name"]), ("1", "2); DROP TABLE t; --", "bob"))
+
+
+class TestStaticParams(unittest.TestCase):
+
+    template = "SELECT * FROM {table} WHERE name = '{name}'"
+
+    def test_static_params_formatted(self):
+        actor = _TestDatabase("database", query_template=self.template, static_params={"table": "t", "name": "bob"})
+        query, args = actor._assemble_query(self.template, {"table": "t", "name": "bob"})
+        self.assertEqual(query, "SELECT * FROM t WHERE name = 'bob'")
+
+    def test_overridden_static_params_bound(self):
+        actor = _TestDatabase("database", query_template=self.template, static_params={"table": "t", "name": "bob"}, literal_params=["table"], override_static=True)
+        query, args = actor._assemble_query(self.template, {"table": "t", "name": "' OR 1=1 --"})
+        self.assertEqual(query, "SELECT * FROM t WHERE name = %(name)s")
+        self.assertEqual(args["name"], "' OR 1=1 --")
+
+    def test_unbindable_overridden_static_param_rejected(self):
+        actor = _TestDatabase("database", query_template=self.template, static_params={"table": "t"}, override_static=True)
+        with self.assertRaises(SetupError):
+            actor.pre_hook()
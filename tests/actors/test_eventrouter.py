@@ -1,6 +1,7 @@
 import unittest
 
-from compy.actors.eventrouter import EventFilter, EventRouter, EventXMLFilter, EventXMLXpathsFilter
+from compy.actors import eventrouter
+from compy.actors.eventrouter import EventFilter, EventRouter, EventXMLFilter, EventXMLXpathsFilter, _DecisionTable
 from compy.errors import QueueEmpty
 from compy.event import Event, XMLEvent
 from compy.testutils.test_actor import TestActorWrapper
@@ -77,6 +78,28 @@ class TestEventRouter(unittest.TestCase):
             self.actor.output
 
 
+class TestDecisionTable(unittest.TestCase):
+
+    def matching(self, value_regexes, data):
+        filters = list(enumerate(EventFilter(value_regexes=regexes) for regexes in value_regexes))
+        return _DecisionTable(("data",), filters).matching(Event(data=data))
+
+    def test_literal_lookup(self):
+        self.assertEqual(self.matching([["^one$"], ["^two$"]], "one"), set([0]))
+        self.assertEqual(self.matching([["^one$"], ["^two$"]], "one\n"), set([0]))
+        self.assertEqual(self.matching([["^one$"], ["^two$"]], "none"), set())
+
+    def test_combined_regexes_report_every_match(self):
+        self.assertEqual(self.matching([["two"], ["twothree"], ["^three"], ["[0-9]+"]], "twothree"), set([0, 1]))
+        self.assertEqual(self.matching([["two"], ["twothree"], ["^three"], ["[0-9]+"]], "three 3"), set([2, 3]))
+
+    def test_unfoldable_regexes(self):
+        self.assertEqual(self.matching([["(?i)ONE"], ["(a)\\1"], ["b"]], "one aa"), set([0, 1]))
+
+    def test_many_regexes(self):
+        self.assertEqual(self.matching([["x{0}y".format(index)] for index in xrange(200)], "x150y"), set([150]))
+
+
 class TestEventXMLFilter(TestEventRouter):
 
     filter_class = EventXMLFilter
@@ -121,3 +144,23 @@ class TestEventXMLXpathsFilter(TestEventRouter):
                         "outbox_names": ["four"]}
 
     cases = [single_outbox_case, multiple_outbox_case, regex_match_case]
+
+    def test_matches_does_not_store_event_regexes(self):
+        filter = self.filter_class(regex_xpath="//foo_regex", xpath="//foo")
+        self.assertTrue(filter.matches(self.event_class(data="<root><foo>one</foo><foo_regex>one</foo_regex></root>")))
+        self.assertEqual(filter.value_regexes, [])
+
+    def test_document_looked_up_once(self):
+        built = []
+        class CountingXPathLookup(eventrouter.XPathLookup):
+            def __init__(self, xml):
+                built.append(xml)
+                super(CountingXPathLookup, self).__init__(xml)
+
+        filter = self.filter_class(regex_xpath="//foo_regex", xpath="//foo", next_filter=self.filter_class(regex_xpath="//foo", xpath="//foo_regex"))
+        eventrouter.XPathLookup = CountingXPathLookup
+        try:
+            self.assertTrue(filter.matches(self.event_class(data="<root><foo>one</foo><foo_regex>one</foo_regex></root>")))
+        finally:
+            eventrouter.XPathLookup = CountingXPathLookup.__bases__[0]
+        self.assertEqual(len(built), 1)
@@ -0,0 +1,65 @@
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+import gevent
+
+from compy.actors.filelogger import FileLogger
+from compy.event import LogEvent
+
+class TestFileLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_log(self, filename):
+        with open(os.path.join(self.directory, filename)) as log_file:
+            return log_file.read().splitlines()
+
+    def test_buffered_flush_on_size(self):
+        actor = FileLogger("buffered_size", default_filename="size.log", directory=self.directory, buffered=True, flush_size=2, flush_interval=60)
+        actor.pre_hook()
+        try:
+            actor.consume(LogEvent(logging.INFO, "actor", "first"))
+            gevent.sleep(0.01)
+            self.assertEqual(self.read_log("size.log"), [])
+            actor.consume(LogEvent(logging.INFO, "actor", "second"))
+            # The flush is signalled to the writer rather than done by the consumer
+            self.assertEqual(self.read_log("size.log"), [])
+            gevent.sleep(0.01)
+            entries = self.read_log("size.log")
+            self.assertEqual(len(entries), 2)
+            self.assertTrue(entries[0].endswith("actor=actor :: first"))
+        finally:
+            actor.threads.kill()
+
+    def test_buffered_entries_written_after_stop(self):
+        actor = FileLogger("buffered_stop", default_filename="stop.log", directory=self.directory, buffered=True, flush_interval=60)
+        actor.pre_hook()
+        actor.consume(LogEvent(logging.INFO, "actor", "before"))
+        actor.stop()
+        self.assertEqual(len(self.read_log("stop.log")), 1)
+        # Consumers drain their queues after the actor stopped
+        actor.consume(LogEvent(logging.INFO, "actor", "drained"))
+        entries = self.read_log("stop.log")
+        self.assertEqual(len(entries), 2)
+        self.assertTrue(entries[1].endswith("actor=actor :: drained"))
+
+    def test_buffered_flush_filters_level(self):
+        actor = FileLogger("buffered_level", default_filename="level.log", directory=self.directory, buffered=True)
+        actor.consume_batch([LogEvent(logging.DEBUG, "actor", "debug"), LogEvent(logging.ERROR, "actor", "error")])
+        actor.flush()
+        entries = self.read_log("level.log")
+        self.assertEqual(len(entries), 1)
+        self.assertTrue(entries[0].endswith("actor=actor :: error"))
+
+    def test_buffered_flush_in_threadpool(self):
+        actor = FileLogger("buffered_thread", default_filename="thread.log", directory=self.directory, buffered=True, use_threadpool=True)
+        actor.consume(LogEvent(logging.INFO, "actor", "threaded"))
+        actor.flush()
+        self.assertEqual(len(self.read_log("thread.log")), 1)
@@ -1,6 +1,8 @@
 import json
 import unittest
 
+from gevent.queue import Queue
+
 #from compy.actors.httpserver import HTTPServer
 from compy.event import JSONHttpEvent, HttpEvent, XMLHttpEvent
 from compy.testutils.test_actor import TestActorWrapper
@@ -80,3 +82,45 @@ class TestHTTPServer(unittest.TestCase):
         self.assertEqual(json.loads(output.body), expected)
 '''
 
+
+
+class TestHTTPServerResponses(unittest.TestCase):
+
+    def setUp(self):
+        from compy.actors.httpserver import HTTPServer
+        self.server = HTTPServer("actor", address="0.0.0.0", port=8123, stream_timeout=0.1)
+
+    def respond(self, event):
+        response_queue = self.server.responders[event.event_id] = Queue()
+        self.server.consume(event)
+        return response_queue.get()
+
+    def test_raw_data_returned_unchanged(self):
+        _input_event = JSONHttpEvent(data='{"a":   1}', lazy_data=True)
+        response = self.respond(_input_event)
+        self.assertEqual(response.body, '{"a":   1}')
+        self.assertEqual(_input_event.raw_data(), '{"a":   1}')
+
+    def test_partial_events_streamed(self):
+        _input_event = HttpEvent(data="quick ")
+        _input_event.partial = True
+        response = self.respond(_input_event)
+        final_event = _input_event.clone()
+        final_event.partial = False
+        final_event.data = "brown fox"
+        self.server.consume(final_event)
+        self.assertEqual("".join(response.body), "quick brown fox")
+        self.assertEqual(self.server.streams, {})
+
+    def test_iterator_streamed(self):
+        _input_event = HttpEvent(data=iter(["quick ", u"brown ", "fox"]))
+        response = self.respond(_input_event)
+        self.assertEqual("".join(response.body), "quick brown fox")
+        self.assertEqual(self.server.streams, {})
+
+    def test_stream_without_final_event_ended(self):
+        _input_event = HttpEvent(data="quick")
+        _input_event.partial = True
+        response = self.respond(_input_event)
+        self.assertEqual("".join(response.body), "quick")
+        self.assertEqual(self.server.streams, {})
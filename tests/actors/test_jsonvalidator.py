@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from compy.actors.jsonvalidator import JSONValidator
+from compy.event import JSONEvent
+from compy.errors import MalformedEventData
+from compy.testutils.test_actor import TestActorWrapper
+
+schema = {
+    "type": "object",
+    "required": ["id", "name"],
+    "properties": {
+        "id": {"type": "integer", "minimum": 1},
+        "name": {"type": "string", "maxLength": 5}
+    }
+}
+
+class TestJSONValidator(unittest.TestCase):
+
+    kwargs = {}
+
+    def setUp(self):
+        self.actor = TestActorWrapper(JSONValidator("jsonvalidator", schema=schema, **self.kwargs))
+
+    def test_valid_json(self):
+        _input = JSONEvent(data={"id": 1, "name": "foo"})
+        self.actor.input = _input
+        _output = self.actor.output
+        self.assertEqual(_input.data, _output.data)
+
+    def test_invalid_json(self):
+        _input = JSONEvent(data={"id": 0, "name": "foobar"})
+        self.actor.input = _input
+        _output = self.actor.error
+        self.assertTrue(isinstance(_output.error, MalformedEventData))
+
+class TestJSONValidatorCompiledChecks(TestJSONValidator):
+
+    kwargs = {"compiled_checks": True}
+
+class TestJSONValidatorErrors(unittest.TestCase):
+
+    def test_all_errors(self):
+        actor = JSONValidator("jsonvalidator", schema=schema)
+        self.assertEqual(len(actor.validate({"id": 0, "name": "foobar"})), 2)
+
+    def test_max_errors(self):
+        actor = JSONValidator("jsonvalidator", schema=schema, max_errors=1)
+        self.assertEqual(len(actor.validate({"id": 0, "name": "foobar"})), 1)
+
+    def test_result_cache(self):
+        actor = JSONValidator("jsonvalidator", schema=schema, result_cache_size=8)
+        messages = actor.validate({"id": 0})
+        self.assertEqual(actor.validate({"id": 0}), messages)
+        self.assertEqual(actor.validate({"id": 1, "name": "foo"}), None)
+        self.assertEqual(actor.results.snapshot()["hits"], 1)
+        self.assertEqual(len(actor.results), 2)
+
+    def test_result_cache_raw_data(self):
+        actor = JSONValidator("jsonvalidator", schema=schema, result_cache_size=8)
+        messages = actor.validate_event(JSONEvent(data='{"id": 0}', lazy_data=True))
+        self.assertEqual(len(messages), 2)
+        event = JSONEvent(data='{"id": 0}', lazy_data=True)
+        self.assertEqual(actor.validate_event(event), messages)
+        self.assertEqual(actor.results.snapshot()["hits"], 1)
+        # A cached result does not parse the data
+        self.assertEqual(event.raw_data(), '{"id": 0}')
+
+class CountingJSONValidator(JSONValidator):
+
+    compiled_count = 0
+
+    @classmethod
+    def _compile_validator(cls, schema_source):
+        cls.compiled_count += 1
+        return super(CountingJSONValidator, cls)._compile_validator(schema_source)
+
+class TestJSONValidatorPrecompile(unittest.TestCase):
+
+    def test_precompiled_schema_used(self):
+        folder = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(folder, "schema.json"), 'w') as schema_file:
+                json.dump(schema, schema_file, indent=4)
+            self.assertEqual(CountingJSONValidator.precompile(folder), 1)
+            actor = CountingJSONValidator("jsonvalidator", schema=schema)
+            self.assertEqual(CountingJSONValidator.compiled_count, 1)
+            self.assertEqual(len(actor.validate({"id": 0, "name": "foobar"})), 2)
+        finally:
+            shutil.rmtree(folder)
@@ -0,0 +1,245 @@
+import unittest
+from time import time
+
+import gevent
+from pymysql import IntegrityError, OperationalError
+
+from compy.actors.mysql import JSONMySQLWriteActor
+from compy.actors.util.mysql import MySQLConnectionPool, _MySQLConnectionManager
+from compy.errors import ServiceUnavailable
+from compy.event import JSONEvent
+from compy.queue import Queue
+
+class MockException(Exception):
+    pass
+
+class MockCursor(object):
+    lastrowid = None
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, args=None):
+        if self.connection.fail_on is not None and self.connection.fail_on in query:
+            raise IntegrityError(1062, "Duplicate entry")
+        self.connection.calls.append(("execute", query, args))
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+class MockConnection(object):
+    open = True
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+
+    def cursor(self):
+        return MockCursor(self)
+
+    def ping(self, reconnect=True):
+        pass
+
+    def close(self):
+        self.open = False
+
+    def begin(self):
+        self.calls.append(("begin",))
+
+    def commit(self):
+        self.calls.append(("commit",))
+
+    def rollback(self):
+        self.calls.append(("rollback",))
+
+class MockPool(object):
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.released = 0
+
+    def get_connection(self):
+        return self.connection
+
+    def release_connection(self, connection, discard=False):
+        self.released += 1
+
+class MockConnectionPool(MySQLConnectionPool):
+    """A connection pool that opens mock connections, or fails to connect while 'failing' is set"""
+
+    def __init__(self, *args, **kwargs):
+        MySQLConnectionPool.__init__(self, {}, *args, **kwargs)
+        self.failing = False
+        self.connect_delay = 0
+        self.attempts = 0
+
+    def _create_connection(self):
+        self.attempts += 1
+        gevent.sleep(self.connect_delay)
+        if self.failing:
+            raise OperationalError(2003, "Can't connect to MySQL server")
+        return MockConnection()
+
+
+class TestMySQLBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = MockConnection()
+        self.actor = JSONMySQLWriteActor("mysql", db_pool=MockPool(self.connection), schema="db", table="t")
+        self.actor.table_fields = ["id", "name", "count"]
+
+    def assemble(self, param_groups):
+        return self.actor._assemble_batch_query(query_template=self.actor._batch_query_template, param_groups=param_groups)
+
+    def test_batch_statement(self):
+        statements = self.assemble([{"id": 1, "name": "a"}, {"id": 2, "name": "b"}])
+        self.assertEqual(statements, [(
+            "INSERT INTO db.t (`id`, `name`) VALUES (%s, %s), (%s, %s) ON DUPLICATE KEY UPDATE `id`=VALUES(`id`), `name`=VALUES(`name`)",
+            [1, "a", 2, "b"])])
+
+    def test_consecutive_rows_merged(self):
+        statements = self.assemble([{"id": 1, "name": "a"}, {"id": 2, "name": "b"}, {"id": 3, "count": 1}])
+        self.assertEqual([args for query, args in statements], [[1, "a", 2, "b"], [3, 1]])
+
+    def test_order_kept(self):
+        statements = self.assemble([{"id": 1, "name": "a"}, {"id": 1, "count": 2}, {"id": 1, "name": "b"}])
+        self.assertEqual([args for query, args in statements], [[1, "a"], [1, 2], [1, "b"]])
+
+    def test_batch_committed(self):
+        statements = self.assemble([{"id": 1, "name": "a"}, {"id": 2, "count": 1}])
+        self.actor._execute_batch(statements=statements)
+        self.assertEqual([call[0] for call in self.connection.calls], ["begin", "execute", "execute", "commit"])
+        self.assertEqual(self.actor.db_pool.released, 1)
+
+    def test_batch_rolled_back(self):
+        self.connection.fail_on = "`count`"
+        statements = self.assemble([{"id": 1, "name": "a"}, {"id": 2, "count": 1}])
+        with self.assertRaises(IntegrityError):
+            self.actor._execute_batch(statements=statements)
+        self.assertEqual([call[0] for call in self.connection.calls], ["begin", "execute", "rollback"])
+        self.assertEqual(self.actor.db_pool.released, 1)
+
+    def consume_batch(self, events):
+        sent, errors, consumed = [], [], []
+        self.actor.send_event = sent.append
+        self.actor.send_error = errors.append
+        self.actor.consume_batch(events, origin="inbound", origin_queue=Queue("inbound"), consumed=consumed)
+        return sent, errors, consumed
+
+    def test_batch_consumed(self):
+        events = [JSONEvent(data={"id": 1, "name": "a"}), JSONEvent(data={"id": 2, "name": "b"})]
+        sent, errors, consumed = self.consume_batch(events)
+        self.assertEqual([call[0] for call in self.connection.calls], ["begin", "execute", "commit"])
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(consumed, events)
+        self.assertEqual(errors, [])
+
+    def test_failed_batch_written_per_event(self):
+        self.connection.fail_on = "`count`"
+        events = [JSONEvent(data={"id": 1, "name": "a"}), JSONEvent(data={"id": 2, "count": 1})]
+        sent, errors, consumed = self.consume_batch(events)
+        self.assertEqual([call[0] for call in self.connection.calls], ["begin", "execute", "rollback", "execute"])
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(errors, [events[1]])
+        self.assertEqual(consumed, events)
+
+    def test_committed_batch_not_written_again(self):
+        events = [JSONEvent(data={"id": 1, "name": "a"}), JSONEvent(data={"id": 2, "name": "b"})]
+        consumed = []
+        def send_event(event):
+            raise MockException()
+        self.actor.send_event = send_event
+        with self.assertRaises(MockException):
+            self.actor.consume_batch(events, origin="inbound", origin_queue=Queue("inbound"), consumed=consumed)
+        self.assertEqual(consumed, events)
+
+
+class TestMySQLConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = MockConnectionPool(size=2, checkout_timeout=0.1, failure_threshold=2, recovery_timeout=30)
+
+    def test_connections_reused(self):
+        connection = self.pool.get_connection()
+        self.pool.release_connection(connection)
+        self.assertIs(self.pool.get_connection(), connection)
+        self.assertEqual(self.pool.attempts, 1)
+
+    def test_checkout_timeout(self):
+        self.pool.get_connection()
+        self.pool.get_connection()
+        with self.assertRaises(ServiceUnavailable):
+            self.pool.get_connection()
+        self.assertEqual(self.pool.checkout_timeouts, 1)
+        self.assertEqual(self.pool.snapshot()["connections"], 2)
+
+    def test_circuit_opened_after_failure_threshold(self):
+        self.pool.failing = True
+        for _ in range(2):
+            with self.assertRaises(OperationalError):
+                self.pool.get_connection()
+        with self.assertRaises(ServiceUnavailable):
+            self.pool.get_connection()
+        self.assertEqual(self.pool.attempts, 2)
+        self.assertTrue(self.pool.snapshot()["circuit_open"])
+        # Failed checkouts do not hold on to a slot
+        self.pool.failing = False
+        self.pool.circuit_opened = None
+        self.pool.get_connection()
+        self.pool.get_connection()
+
+    def test_single_attempt_after_recovery_timeout(self):
+        self.pool.failing = True
+        for _ in range(2):
+            with self.assertRaises(OperationalError):
+                self.pool.get_connection()
+        self.pool.circuit_opened = time() - 31
+        self.pool.failing = False
+        self.pool.connect_delay = 0.05
+        first, second = gevent.spawn(self.pool.get_connection), gevent.spawn(self.pool.get_connection)
+        gevent.joinall([first, second])
+        self.assertIsInstance(first.value, MockConnection)
+        self.assertIsInstance(second.exception, ServiceUnavailable)
+        self.assertEqual(self.pool.attempts, 3)
+        self.assertFalse(self.pool.snapshot()["circuit_open"])
+        self.assertEqual(self.pool.failures, 0)
+
+    def test_failed_attempt_after_recovery_timeout(self):
+        self.pool.failing = True
+        for _ in range(2):
+            with self.assertRaises(OperationalError):
+                self.pool.get_connection()
+        self.pool.circuit_opened = time() - 31
+        with self.assertRaises(OperationalError):
+            self.pool.get_connection()
+        with self.assertRaises(ServiceUnavailable):
+            self.pool.get_connection()
+        self.assertEqual(self.pool.attempts, 3)
+
+    def test_reset_reconnects_through_pool(self):
+        with _MySQLConnectionManager(db_pool=self.pool) as manager:
+            connection = manager.db_connection
+            manager.reset()
+            self.assertIsNot(manager.db_connection, connection)
+            self.assertFalse(connection.open)
+        self.assertEqual(self.pool.attempts, 2)
+        self.assertEqual(self.pool.snapshot()["connections"], 1)
+        self.assertEqual(self.pool.snapshot()["idle"], 1)
+
+    def test_reset_refused_by_open_circuit(self):
+        with _MySQLConnectionManager(db_pool=self.pool) as manager:
+            self.pool.circuit_opened = time()
+            with self.assertRaises(ServiceUnavailable):
+                manager.reset()
+            self.assertIsNone(manager.db_connection)
+            with self.assertRaises(ServiceUnavailable):
+                manager.execute("SELECT 1")
+        self.assertEqual(self.pool.attempts, 1)
+        self.assertEqual(self.pool.snapshot()["connections"], 0)
+        # Every slot was released
+        self.pool.circuit_opened = None
+        self.pool.get_connection()
+        self.pool.get_connection()
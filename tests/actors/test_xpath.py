@@ -0,0 +1,52 @@
+import unittest
+
+from lxml import etree
+
+from compy.actors.mixins.event import XPathLookupMixin
+from compy.actors.util.xpath import XPathLookup
+from compy.event import XMLEvent
+
+class TestXPathLookup(unittest.TestCase):
+
+    def test_default_namespace(self):
+        xml = etree.fromstring('<root xmlns="http://example.com/ns"><child>value</child></root>')
+        results = XPathLookup(xml).lookup("/root/child")
+        self.assertEqual([element.text for element in results], ["value"])
+
+    def test_compiled_xpath_reused(self):
+        first = etree.fromstring('<root><child>first</child></root>')
+        second = etree.fromstring('<root><child>second</child></root>')
+        XPathLookup(first).lookup("/root/child/text()")
+        hits = XPathLookup.xpaths.hits
+        self.assertEqual(XPathLookup(second).lookup("/root/child/text()"), ["second"])
+        self.assertEqual(XPathLookup.xpaths.hits, hits + 1)
+
+    def test_multiple_lookups_per_instance(self):
+        xml = etree.fromstring('<root xmlns:a="http://example.com/a"><a:child>value</a:child><other>text</other></root>')
+        lookup = XPathLookup(xml)
+        self.assertEqual(lookup.namespaces, {"a": "http://example.com/a"})
+        self.assertEqual(lookup.lookup("/root/a:child/text()"), ["value"])
+        self.assertEqual(lookup.lookup("/root/other/text()"), ["text"])
+
+    def test_cache_is_keyed_on_xpath_and_namespaces(self):
+        xml = etree.fromstring('<root xmlns:a="http://example.com/a"><child>value</child></root>')
+        XPathLookup(xml).lookup("/root/child/text()")
+        self.assertIn(("/root/child/text()", (("a", "http://example.com/a"),)), XPathLookup.xpaths)
+
+    def test_namespaces_are_per_document(self):
+        first = etree.fromstring('<root xmlns="http://example.com/first"><child>first</child></root>')
+        second = etree.fromstring('<root xmlns="http://example.com/second"><child>second</child></root>')
+        self.assertEqual([element.text for element in XPathLookup(first).lookup("/root/child")], ["first"])
+        self.assertEqual([element.text for element in XPathLookup(second).lookup("/root/child")], ["second"])
+
+
+class TestXPathLookupMixin(unittest.TestCase):
+
+    def test_lookup_reused_per_scope(self):
+        event = XMLEvent(data='<root><child>value</child><other>text</other></root>')
+        mixin = XPathLookupMixin()
+        xpath_lookups = {}
+        self.assertEqual(mixin.lookup(obj=event, key_chain=["data", "/root/child"], xpath_lookups=xpath_lookups), ["value"])
+        lookup = xpath_lookups[("data",)]
+        self.assertEqual(mixin.lookup(obj=event, key_chain=["data", "/root/other"], xpath_lookups=xpath_lookups), ["text"])
+        self.assertEqual(xpath_lookups, {("data",): lookup})
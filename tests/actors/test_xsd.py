@@ -50,4 +50,37 @@ class TestXSD(unittest.TestCase):
         _input = XMLEvent(data=invalid_xml)
         self.actor.input = _input
         _output = self.actor.error
-        self.assertTrue(isinstance(_output.error, MalformedEventData))
\ No newline at end of file
+        self.assertTrue(isinstance(_output.error, MalformedEventData))
+
+class TestXSDThreadExecutor(TestXSD):
+
+    def setUp(self):
+        self.actor = TestActorWrapper(XSD("xsd", xsd=xsd, executor="thread"))
+
+class TestXSDProcessExecutor(TestXSD):
+
+    def setUp(self):
+        self.actor = TestActorWrapper(XSD("xsd", xsd=xsd, executor="process"))
+
+class TestXSDStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.actor = TestActorWrapper(XSD("xsd", xsd=xsd, streaming=True))
+
+    def test_valid_xml_left_unparsed(self):
+        _input = XMLEvent(data=valid_xml, lazy_data=True)
+        self.actor.input = _input
+        _output = self.actor.output
+        self.assertEqual(_output.raw_data(), valid_xml)
+
+    def test_invalid_xml(self):
+        _input = XMLEvent(data=invalid_xml, lazy_data=True)
+        self.actor.input = _input
+        _output = self.actor.error
+        self.assertTrue(isinstance(_output.error, MalformedEventData))
+
+    def test_malformed_xml(self):
+        _input = XMLEvent(data="<foo><bar></foo>", lazy_data=True)
+        self.actor.input = _input
+        _output = self.actor.error
+        self.assertTrue(isinstance(_output.error, MalformedEventData))
@@ -32,6 +32,13 @@ class TestPushPullIPC(unittest.TestCase):
         self.assertEqual(_output.event_id, _input.event_id)
         self.assertEqual(_output.meta_id, _input.meta_id)
 
+    def test_push_event_batch(self):
+        self.push.actor.batch_size = 2
+        _inputs = [JSONEvent(data={"foo": "one"}), JSONEvent(data={"foo": "two"})]
+        self.push.actor.consume_batch(_inputs)
+        _outputs = [self.pull.output, self.pull.output]
+        self.assertEqual(sorted(_output.event_id for _output in _outputs), sorted(_input.event_id for _input in _inputs))
+
 
 class TestZMQPushPullTCP(TestPushPullIPC):
 
@@ -950,6 +950,24 @@ class TestActor(unittest.TestCase):
         self.assertEqual(actor._send_events[0]._event_id, actor._send_events[2]._event_id)
         self.assertEqual(actor._send_events[0]._event_id, actor._send_events[3]._event_id)
 
+        #test single queue sends raw event
+        actor = MockedActor('actor')
+        actor._send = actor.mock_send
+        event = Event()
+        actor._loop_send(event=event, queues=[5])
+        self.assertEqual(actor.sent, 1)
+        self.assertIs(actor._send_events[0], event)
+
+        #test multiple queues send independent events
+        actor = MockedActor('actor')
+        actor._send = actor.mock_send
+        event = Event(data={"foo": "bar"})
+        actor._loop_send(event=event, queues=[5, 6])
+        self.assertEqual(actor.sent, 2)
+        self.assertIsNot(actor._send_events[0], actor._send_events[1])
+        actor._send_events[0].data["foo"] = "baz"
+        self.assertEqual(actor._send_events[1].data, {"foo": "bar"})
+
         #test queues is other
         actor = MockedActor('actor')
         actor._send = actor.mock_send
@@ -1225,6 +1243,106 @@ class TestActor(unittest.TestCase):
         with self.assertRaises(QueueEmpty):
             actor._Actor__get_queued_event(queue=queue)
 
+    def test_max_concurrency(self):
+        #test default unbounded workers
+        actor = MockedActor('actor')
+        self.assertEqual(actor.max_concurrency, None)
+        self.assertIsInstance(actor.workers, RestartPool)
+        self.assertEqual(actor.workers.size, None)
+        self.assertEqual(actor.in_flight, 0)
+
+        #test admission blocks queue drain once max_concurrency is reached
+        actor = MockedActor('actor', max_concurrency=1)
+        actor._Actor__do_consume = lambda function, event, queue: gevent.sleep(2)
+        queue = Queue('queue_name')
+        queue.put("some_event_1")
+        queue.put("some_event_2")
+        actor._Actor__process_consumer_event(function=None, queue=queue)
+        self.assertEqual(actor.in_flight, 1)
+        self.assertEqual(queue.qsize(), 1)
+        start = time.time()
+        actor._Actor__process_consumer_event(function=None, queue=queue)
+        self.assertGreater(time.time() - start, 1)
+        self.assertEqual(queue.qsize(), 0)
+        actor.workers.kill()
+
+    def test_get_queued_batch(self):
+        #test batch limited by batch_size
+        actor = MockedActor('actor', batch_size=2)
+        queue = Queue('queue_name')
+        queue.put("some_event_1")
+        queue.put("some_event_2")
+        queue.put("some_event_3")
+        events = actor._Actor__get_queued_batch(queue=queue)
+        self.assertEqual(events, ["some_event_1", "some_event_2"])
+        self.assertEqual(queue.qsize(), 1)
+
+        #test batch limited by queue content
+        events = actor._Actor__get_queued_batch(queue=queue)
+        self.assertEqual(events, ["some_event_3"])
+        self.assertEqual(queue.qsize(), 0)
+
+        #test empty queue
+        events = actor._Actor__get_queued_batch(queue=queue)
+        self.assertEqual(events, [])
+
+        #test batch_timeout waits for content
+        actor = MockedActor('actor', batch_size=2, batch_timeout=3)
+        queue = Queue('queue_name')
+        queue.put("some_event_1")
+        actor.threads.spawn(actor.mock_modify_content, queue=queue)
+        events = actor._Actor__get_queued_batch(queue=queue)
+        self.assertEqual(events, ["some_event_1", "mock_event"])
+        actor.threads.kill()
+
+    def test_consume_batch(self):
+        #test default batch consume passes each event to consume
+        actor = MockedActor('actor', batch_size=2)
+        events = [Event(), Event()]
+        actor.consume_batch(events, origin="queue_name")
+        self.assertEqual(actor.consumed, True)
+        self.assertIs(actor.consumed_event, events[1])
+        self.assertEqual(actor.consumed_kwargs, {"origin": "queue_name"})
+
+        #test batch consume rescues every event on failure
+        actor = MockedActor('actor', batch_size=2)
+        actor.input = actor.ensure_tuple(data=actor.input) # normally done by start()
+        actor.send_error = actor.mock_send_error
+        queue = Queue('queue_name')
+        def failing_batch(events, *args, **kwargs):
+            raise MockException()
+        actor._Actor__do_consume_batch(failing_batch, events, queue)
+        self.assertEqual(len(actor.send_error_event), 2)
+        self.assertIsInstance(actor.send_error_event[0].error, MockException)
+
+        #test batch consume only rescues the events that were not consumed
+        actor = MockedActor('actor', batch_size=2)
+        actor.input = actor.ensure_tuple(data=actor.input)
+        actor.send_error = actor.mock_send_error
+        def partial_batch(events, consumed, *args, **kwargs):
+            consumed.append(events[0])
+            raise MockException()
+        actor._Actor__do_consume_batch(partial_batch, events, queue)
+        self.assertEqual(actor.send_error_event, [events[1]])
+
+    def test_consume_batch_errors_per_event(self):
+        actor = MockedActor('actor', batch_size=3)
+        actor.input = actor.ensure_tuple(data=actor.input)
+        actor.send_error = actor.mock_send_error
+        events = [Event(), Event(), Event()]
+        consumed_events = []
+        def consume(event, *args, **kwargs):
+            if event is events[1]:
+                raise MockException()
+            consumed_events.append(event)
+        actor.consume = consume
+        queue = Queue('queue_name')
+        actor._Actor__do_consume_batch(actor.consume_batch, events, queue)
+        self.assertEqual(consumed_events, [events[0], events[2]])
+        self.assertEqual(actor.send_error_event, [events[1]])
+        self.assertIsInstance(events[1].error, MockException)
+        self.assertEqual(queue.qsize(), 0)
+
     def test_process_consumer_event(self):
         #test queue empty
         actor = MockedActor('actor')
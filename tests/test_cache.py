@@ -0,0 +1,79 @@
+import re
+import time
+import unittest
+
+import gevent
+
+from compy.util.cache import LRUCache, RegexCache, SingleFlight, TTLCache
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("one", 1)
+        cache.set("two", 2)
+        cache.get("one")
+        cache.set("three", 3)
+        self.assertEqual(cache.get("one"), 1)
+        self.assertNotIn("two", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_evicts_until_within_maxbytes(self):
+        cache = LRUCache(maxsize=10, maxbytes=10)
+        cache.set("one", 1, size=6)
+        cache.set("two", 2, size=6)
+        self.assertNotIn("one", cache)
+        self.assertEqual(cache.bytes, 6)
+        cache.pop("two")
+        self.assertEqual(cache.bytes, 0)
+
+    def test_snapshot(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("one", 1)
+        cache.get("one")
+        cache.get("two")
+        snapshot = cache.snapshot()
+        self.assertEqual(snapshot["hits"], 1)
+        self.assertEqual(snapshot["misses"], 1)
+        self.assertEqual(snapshot["hit_rate"], 0.5)
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_entries_expire(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("positive", 1)
+        cache.set("negative", 0, ttl=0.01)
+        time.sleep(0.02)
+        self.assertEqual(cache.get("positive"), 1)
+        self.assertIsNone(cache.get("negative"))
+        self.assertNotIn("negative", cache)
+        self.assertEqual(cache.misses, 1)
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_calls_coalesced(self):
+        calls = []
+        def query():
+            calls.append(1)
+            gevent.sleep(0.01)
+            return "result"
+
+        flight = SingleFlight()
+        greenlets = [gevent.spawn(flight.do, "key", query) for _ in range(5)]
+        gevent.joinall(greenlets)
+        self.assertEqual([greenlet.value for greenlet in greenlets], ["result"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.calls, {})
+
+
+class TestRegexCache(unittest.TestCase):
+
+    def test_compiled_once(self):
+        cache = RegexCache(maxsize=2)
+        regex = cache.compile("^[0-9]+$")
+        self.assertIs(cache.compile("^[0-9]+$"), regex)
+        self.assertIsNot(cache.compile("^[0-9]+$", flags=re.IGNORECASE), regex)
+        self.assertEqual(cache.hits, 1)
+        self.assertTrue(regex.match("123"))
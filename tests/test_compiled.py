@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from compy.util.compiled import CompiledRegistry
+
+class TestCompiledRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = CompiledRegistry()
+        self.compiled = []
+
+    def compile(self, source):
+        self.compiled.append(source)
+        return object()
+
+    def test_same_source_compiled_once(self):
+        first = self.registry.get("xsd", "<schema/>", self.compile)
+        second = self.registry.get("xsd", "<schema/>", self.compile)
+        self.assertIs(first, second)
+        self.assertEqual(self.compiled, ["<schema/>"])
+
+    def test_kinds_compiled_separately(self):
+        first = self.registry.get("xsd", "<schema/>", self.compile)
+        second = self.registry.get("xslt", "<schema/>", self.compile)
+        self.assertIsNot(first, second)
+        self.assertEqual(len(self.registry), 2)
+
+    def test_precompile(self):
+        folder = tempfile.mkdtemp()
+        try:
+            for name in ("a.xsd", "b.xsd", "c.txt"):
+                with open(os.path.join(folder, name), 'w') as source_file:
+                    source_file.write(name)
+            self.assertEqual(self.registry.precompile("xsd", folder, self.compile, file_regex=r".*\.xsd$"), 2)
+            self.registry.get("xsd", "a.xsd", self.compile)
+            self.assertEqual(sorted(self.compiled), ["a.xsd", "b.xsd"])
+        finally:
+            shutil.rmtree(folder)
+
+    def test_precompile_normalized(self):
+        folder = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(folder, "a.json"), 'w') as source_file:
+                source_file.write(" A ")
+            self.registry.precompile("json", folder, self.compile, normalize=lambda source: source.strip().lower())
+            self.registry.get("json", "a", self.compile)
+            self.assertEqual(self.compiled, ["a"])
+        finally:
+            shutil.rmtree(folder)
@@ -1,5 +1,7 @@
 import unittest
 import abc
+import json
+import logging
 import gevent
 import time
 import signal
@@ -113,6 +115,66 @@ class TestDirector(unittest.TestCase):
 	def test_create_actor(self):
 		pass
 
+	def test_get_metrics(self):
+		director = Director()
+		director.register_actor(STDOUT, "stdout")
+		metrics = director.get_metrics()
+		self.assertEqual(sorted(metrics.keys()), sorted(["stdout", "default_stdout", "default_error_logger"]))
+		self.assertEqual(metrics["stdout"]["consumed"], 0)
+		self.assertEqual(metrics["stdout"]["consume_latency_ms"]["p99"], 0.0)
+
+	def test_register_metrics_actor(self):
+		director = Director()
+		metrics_actor = director.register_metrics_actor(STDOUT, "metrics", interval=5)
+		self.assertIsInstance(metrics_actor, STDOUT)
+		self.assertEqual(director.metrics_interval, 5)
+		self.assertIn("metrics", director.get_metrics())
+
+	def test_read_reports(self):
+		director = Director(workers=2)
+		report_read, report_write = os.pipe()
+		aggregate_read, aggregate_write = os.pipe()
+		director._Director__worker_pipes = {0: (report_read, aggregate_write)}
+		director.worker_metrics = {0: {"stdout": {"consumed": 1}}, 1: {"stdout": {"consumed": 2}}}
+		buffers = {}
+		try:
+			os.write(report_write, '{"stdout": {"consumed": \n{"stdout": ')
+			director._Director__read_reports(buffers=buffers, timeout=1)
+			self.assertEqual(director.worker_metrics[0], {"stdout": {"consumed": 1}})
+			self.assertEqual(json.loads(os.read(aggregate_read, 65536)), {"stdout": {"consumed": 3}})
+
+			os.write(report_write, '{"consumed": 5}}\n')
+			director._Director__read_reports(buffers=buffers, timeout=1)
+			self.assertEqual(director.worker_metrics[0], {"stdout": {"consumed": 5}})
+			self.assertEqual(json.loads(os.read(aggregate_read, 65536)), {"stdout": {"consumed": 7}})
+		finally:
+			for fd in (report_read, report_write, aggregate_read, aggregate_write):
+				os.close(fd)
+
+	def test_workers_report_metrics(self):
+		director = Director(workers=2, worker_report_interval=0.1, worker_stop_timeout=2)
+		director.register_actor(STDOUT, "stdout")
+		supervisor = gevent.spawn(director.start)
+		try:
+			waited = 0
+			while len(director.worker_metrics) < 2 and waited < 5:
+				gevent.sleep(0.1)
+				waited += 0.1
+			self.assertEqual(sorted(director.worker_metrics.keys()), [0, 1])
+			self.assertEqual(director.get_metrics()["stdout"]["consumed"], 0)
+		finally:
+			director.stop()
+			supervisor.join(timeout=5)
+		self.assertTrue(supervisor.ready())
+		self.assertEqual(director._Director__worker_pids, {})
+
+	def test_log_level_propagated(self):
+		director = Director(log_level="warning")
+		actor = director.register_actor(STDOUT, "stdout")
+		director._setup_default_connections()
+		self.assertEqual(actor.logger.level, logging.WARNING)
+		self.assertEqual(director.log_actor.logger.level, logging.WARNING)
+
 	def test_setup_default_connections(self):
 		pass
 
@@ -1,7 +1,14 @@
+import json
+import logging
+import pickle
 import unittest
+from datetime import datetime
+from decimal import Decimal
+from lxml import etree
 
-from compy.event import HttpEvent, Event, CompysitionException
-from compy.errors import ResourceNotFound
+from compy.event import HttpEvent, Event, JSONEvent, XMLEvent, LogEvent, CompysitionException
+from compy.actors.mixins.event import _getConversionMethods
+from compy.errors import ResourceNotFound, InvalidEventDataModification
 
 class TestEvent(unittest.TestCase):
     def setUp(self):
@@ -10,8 +17,188 @@ class TestEvent(unittest.TestCase):
     def test_distinct_meta_and_event_ids(self):
         self.assertNotEqual(self.event.event_id, self.event.meta_id)
 
+    def test_event_ids(self):
+        event_ids = set(Event().event_id for _ in xrange(100))
+        self.assertEqual(len(event_ids), 100)
+        for event_id in event_ids:
+            self.assertRegexpMatches(event_id, "^[0-9a-f]{32}$")
+
+    def test_created(self):
+        self.assertIsInstance(self.event.created, datetime)
+        created = datetime(2016, 1, 2, 3, 4, 5, 6000)
+        self.event.created = created
+        self.assertEqual(self.event.created, created)
+
+    def test_created_kwarg(self):
+        created = datetime(2016, 1, 2, 3, 4, 5, 6000)
+        self.assertEqual(Event(created=created).created, created)
+
+    def test_created_state(self):
+        created = datetime(2016, 1, 2, 3, 4, 5, 6000)
+        self.event.created = created
+        state = self.event.__getstate__()
+        self.assertEqual(state['created'], created)
+        self.assertNotIn('_created', state)
+        self.assertEqual(pickle.loads(pickle.dumps(self.event)).created, created)
+        self.assertEqual(self.event.get_properties()['created'], created)
+
+
+class TestLogEvent(unittest.TestCase):
+    def test_data_built_on_access(self):
+        event = LogEvent(logging.INFO, "actor", "message", id="123")
+        self.assertNotIn("_time", event.__dict__)
+        self.assertEqual(event.data, {"id": "123", "level": logging.INFO, "time": event.time, "origin_actor": "actor", "message": "message"})
+        self.assertRegexpMatches(event.time, "^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}$")
+
+
+class TestEventFork(unittest.TestCase):
+    def setUp(self):
+        self.event = JSONEvent(data={'foo': 'bar'}, meta_id='123456abcdef')
+
+    def test_fork_preserves_attributes(self):
+        fork = self.event.fork()[0]
+        self.assertIsInstance(fork, JSONEvent)
+        self.assertEqual(fork.event_id, self.event.event_id)
+        self.assertEqual(fork.meta_id, self.event.meta_id)
+        self.assertEqual(fork.data, self.event.data)
+
+    def test_fork_data_is_independent(self):
+        forks = self.event.fork(copies=2)
+        forks[0].data['foo'] = 'baz'
+        self.assertEqual(self.event.data, {'foo': 'bar'})
+        self.assertEqual(forks[1].data, {'foo': 'bar'})
+        self.assertEqual(forks[0].data, {'foo': 'baz'})
+
+    def test_fork_last_claimant_keeps_payload(self):
+        original_data = self.event.data
+        fork = self.event.fork()[0]
+        self.assertIsNot(fork.data, original_data)
+        self.assertIs(self.event.data, original_data)
+
+    def test_fork_data_replaced_before_access(self):
+        original_data = self.event.data
+        fork = self.event.fork()[0]
+        self.event.data = {'new': 'data'}
+        self.assertIs(fork.data, original_data)
+
+
+class TestEventDataString(unittest.TestCase):
+    def setUp(self):
+        self.event = JSONEvent(data={'foo': 'bar'})
+
+    def test_raw_data_string_is_kept(self):
+        raw = '{"foo":   "bar"}'
+        event = JSONEvent(data=raw, lazy_data=True)
+        self.assertIs(event.data_string(), raw)
+        self.assertIs(event.data_string(), raw)
+
+    def test_data_string_serialized_once(self):
+        data_string = self.event.data_string()
+        self.assertEqual(data_string, '{"foo": "bar"}')
+        self.assertIs(self.event.data_string(), data_string)
+
+    def test_xml_data_string_serialized_once(self):
+        event = XMLEvent(data="<foo>bar</foo>")
+        event.data.text = "baz"
+        data_string = event.data_string()
+        self.assertEqual(data_string, "<foo>baz</foo>")
+        self.assertIs(event.data_string(), data_string)
+
+    def test_data_string_invalidated_on_set(self):
+        self.event.data_string()
+        self.event.data = {'foo': 'baz'}
+        self.assertEqual(self.event.data_string(), '{"foo": "baz"}')
+
+    def test_data_string_invalidated_on_modification(self):
+        self.event.data_string()
+        self.event.data['foo'] = 'baz'
+        self.assertEqual(self.event.data_string(), '{"foo": "baz"}')
+
+    def test_converted_raw_data_is_kept(self):
+        raw = '{"foo":   "bar"}'
+        event = HttpEvent(data=raw).convert(JSONEvent)
+        self.assertEqual(event.data, {'foo': 'bar'})
+        event = HttpEvent(data=raw).convert(JSONEvent)
+        self.assertIs(event.data_string(), raw)
+
+    def test_pickled_data_string(self):
+        state = self.event.__getstate__()
+        self.assertEqual(state['_data'], '{"foo": "bar"}')
+        self.assertNotIn('_data_string', state)
+
+
+class TestLazyEventData(unittest.TestCase):
+    def test_raw_data_is_not_parsed_until_accessed(self):
+        event = JSONEvent(data='{"foo": "bar"}', lazy_data=True)
+        self.assertIn('_data_pending', event.__dict__)
+        self.assertEqual(event.data_string(), '{"foo": "bar"}')
+        self.assertIn('_data_pending', event.__dict__)
+        self.assertEqual(event.data, {'foo': 'bar'})
+        self.assertNotIn('_data_pending', event.__dict__)
+
+    def test_malformed_data_raised_on_access(self):
+        event = JSONEvent(data='{"foo": ', lazy_data=True)
+        with self.assertRaises(InvalidEventDataModification):
+            event.data
+
+    def test_pickled_raw_data_stays_lazy(self):
+        event = JSONEvent(data='{"foo": "bar"}', lazy_data=True)
+        unpickled = pickle.loads(pickle.dumps(event))
+        self.assertIn('_data_pending', unpickled.__dict__)
+        self.assertEqual(unpickled.data, {'foo': 'bar'})
+
+    def test_fork_raw_data(self):
+        event = JSONEvent(data='{"foo": "bar"}', lazy_data=True)
+        fork = event.fork()[0]
+        fork.data['foo'] = 'baz'
+        self.assertEqual(event.data, {'foo': 'bar'})
+
+    def test_plain_json_is_not_copied(self):
+        data = {'foo': ['bar', 1, 2.0, None, True]}
+        self.assertIs(JSONEvent(data=data).data, data)
+
+    def test_non_json_types_are_normalized(self):
+        event = JSONEvent(data={'foo': Decimal('1.5'), 1: ('bar',)})
+        self.assertEqual(event.data, {'foo': 1.5, '1': ['bar']})
+
+
+class TestEventConversion(unittest.TestCase):
+    def assertConversionMatches(self, data, convert_to):
+        methods = _getConversionMethods()
+        if convert_to is XMLEvent:
+            direct, serialized = methods.json_to_xml(data), methods.json_to_xml_serialized(data)
+            self.assertEqual(etree.tostring(direct), etree.tostring(serialized))
+        else:
+            data = etree.fromstring(data)
+            self.assertEqual(json.dumps(methods.xml_to_json(data)), json.dumps(methods.xml_to_json_serialized(data)))
+
+    def test_json_to_xml(self):
+        self.assertEqual(JSONEvent(data={"foo": "bar"}).convert(XMLEvent).data_string(), "<foo>bar</foo>")
+        self.assertConversionMatches({"root": {"@id": 1, "foo": ["bar", None, 2.5], "#text": "text"}}, XMLEvent)
+        self.assertConversionMatches({"foo": "bar", "fubar": {"bar": [{"@id": "1"}, {"#text": "x"}]}}, XMLEvent)
+        self.assertConversionMatches([{"foo": "bar"}, {"foo": "bar"}], XMLEvent)
+
+    def test_json_to_xml_fallback(self):
+        self.assertConversionMatches({"root": {"flag": True, "ns:foo": {"@xmlns:ns": "urn:ns"}}}, XMLEvent)
+
+    def test_xml_to_json(self):
+        self.assertEqual(XMLEvent(data="<foo>bar</foo>").convert(JSONEvent).data, {"foo": "bar"})
+        self.assertConversionMatches("<root id='1'><foo>bar</foo><foo/> text <!-- comment --><bar x='y'>baz</bar></root>", JSONEvent)
+        self.assertConversionMatches("<compy_conversion_wrapper><foo compy_json_type='list'>bar</foo><bar><x compy_json_type='list'/></bar></compy_conversion_wrapper>", JSONEvent)
+
+    def test_xml_to_json_fallback(self):
+        self.assertConversionMatches("<root xmlns:ns='urn:ns'><ns:foo>bar</ns:foo></root>", JSONEvent)
+
 
 class TestHttpEvent(unittest.TestCase):
+    def test_environment_built_on_access(self):
+        self.event = HttpEvent(environment={"request": {"method": "POST", "url": {"path_args": {"queue": "foo"}}}})
+        self.assertNotIn("_environment", self.event.__dict__)
+        self.assertEqual(self.event.service, "foo")
+        self.assertEqual(self.event.environment["request"]["method"], "POST")
+        self.assertEqual(self.event.environment["request"]["url"]["path"], None)
+        self.assertEqual(self.event.environment["response"]["status"], 200)
+
     def test_default_status(self):
         self.event = HttpEvent(data='quick brown fox')
         self.assertEquals(self.event.status, (200, 'OK'))
@@ -43,3 +230,11 @@ class TestHttpEvent(unittest.TestCase):
         self.event = HttpEvent()
         self.event.error = CompysitionException()
         self.assertEquals(self.event.status, (500, 'Internal Server Error'))
+
+    def test_partial_response(self):
+        self.event = HttpEvent(data='quick brown fox')
+        self.assertFalse(self.event.partial)
+        self.event.partial = True
+        part = self.event.clone()
+        self.assertEqual(part.event_id, self.event.event_id)
+        self.assertTrue(part.partial)
@@ -0,0 +1,55 @@
+import operator
+import unittest
+
+import gevent
+
+from compy.executor import execute, compile_once, ProcessPool
+
+def _fail(message):
+    raise ValueError(message)
+
+def _compile_count(key, compiled=[]):
+    compiled.append(key)
+    return compile_once(key, len, compiled)
+
+class TestExecute(unittest.TestCase):
+
+    def test_inline(self):
+        self.assertEqual(execute(None, operator.add, 1, 2), 3)
+
+    def test_thread(self):
+        self.assertEqual(execute("thread", operator.add, 1, 2), 3)
+
+    def test_process(self):
+        self.assertEqual(execute("process", operator.add, 1, 2), 3)
+
+    def test_process_error(self):
+        with self.assertRaises(ValueError):
+            execute("process", _fail, "failed")
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            execute("unknown", operator.add, 1, 2)
+
+class TestProcessPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ProcessPool(size=2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_concurrent_calls(self):
+        greenlets = [gevent.spawn(self.pool.apply, operator.mul, (index, 2)) for index in xrange(10)]
+        gevent.joinall(greenlets, raise_error=True)
+        self.assertEqual([greenlet.value for greenlet in greenlets], [index * 2 for index in xrange(10)])
+        self.assertEqual(len(self.pool.workers), 2)
+
+    def test_large_payload(self):
+        payload = "x" * (4 * 1024 * 1024)
+        self.assertEqual(self.pool.apply(len, (payload,)), len(payload))
+
+    def test_compiled_once_per_process(self):
+        self.pool = ProcessPool(size=1)
+        self.assertEqual(self.pool.apply(_compile_count, ("key",)), 1)
+        self.assertEqual(self.pool.apply(_compile_count, ("key",)), 1)
@@ -0,0 +1,40 @@
+import logging
+import unittest
+
+from compy.logger import Logger
+from compy.queue import _InternalQueuePool, RingQueue
+
+class TestLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = _InternalQueuePool(queue_class=RingQueue)
+        self.queue = self.pool.add("logs")
+        self.logger = Logger("actor", self.pool)
+
+    def test_level_filtered_at_source(self):
+        self.logger.level = logging.INFO
+        self.logger.debug("debug message")
+        self.assertEqual(self.queue.qsize(), 0)
+        self.logger.info("info message")
+        self.assertEqual(self.queue.qsize(), 1)
+        self.assertFalse(self.logger.is_enabled_for(logging.DEBUG))
+        self.assertTrue(self.logger.is_enabled_for(logging.ERROR))
+
+    def test_deferred_message_formatting(self):
+        self.logger.info("Received {method} request", method="POST")
+        log_event = self.queue.get()
+        self.assertIn("_message_kwargs", log_event.__dict__)
+        self.assertEqual(log_event.message, "Received POST request")
+        self.assertEqual(log_event.data["message"], "Received POST request")
+
+    def test_unformatted_message(self):
+        self.logger.info("{literal braces}")
+        self.assertEqual(self.queue.get().message, "{literal braces}")
+
+    def test_multiple_queues(self):
+        other_queue = self.pool.add("other_logs")
+        self.logger.warning("message", log_entry_id="123")
+        log_event, other_log_event = self.queue.get(), other_queue.get()
+        self.assertIsNot(log_event, other_log_event)
+        self.assertEqual(log_event.id, other_log_event.id)
+        self.assertEqual(other_log_event.message, "message")
@@ -0,0 +1,61 @@
+import unittest
+import gevent
+
+from compy.actors.null import Null
+from compy.event import Event
+from compy.metrics import LatencyHistogram, aggregate_metrics
+from compy.testutils.test_actor import TestActorWrapper
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_empty_snapshot(self):
+        snapshot = LatencyHistogram().snapshot()
+        self.assertEqual(snapshot["count"], 0)
+        self.assertEqual(snapshot["mean"], 0.0)
+        self.assertEqual(snapshot["p50"], 0.0)
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 101):
+            histogram.record(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 100)
+        self.assertEqual(snapshot["max"], 100)
+        self.assertEqual(snapshot["p50"], 51)
+        self.assertEqual(snapshot["p95"], 95)
+        self.assertEqual(snapshot["p99"], 99)
+
+    def test_samples_are_bounded(self):
+        histogram = LatencyHistogram(size=10)
+        for value in range(100):
+            histogram.record(value)
+        self.assertEqual(len(histogram.samples), 10)
+        self.assertEqual(histogram.count, 100)
+
+
+class TestActorMetrics(unittest.TestCase):
+
+    def test_consume_recorded(self):
+        actor = TestActorWrapper(Null("null"))
+        actor.input = Event()
+        actor.input = Event()
+        gevent.sleep(0.1)
+        snapshot = actor.actor.metrics.snapshot()
+        self.assertEqual(snapshot["consumed"], 2)
+        self.assertEqual(snapshot["consume_latency_ms"]["count"], 2)
+        self.assertEqual(snapshot["inbound_queues"]["inbox"]["gets"], 2)
+        self.assertEqual(snapshot["inbound_queues"]["inbox"]["depth"], 0)
+
+
+class TestAggregateMetrics(unittest.TestCase):
+
+    def test_worker_snapshots_combined(self):
+        first = {"actor": {"consumed": 2, "consume_latency_ms": {"count": 2, "mean": 1.0, "max": 2.0, "p99": 2.0},
+                           "inbound_queues": {"inbox": {"depth": 1, "high_water_mark": 3}}}}
+        second = {"actor": {"consumed": 6, "consume_latency_ms": {"count": 6, "mean": 3.0, "max": 5.0, "p99": 4.0},
+                            "inbound_queues": {"inbox": {"depth": 2, "high_water_mark": 1}}}}
+        aggregate = aggregate_metrics([first, second])["actor"]
+        self.assertEqual(aggregate["consumed"], 8)
+        self.assertEqual(aggregate["consume_latency_ms"], {"count": 8, "mean": 2.5, "max": 5.0, "p99": 4.0})
+        self.assertEqual(aggregate["inbound_queues"]["inbox"], {"depth": 3, "high_water_mark": 3})
+        self.assertEqual(first["actor"]["consumed"], 2)
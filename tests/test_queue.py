@@ -0,0 +1,56 @@
+import unittest
+import gevent
+
+from compy.queue import Queue, RingQueue
+from compy.errors import QueueFull
+
+class TestQueue(unittest.TestCase):
+
+    def test_wait_until_free(self):
+        queue = Queue("queue_name", maxsize=1)
+        queue.put("some_event_1")
+        with self.assertRaises(QueueFull):
+            queue.put("some_event_2", block=False)
+        gevent.spawn_later(0.5, queue.get)
+        queue.wait_until_free()
+        self.assertEqual(queue.qsize(), 0)
+        queue.put("some_event_2", block=False)
+        self.assertEqual(queue.qsize(), 1)
+
+    def test_wait_until_free_unbounded(self):
+        queue = Queue("queue_name")
+        queue.put("some_event_1")
+        queue.wait_until_free()
+        self.assertEqual(queue.qsize(), 1)
+
+    def test_wait_until_empty(self):
+        queue = Queue("queue_name")
+        queue.put("some_event_1")
+        queue.put("some_event_2")
+        gevent.spawn_later(0.5, lambda: [queue.get(), queue.get()])
+        queue.wait_until_empty()
+        self.assertEqual(queue.qsize(), 0)
+
+    def test_wait_until_empty_already_empty(self):
+        queue = Queue("queue_name")
+        queue.wait_until_empty()
+        self.assertEqual(queue.qsize(), 0)
+
+
+class TestRingQueue(unittest.TestCase):
+
+    def test_put_discards_oldest(self):
+        queue = RingQueue("queue_name", maxsize=2)
+        for element in ("some_event_1", "some_event_2", "some_event_3"):
+            queue.put(element, block=False)
+        self.assertEqual(queue.qsize(), 2)
+        self.assertEqual(queue.dropped, 1)
+        self.assertEqual(queue.get(), "some_event_2")
+        self.assertEqual(queue.get(), "some_event_3")
+
+    def test_unbounded(self):
+        queue = RingQueue("queue_name")
+        for element in ("some_event_1", "some_event_2", "some_event_3"):
+            queue.put(element)
+        self.assertEqual(queue.qsize(), 3)
+        self.assertEqual(queue.dropped, 0)